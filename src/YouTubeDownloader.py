@@ -32,11 +32,14 @@ SOFTWARE.
 import os
 os.system("title Don't mind the LOG window!")
 import argparse
+import multiprocessing
 import ctypes
 # import gui.splashscreen
 from cli.CLI_VideoListManager import VideoListManagerCLI
 from core.common import audio_bitrate_list, video_resolution_list, fps_value_list
 from core.download_options import setOutputKeepsStr
+from core.limiters import parse_rate
+from core.metadata_cache import CACHE_MODES, CACHE_METADATA
 from web.default_config import default as DefaultCFG
 
 # Version of this downloader
@@ -60,16 +63,47 @@ def run_cli(args):
     # Output format definition
     outputExt = ".mkv"
     # Parameters for Analysis
-    use_multithreading_analysis = args.enable_analysis_threading
+    use_multithreading_analysis = bool(args.enable_analysis_threading)
+    if use_multithreading_analysis:
+        vlm.max_analysis_workers = args.enable_analysis_threading
+    #end
+    vlm.use_async_analysis = args.async_analysis
+    vlm.stream_mux = args.stream_mux
+    vlm.concurrent_streams = not args.single_pass
+    vlm.metadata_cache_mode = args.metadata_cache
+    vlm.merge_tool = args.merge_tool
+    vlm.max_streams_per_host = args.streams_per_host
+    vlm.set_bandwidth_limits(args.max_rate, args.job_rate)
+    # Journal the downloads (and keep the partial ones of the failed items) only with --resume, so a later --resume can continue them
+    vlm.resume_downloads = args.resume
     # Parameters for Download
-    process_via_multithreading = args.enable_download_threading
+    process_via_multithreading = bool(args.enable_download_threading)
+    if process_via_multithreading:
+        vlm.max_download_workers = args.enable_download_threading
+        vlm.max_mux_workers = args.mux_workers
+    #end
     
     input_text = " ".join(args.urls)
 
     vlm.setUiDispStatus("Analysis started")
-    vlm.import_valid_Youtube_videos_from_textOrURL_list( 
-                text=input_text,
-                use_analysis_multithreading=use_multithreading_analysis)
+    # Resume the unfinished jobs of the output directory first, they keep their own download flags
+    resumed_ids = set()
+    if args.resume:
+        n_resumed = vlm.resume_from_journal(args.output, use_analysis_multithreading=use_multithreading_analysis)
+        resumed_ids = vlm.infoList.get_video_ids()
+        vlm.setUiDispStatus(f"Resumed {n_resumed} unfinished item(s) from the journal")
+    #end
+    if args.sync:
+        # Incremental channel sync: only the uploads since the last sync of each channel are imported
+        new_per_channel, _ = vlm.sync_channels(args.urls, args.output, use_analysis_multithreading=use_multithreading_analysis)
+        for channel_url, n_new in new_per_channel.items():
+            print(f"{channel_url}: {'sync failed' if n_new is None else f'{n_new} new upload(s)'}")
+        #end
+    elif input_text:
+        vlm.import_valid_Youtube_videos_from_textOrURL_list( 
+                    text=input_text,
+                    use_analysis_multithreading=use_multithreading_analysis)
+    #end
     vlm.setUiDispStatus("Analysis completed")
 
     limits = vlm.getLimitsAndPriorityFromInputArguments(args)
@@ -80,6 +114,9 @@ def run_cli(args):
 
     # Set the download flags
     for item in vlm.infoList:
+        if item.video_id in resumed_ids:
+            continue
+        #end
         item.download_status = setOutputKeepsStr(
             combined=args.combine,
             audio_only=args.audio,
@@ -104,8 +141,27 @@ def run_cli(args):
 def run_web_service(args):
     from web.webapp import run_from_dispatcher as run_webapp
     run_webapp(port=args.port,output_dir=args.output,
-                use_multithreading_analysis=args.enable_analysis_threading,
-                process_via_multithreading=args.enable_download_threading)
+                use_multithreading_analysis=bool(args.enable_analysis_threading),
+                max_analysis_workers=args.enable_analysis_threading or DefaultCFG.AN_WORKERS,
+                process_via_multithreading=bool(args.enable_download_threading),
+                max_download_workers=args.enable_download_threading or DefaultCFG.DL_WORKERS,
+                max_mux_workers=args.mux_workers,
+                use_async_analysis=args.async_analysis,
+                max_download_rate=args.max_rate,
+                max_job_rate=args.job_rate)
+#end
+
+def run_set_bandwidth(args):
+    # Change the bandwidth limits of a running web service through its API
+    import json
+    import urllib.request
+    # Only the limits given on the command line are changed, the others stay as the server has them
+    limits = {key: rate for key, rate in (("maxDownloadRate", args.max_rate), ("maxJobRate", args.job_rate)) if rate is not None}
+    request = urllib.request.Request(args.set_bandwidth.rstrip("/") + "/api/bandwidthLimits", method="POST",
+                                     data=json.dumps(limits).encode(), headers={"Content-Type": "application/json"})
+    with urllib.request.urlopen(request, timeout=10) as response:
+        print(f"Bandwidth limits of [{args.set_bandwidth}]: {json.loads(response.read())}")
+    #end
 #end
 
 ## Main function and also a command line parsing tool
@@ -118,17 +174,41 @@ def main():
     mode_parser.add_argument("--gui", action="store_true", help="Run GUI")
     mode_parser.add_argument("--web", action="store_true", help="Run as web service")
     mode_parser.add_argument("--cli", action="store_true", help="Run in CLI (command line interface) mode")
+    mode_parser.add_argument("--sync", action="store_true",
+                             help="Run in CLI mode as an incremental channel sync: the URLs are channels and only their uploads since the last sync are downloaded")
 
     # Analysis multithreading argument
-    mode_parser.add_argument("-eat", "--enable-analysis-threading", action="store_true", help="Enable multithreading for URL analysis")
+    mode_parser.add_argument("-eat", "--enable-analysis-threading", nargs="?", type=int, const=DefaultCFG.AN_WORKERS, default=0, metavar="WORKERS",
+                             help=f"Enable multithreading for URL analysis with an optional global number of analysis workers (default: {DefaultCFG.AN_WORKERS})")
+    mode_parser.add_argument("-aio", "--async-analysis", action="store_true",
+                             help="Run the URL analysis on the asyncio engine (the yt-dlp extraction uses the analysis workers)")
     # Download multithreading argument
-    mode_parser.add_argument("-edt", "--enable-download-threading", action="store_true", help="Enable multithreading for downloading videos")
+    mode_parser.add_argument("-edt", "--enable-download-threading", nargs="?", type=int, const=DefaultCFG.DL_WORKERS, default=0, metavar="WORKERS",
+                             help=f"Enable multithreading for downloading videos with an optional number of download workers (default: {DefaultCFG.DL_WORKERS})")
+    mode_parser.add_argument("-emt", "--mux-workers", type=int, default=DefaultCFG.MUX_WORKERS, metavar="WORKERS",
+                             help=f"Number of concurrent mux (ffmpeg) processes in the multithreaded download (default: {DefaultCFG.MUX_WORKERS})")
+    # Bandwidth limits (bytes per second with K/M/G suffixes, 0 = unlimited), the global one is shared fairly by the running items
+    # NOTE: the rates default to None, so that --set-bandwidth only sends the given ones, the other modes fall back to the config defaults
+    mode_parser.add_argument("--max-rate", type=parse_rate, default=None, metavar="RATE",
+                             help="Global download bandwidth limit, e.g. 5M (default: unlimited)")
+    mode_parser.add_argument("--job-rate", type=parse_rate, default=None, metavar="RATE",
+                             help="Download bandwidth limit per item, e.g. 1M (default: unlimited)")
+    mode_parser.add_argument("--set-bandwidth", metavar="SERVER_URL",
+                             help="Apply the given --max-rate and/or --job-rate to a running web service (e.g. http://localhost:8080) and exit")
     # Parse known args for the mode
     mode_args, options_argv = mode_parser.parse_known_args()
+    if mode_args.set_bandwidth:
+        if mode_args.max_rate is None and mode_args.job_rate is None:
+            mode_parser.error("--set-bandwidth needs --max-rate and/or --job-rate")
+        #end
+    else:
+        mode_args.max_rate = DefaultCFG.MAX_RATE if mode_args.max_rate is None else mode_args.max_rate
+        mode_args.job_rate = DefaultCFG.JOB_RATE if mode_args.job_rate is None else mode_args.job_rate
+    #end
 
 
     # Second stage parser for CLI arguments
-    cli_parser = argparse.ArgumentParser(description="YouTube video downloader - CLI mode")
+    cli_parser = argparse.ArgumentParser(description="YouTube video downloader - CLI mode", fromfile_prefix_chars="@")
     # CLI boolean arguments with both long and short options
     cli_parser.add_argument("-c", "--combine", action="store_true", help="Combine audio and video (default)")
     cli_parser.add_argument("-a", "--audio", action="store_true", help="Download/keep audio only")
@@ -137,6 +217,17 @@ def main():
     cli_parser.add_argument("-t", "--thumbnails", action="store_true", help="Download the thumbnails")
     cli_parser.add_argument("-i", "--info", action="store_true", help="Keep info")
     cli_parser.add_argument("-m", "--comments", action="store_true", help="Download the comments")
+    cli_parser.add_argument("--streams-per-host", type=int, default=DefaultCFG.STREAMS_PER_HOST, metavar="STREAMS",
+                            help=f"Maximum concurrent stream fetches per media host (default: {DefaultCFG.STREAMS_PER_HOST})")
+    cli_parser.add_argument("--segments", type=int, default=1, metavar="CONNECTIONS",
+                            help="Download the large streams over this many parallel range connections (default: 1)")
+    cli_parser.add_argument("--merge-tool", choices=["auto", "ffmpeg", "mkvmerge"], default="auto",
+                            help="Mux tool for the combined output, auto picks the fastest available one for the container (default: auto)")
+    cli_parser.add_argument("--stream-mux", action="store_true", help="Stream the audio and video downloads straight into ffmpeg (no temp files, .mkv only, always muxed by ffmpeg)")
+    cli_parser.add_argument("--single-pass", action="store_true",
+                            help="Fetch the audio and video one after the other, the combined-only downloads in a single yt-dlp pass merged by ffmpeg (default: concurrent fetch and mux)")
+    cli_parser.add_argument("--metadata-cache", choices=CACHE_MODES, default=CACHE_METADATA,
+                            help="Metadata cache of the analysis: off, metadata (the cached formats whose signed URLs expired are re-resolved before the download) or fresh (only the entries with unexpired formats are used) (default: metadata)")
     # CLI arguments with option selection
     cli_parser.add_argument("-r", "--resolution", choices=video_resolution_list, default=video_resolution_list[0], help="Video quality maximum resolution in pixels specifier")
     cli_parser.add_argument("-f", "--fps", choices=fps_value_list, default=fps_value_list[0], help="Specify the maximum fps (frames per second)")
@@ -144,7 +235,8 @@ def main():
     # Output directory as an optional argument
     cli_parser.add_argument("-o", "--output", default=".", help="Output directory (default: current directory)")
     # URLs as the last argument, allowing both 'url' and 'urls'
-    cli_parser.add_argument("urls", nargs="+",  metavar="URL(s)", help="One or more YouTube video URLs")
+    cli_parser.add_argument("urls", nargs="*",  metavar="URL(s)", help="One or more YouTube video URLs (or @file with one URL per line)")
+    cli_parser.add_argument("--resume", action="store_true", help="Resume the unfinished downloads journaled in the output directory, and journal the downloads of this run so an interrupted one can be resumed")
 
 
     # Second stage parser for CLI arguments
@@ -159,8 +251,13 @@ def main():
     web_parser.add_argument("-p", "--port", type=int, default=DefaultCFG.PORT, help=f"Port for the web service (default: {DefaultCFG.PORT})")
 
     ## ======== Select a mode ========
-    if mode_args.cli:
+    if mode_args.set_bandwidth:
+        run_set_bandwidth(mode_args)
+    elif mode_args.cli or mode_args.sync:
         cli_args  = cli_parser.parse_args(options_argv)
+        if not (cli_args.urls or cli_args.resume):
+            cli_parser.error("at least one URL or --resume is required")
+        #end
         cli_args  = argparse.Namespace(**{**vars(mode_args), **vars(cli_args)})
         run_cli(cli_args)
     elif mode_args.web:
@@ -188,5 +285,7 @@ def main():
 # This block ensures the main function runs only when 
 # the script is executed directly, not when imported
 if __name__ == "__main__":
+    # The mux stage processes are spawned, a frozen executable has to hand them over here
+    multiprocessing.freeze_support()
     main()
 #end
\ No newline at end of file
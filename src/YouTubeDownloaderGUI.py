@@ -30,6 +30,7 @@ SOFTWARE.
 """
 ## Imports
 import os
+import multiprocessing
 os.system("title Don't mind the LOG window")
 # import gui.splashscreen
 from core.common import isDeployed, os_name
@@ -55,5 +56,7 @@ def main():
 # This block ensures the main function runs only when 
 # the script is executed directly, not when imported
 if __name__ == "__main__":
+    # The mux stage processes are spawned, a frozen executable has to hand them over here
+    multiprocessing.freeze_support()
     main()
 #end
\ No newline at end of file
@@ -46,7 +46,13 @@ envParam = getEnvironmentalParameters()
 app = create_web_app(port=envParam.port,
                         output_dir=envParam.output_dir,
                         use_multithreading_analysis=envParam.use_multithreading_analysis,
-                        process_via_multithreading=envParam.process_via_multithreading)
+                        use_async_analysis=envParam.use_async_analysis,
+                        process_via_multithreading=envParam.process_via_multithreading,
+                        max_analysis_workers=envParam.max_analysis_workers,
+                        max_download_workers=envParam.max_download_workers,
+                        max_mux_workers=envParam.max_mux_workers,
+                        max_download_rate=envParam.max_download_rate,
+                        max_job_rate=envParam.max_job_rate)
 
 if __name__ == '__main__':
     pass
@@ -90,6 +90,8 @@ class VideoListManagerCLI(VideoListManager):
         video_format_priority_str = "mp4, webm, flv, 3gp, m4a"
         limits_and_priority.video_format_priority = [format.strip() for format in video_format_priority_str.split(",")]
         # TODO here we can just implement the list directly but the input might come from a env variable hance why we parse strings
+        # Connections per large stream
+        limits_and_priority.download_segments = args.segments
         limits_and_priority.to_numeric()
         return limits_and_priority
     #end
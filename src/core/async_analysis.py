@@ -0,0 +1,297 @@
+"""
+YouTube Video Downloader
+Copyright (C) 2023 JessyJP
+
+Author: JessyJP
+Year: 2024
+Description: This is a python source script part of the YouTube Video Downloader Suit.
+
+MIT License
+
+Copyright (c) 2024 JessyJP
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+# Imports
+import re
+import json
+import time
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, List, Tuple
+
+from core.download_scheduler import DEFAULT_ANALYSIS_WORKERS
+from core.validation_methods import checkForValidYoutubeURLs, is_valid_youtube_channel, is_valid_youtube_playlist
+
+## ================================= Engine definitions =================================
+DEFAULT_MAX_IN_FLIGHT = 2000# URLs in flight at the same time, waiting on the network or the extraction executor
+DEFAULT_MAX_CONNECTIONS = 64# Pooled HTTP connections of the discovery client
+DEFAULT_MAX_KEEPALIVE = 32
+DEFAULT_HTTP_TIMEOUT = 10
+DEFAULT_MAX_PAGES = 200# Continuation pages fetched per playlist/channel tab
+
+# Analysis modes, same values as recursiveCheckOfURLcontent_mode of the VideoListManager
+MODE_TOP = 0
+MODE_PLAYLIST = 1
+MODE_CHANNEL = 2
+MODE_PAGE = 3
+
+YOUTUBE_URL = "https://www.youtube.com"
+BROWSE_URL = YOUTUBE_URL + "/youtubei/v1/browse?prettyPrint=false"
+BROWSE_CLIENT = {"clientName": "WEB", "clientVersion": "2.20240101.00.00"}
+HTTP_HEADERS = {"User-Agent": "Mozilla/5.0", "Accept-Language": "en-US,en;q=0.9"}
+
+_INITIAL_DATA_PATTERN = re.compile(r'(?:var\s+ytInitialData|window\["ytInitialData"\])\s*=\s*(\{.+?\})\s*;\s*(?:</script>|var\s|window\[)', re.S)
+
+## ================================= Async analysis engine class =================================
+class AsyncAnalysisEngine:
+    """
+    Asyncio pipeline for the URL import.
+
+    Every URL is a coroutine, so thousands can be in flight on a single thread. The page, playlist and channel
+    discovery uses a pooled async HTTP client (httpx), while the blocking yt-dlp extraction is offloaded to a
+    bounded executor. The results are handed to on_item(url, item) and the recursion follows the same rules as
+    the threaded VideoListManager import: the top level and channel URLs are expanded, playlist videos and
+    page links are not expanded any further.
+    """
+    def __init__(self, extract_item: Callable, on_item: Callable, claim_url: Callable = None, release_url: Callable = None,
+                 on_progress: Callable = None, is_cancelled: Callable = None, max_in_flight: int = DEFAULT_MAX_IN_FLIGHT,
+                 max_extract_workers: int = DEFAULT_ANALYSIS_WORKERS, max_connections: int = DEFAULT_MAX_CONNECTIONS,
+                 timeout: float = DEFAULT_HTTP_TIMEOUT, progress_interval: float = 0.25):
+        self.extract_item = extract_item
+        self.on_item = on_item
+        self.claim_url = claim_url# claim_url(url) -> a claim token, None if the URL is claimed or stored already
+        self.release_url = release_url# release_url(url, token)
+        self.on_progress = on_progress
+        self.is_cancelled = is_cancelled
+        self.max_in_flight = max(1, int(max_in_flight))
+        self.max_extract_workers = max(1, int(max_extract_workers))
+        self.max_connections = max(1, int(max_connections))
+        self.timeout = timeout
+        self.progress_interval = progress_interval
+        self.stats = {}
+
+    ## ----- Entry points -----
+    def run(self, urls: Iterable[str]) -> dict:
+        """ Analyse the URLs to completion from synchronous code. """
+        return asyncio.run(self.analyse(urls))
+
+    async def analyse(self, urls: Iterable[str]) -> dict:
+        self.stats = {"submitted": 0, "done": 0, "items": 0, "expanded": 0, "skipped": 0, "errors": 0, "in_flight": 0}
+        self._loop = asyncio.get_running_loop()
+        self._in_flight = asyncio.Semaphore(self.max_in_flight)
+        self._executor = ThreadPoolExecutor(self.max_extract_workers, thread_name_prefix="AnalysisWorker")
+        self._client = None
+        self._tasks = set()
+        self._last_progress = 0.0
+        try:
+            for url in set(urls):
+                self._spawn(url, MODE_TOP)
+            #end
+            # The tasks spawn sub-tasks (playlist/channel/page expansion), so wait until none are left
+            while self._tasks:
+                await asyncio.wait(set(self._tasks))
+            #end
+        finally:
+            if self._client is not None:
+                await self._client.aclose()
+            #end
+            self._executor.shutdown(wait=False)
+        #end
+        self._report_progress(force=True)
+        return dict(self.stats)
+
+    ## ----- Pipeline -----
+    def _spawn(self, url: str, mode: int):
+        self.stats["submitted"] += 1
+        task = self._loop.create_task(self._process_url(url, mode))
+        self._tasks.add(task)
+        task.add_done_callback(self._tasks.discard)
+
+    async def _process_url(self, url: str, mode: int):
+        async with self._in_flight:
+            cancelled = self.is_cancelled is not None and self.is_cancelled()
+            # NOTE: the claim is a token per call (not per thread), so a URL spawned twice on this event loop thread is analysed once
+            claim = self.claim_url(url) if self.claim_url is not None and not cancelled else None
+            if cancelled or (self.claim_url is not None and claim is None):
+                self.stats["skipped"] += 1
+                self.stats["done"] += 1
+                return
+            #end
+            self.stats["in_flight"] += 1
+            try:
+                item = await self._loop.run_in_executor(self._executor, self.extract_item, url)
+                if item is not None:
+                    self.on_item(url, item)
+                    self.stats["items"] += 1
+                elif mode in (MODE_TOP, MODE_CHANNEL):
+                    sub_urls, sub_mode = await self._expand(url)
+                    self.stats["expanded"] += 1
+                    for sub_url in set(sub_urls):
+                        self._spawn(sub_url, sub_mode)
+                    #end
+                #end
+            except Exception as e:
+                self.stats["errors"] += 1
+                print(f"Error analysing {url}: {e}")
+            finally:
+                self.stats["in_flight"] -= 1
+                self.stats["done"] += 1
+                if self.release_url is not None:
+                    self.release_url(url, claim)
+                #end
+                self._report_progress()
+            #end
+        #end
+
+    async def _expand(self, url: str) -> Tuple[List[str], int]:
+        if is_valid_youtube_playlist(url):
+            return await self.get_playlist_video_urls(url), MODE_PLAYLIST
+        elif is_valid_youtube_channel(url):
+            return await self.get_channel_urls(url), MODE_CHANNEL
+        else:
+            html = await self.get_html(url)
+            # NOTE: the URL extraction (urlextract) is blocking, hence it runs in the executor too
+            return await self._loop.run_in_executor(self._executor, _extract_youtube_urls, html), MODE_PAGE
+        #end
+
+    def _report_progress(self, force: bool = False):
+        if self.on_progress is None:
+            return
+        #end
+        now = time.monotonic()
+        if force or now - self._last_progress >= self.progress_interval:
+            self._last_progress = now
+            self.on_progress(dict(self.stats))
+        #end
+
+    ## ----- Discovery -----
+    def _get_client(self):
+        # The HTTP client is only opened when a page has to be fetched
+        if self._client is None:
+            import httpx
+            limits = httpx.Limits(max_connections=self.max_connections, max_keepalive_connections=min(DEFAULT_MAX_KEEPALIVE, self.max_connections))
+            self._client = httpx.AsyncClient(limits=limits, timeout=self.timeout, headers=HTTP_HEADERS, follow_redirects=True)
+        #end
+        return self._client
+
+    async def get_html(self, url: str) -> str:
+        response = await self._get_client().get(url)
+        response.raise_for_status()
+        return response.text
+
+    async def browse_continuation(self, token: str) -> dict:
+        payload = {"context": {"client": BROWSE_CLIENT}, "continuation": token}
+        response = await self._get_client().post(BROWSE_URL, json=payload)
+        response.raise_for_status()
+        return response.json()
+
+    async def get_browse_entries(self, url: str, max_pages: int = DEFAULT_MAX_PAGES) -> Tuple[List[str], List[str]]:
+        """ Get the (video ids, playlist ids) of a playlist or channel tab page, following the continuation pages. """
+        data = parse_initial_data(await self.get_html(url))
+        video_ids, playlist_ids, tokens = collect_browse_entries(data)
+        pages = 1
+        while tokens and pages < max_pages:
+            data = await self.browse_continuation(tokens[-1])
+            more_videos, more_playlists, tokens = collect_browse_entries(data)
+            video_ids += more_videos
+            playlist_ids += more_playlists
+            pages += 1
+        #end
+        return video_ids, playlist_ids
+
+    async def get_playlist_video_urls(self, playlist_url: str) -> List[str]:
+        video_ids, _ = await self.get_browse_entries(playlist_url)
+        if not video_ids:
+            # Fall back to the (blocking) pytube scraper if the page layout is not understood
+            from core.url_text_processor import get_video_urls_from_playlist
+            return list(await self._loop.run_in_executor(self._executor, get_video_urls_from_playlist, playlist_url))
+        #end
+        return [f"{YOUTUBE_URL}/watch?v={video_id}" for video_id in dict.fromkeys(video_ids)]
+
+    async def get_channel_urls(self, channel_url: str) -> List[str]:
+        base_url = channel_url.split("?")[0].rstrip("/")
+        base_url = re.sub(r"/(videos|playlists|featured|streams|shorts)$", "", base_url)
+        (video_ids, _), (_, playlist_ids) = await asyncio.gather(
+            self.get_browse_entries(base_url + "/videos"),
+            self.get_browse_entries(base_url + "/playlists"))
+        if not video_ids and not playlist_ids:
+            from core.url_text_processor import get_videos_and_playlists_from_Channel
+            return list(await self._loop.run_in_executor(self._executor, get_videos_and_playlists_from_Channel, channel_url))
+        #end
+        return ([f"{YOUTUBE_URL}/watch?v={video_id}" for video_id in dict.fromkeys(video_ids)] +
+                [f"{YOUTUBE_URL}/playlist?list={playlist_id}" for playlist_id in dict.fromkeys(playlist_ids)])
+#end
+
+## ================================= Helper functions =================================
+# NOTE: url_text_processor (pytube, urlextract) is imported on use, it is only needed by the fallbacks and the page links
+
+def parse_initial_data(html: str) -> dict:
+    """ Get the ytInitialData JSON embedded in a YouTube page. """
+    match = _INITIAL_DATA_PATTERN.search(html or "")
+    if not match:
+        return {}
+    #end
+    try:
+        return json.loads(match.group(1))
+    except json.JSONDecodeError:
+        return {}
+    #end
+
+def collect_browse_entries(data) -> Tuple[List[str], List[str], List[str]]:
+    """ Walk a browse response and collect the video ids, the playlist ids and the continuation tokens. """
+    video_ids, playlist_ids, tokens = [], [], []
+    stack = [data]
+    while stack:
+        node = stack.pop()
+        if isinstance(node, list):
+            stack.extend(reversed(node))
+            continue
+        #end
+        if not isinstance(node, dict):
+            continue
+        #end
+        for key, value in node.items():
+            if not isinstance(value, dict):
+                if isinstance(value, list):
+                    stack.append(value)
+                #end
+                continue
+            #end
+            if key.endswith("VideoRenderer") or key == "videoRenderer":
+                if value.get("videoId"):
+                    video_ids.append(value["videoId"])
+                #end
+            elif key.endswith("PlaylistRenderer") or key == "playlistRenderer":
+                if value.get("playlistId"):
+                    playlist_ids.append(value["playlistId"])
+                #end
+                continue# NOTE: the playlist thumbnails carry video ids which are not channel videos
+            elif key == "continuationCommand" and value.get("token"):
+                tokens.append(value["token"])
+            #end
+            stack.append(value)
+        #end
+    #end
+    return video_ids, playlist_ids, tokens
+
+def _extract_youtube_urls(html: str) -> List[str]:
+    from core.url_text_processor import extract_URL_list_from_text
+    return checkForValidYoutubeURLs(extract_URL_list_from_text(html))
+#end
@@ -0,0 +1,215 @@
+"""
+YouTube Video Downloader
+Copyright (C) 2023 JessyJP
+
+Author: JessyJP
+Year: 2024
+Description: This is a python source script part of the YouTube Video Downloader Suit.
+
+MIT License
+
+Copyright (c) 2024 JessyJP
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+# Imports
+import os
+import json
+import time
+import threading
+from typing import Iterable, Iterator, List, Optional
+from urllib.parse import urlsplit, urlunsplit
+
+from core.yt_dlp_provider import ydl_provider
+
+## ================================= Channel sync definitions =================================
+SYNC_STATE_FILENAME = ".channel_sync.json"# Stored in the output directory, next to the journal and the output index
+KNOWN_IDS_KEPT = 50# Newest video ids remembered per channel, the listing stops at any of them (the newest may get deleted)
+PENDING_KEPT = 500# Synced uploads per channel kept for a retry until they are downloaded
+PENDING_ENTRY_KEYS = ('id', 'url', 'title', 'channel', 'uploader', 'duration', 'view_count', 'upload_date', 'timestamp', 'release_timestamp', 'thumbnail')
+CHANNEL_TABS = ("videos", "shorts", "streams", "playlists", "featured", "releases", "podcasts")
+
+## ================================= Channel sync state class =================================
+class ChannelSyncState:
+    """
+    Per channel record of the newest uploads seen by the last sync of one output directory.
+
+    Each channel keeps its newest video id and timestamp and the last KNOWN_IDS_KEPT ids, which only advance when a
+    listing reached the synced content. A listing cut by the entry limit records its ids as taken instead, so the older
+    uploads beyond the limit are listed by the next sync. The synced uploads stay pending until they are downloaded,
+    so a failed or interrupted download is taken again by the next sync. The file is rewritten atomically
+    (temp file and rename) on save, so an interrupted sync leaves the previous state intact.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self._channels = {}
+        self._lock = threading.Lock()
+        if os.path.exists(path):
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    self._channels = json.load(f)
+                #end
+            except (OSError, json.JSONDecodeError) as e:
+                print(f"Channel sync state not readable, all the channels are synced in full. Error: {e}")
+            #end
+        #end
+
+    def get(self, channel_url: str) -> Optional[dict]:
+        with self._lock:
+            channel = self._channels.get(get_channel_key(channel_url))
+            return dict(channel) if channel else None
+        #end
+
+    def update(self, channel_url: str, new_entries: List[dict], complete: bool = True, downloaded_ids: Iterable[str] = ()):
+        """
+        Record the new entries (newest first) of a synced channel. An incomplete listing (cut by the entry limit) does not
+        advance the known content. The new entries are pending until their ids are given as downloaded by a later sync.
+        """
+        key = get_channel_key(channel_url)
+        with self._lock:
+            channel = self._channels.setdefault(key, {"url": channel_url, "known_ids": []})
+            new_ids = [entry['id'] for entry in new_entries]
+            timestamps = [entry.get('timestamp') or entry.get('release_timestamp') for entry in new_entries]
+            if complete:
+                # The listing reached the known content, past the uploads taken by the earlier capped syncs
+                taken_ids = channel.pop("taken_ids", [])
+                taken_timestamp = channel.pop("taken_timestamp", None)
+                if new_entries and timestamps[0] and taken_timestamp and timestamps[0] > taken_timestamp:
+                    known_ids = new_ids + taken_ids# Uploaded since the capped syncs
+                else:
+                    known_ids = taken_ids + new_ids# The rest of the listing below the taken uploads
+                #end
+                timestamps.append(taken_timestamp)
+                if known_ids:
+                    channel["newest_id"] = known_ids[0]
+                #end
+                channel["newest_timestamp"] = max(filter(None, timestamps + [channel.get("newest_timestamp")]), default=None)
+                channel["known_ids"] = (known_ids + channel["known_ids"])[:KNOWN_IDS_KEPT]
+            else:
+                # NOTE: a capped listing continues below the uploads taken by the last one
+                channel["taken_ids"] = channel.get("taken_ids", []) + new_ids
+                channel["taken_timestamp"] = max(filter(None, timestamps + [channel.get("taken_timestamp")]), default=None)
+            #end
+            downloaded_ids = set(downloaded_ids)
+            pending = [get_pending_entry(entry) for entry in new_entries]
+            pending += [entry for entry in channel.get("pending", []) if entry['id'] not in downloaded_ids and entry['id'] not in new_ids]
+            channel["pending"] = pending[:PENDING_KEPT]
+            channel["last_sync"] = time.time()
+            channel["last_new"] = len(new_entries)
+        #end
+
+    def get_pending(self, channel_url: str) -> List[dict]:
+        """ The synced uploads of a channel which are not downloaded yet, newest first. """
+        with self._lock:
+            channel = self._channels.get(get_channel_key(channel_url))
+            return [dict(entry) for entry in channel.get("pending", [])] if channel else []
+        #end
+
+    def get_channels(self) -> dict:
+        with self._lock:
+            return {key: dict(channel) for key, channel in self._channels.items()}
+        #end
+
+    def save(self):
+        with self._lock:
+            temp_path = self.path + ".tmp"
+            with open(temp_path, 'w', encoding='utf-8') as f:
+                json.dump(self._channels, f)
+                f.flush()
+                os.fsync(f.fileno())
+            #end
+            os.replace(temp_path, self.path)
+        #end
+#end
+
+## ================================= Channel listing =================================
+def get_pending_entry(entry: dict) -> dict:
+    """ The flat entry fields kept for a pending upload, enough to add it again as a stub item. """
+    pending = {key: entry[key] for key in PENDING_ENTRY_KEYS if entry.get(key) is not None}
+    if 'thumbnail' not in pending and entry.get('thumbnails'):
+        pending['thumbnail'] = entry['thumbnails'][-1].get('url')
+    #end
+    return pending
+
+def get_uploads_url(channel_url: str) -> str:
+    """ The newest-first uploads tab of a channel URL (a tab URL is kept as it is). """
+    channel_url = channel_url.strip()
+    parts = urlsplit(channel_url if "://" in channel_url else "https://" + channel_url)
+    path = parts.path.rstrip('/')
+    if path.rsplit('/', 1)[-1].lower() not in CHANNEL_TABS:
+        path += "/videos"
+    #end
+    return urlunsplit((parts.scheme or "https", parts.netloc, path, "", ""))
+
+def get_channel_key(channel_url: str) -> str:
+    parts = urlsplit(get_uploads_url(channel_url))
+    return (parts.netloc.lower().removeprefix("www.").removeprefix("m.") + parts.path).lower()
+
+def iter_channel_entries(channel_url: str) -> Iterator[dict]:
+    """ Yield the flat uploads of a channel, newest first. The listing pages are only fetched as the entries are consumed. """
+    with ydl_provider.borrow({'extract_flat': 'in_playlist', 'lazy_playlist': True}) as ydl:
+        # NOTE: unprocessed, the entries stay the extractor's lazy generator
+        info = ydl.extract_info(get_uploads_url(channel_url), download=False, process=False)
+        for entry in info.get('entries') or []:
+            if entry and entry.get('id'):
+                yield entry
+            #end
+        #end
+    #end
+
+def list_new_entries(channel_url: str, channel_state: Optional[dict], max_entries: int = None, entries: Iterator[dict] = None) -> List[dict]:
+    """
+    List the uploads newer than the synced state, newest first. The listing stops at the first known video id
+    (or at an upload not newer than the known newest timestamp), so a synced channel costs about one listing page.
+    The uploads taken by an earlier sync cut by the entry limit are skipped.
+    """
+    known_ids = set(channel_state.get("known_ids", [])) if channel_state else set()
+    taken_ids = set(channel_state.get("taken_ids", [])) if channel_state else set()
+    newest_timestamp = channel_state.get("newest_timestamp") if channel_state else None
+    new_entries = []
+    for entry in (entries if entries is not None else iter_channel_entries(channel_url)):
+        timestamp = entry.get('timestamp') or entry.get('release_timestamp')
+        if entry['id'] in known_ids or (timestamp and newest_timestamp and timestamp <= newest_timestamp):
+            break
+        #end
+        if entry['id'] in taken_ids:
+            continue
+        #end
+        new_entries.append(entry)
+        if max_entries and len(new_entries) >= max_entries:
+            break
+        #end
+    #end
+    return new_entries
+
+## ================================= Shared sync states =================================
+_states = {}
+_states_lock = threading.Lock()
+
+def get_channel_sync_state(output_dir: str) -> ChannelSyncState:
+    """ Get the shared sync state of the output directory. """
+    path = os.path.join(os.path.abspath(output_dir), SYNC_STATE_FILENAME)
+    with _states_lock:
+        state = _states.get(path)
+        if state is None:
+            state = _states[path] = ChannelSyncState(path)
+        #end
+        return state
+    #end
+#end
@@ -30,6 +30,8 @@ SOFTWARE.
 """
 # Imports
 import threading
+import itertools
+from concurrent.futures import ThreadPoolExecutor
 
 ## ================================= Multithreading functions =================================
 class CustomThread(threading.Thread):
@@ -76,18 +78,28 @@ class CustomThread(threading.Thread):
         errored_threads = [t for t in thread_list if not t.is_alive() and t.exitcode != 0]
         return errored_threads
 
+    @classmethod
+    def get_queued_threads(cls, thread_list=None):
+        if thread_list is None:
+            thread_list = cls.threads
+        # NOTE: only the pooled tasks can wait in a queue, plain threads start straight away
+        queued_threads = [t for t in thread_list if getattr(t, "is_queued", lambda: False)()]
+        return queued_threads
+
     @classmethod
     def get_multithread_stats(cls, name_contains=""):
         thread_list = cls.get_all_threads(name_contains)
         active_threads = cls.get_active_threads(thread_list)
         successful_threads = cls.get_successful_threads(thread_list)
         errored_threads = cls.get_errored_threads(thread_list)
+        queued_threads = cls.get_queued_threads(thread_list)
 
         stats = {
             "total_threads": len(cls.threads),
             "active_threads": len(active_threads),
             "successful_threads": len(successful_threads),
-            "errored_threads": len(errored_threads)
+            "errored_threads": len(errored_threads),
+            "queued_threads": len(queued_threads)
         }
 
         return stats
@@ -97,4 +109,155 @@ class CustomThread(threading.Thread):
     def reset_threads(cls):
         cls.threads.clear()
     #end
-#end
\ No newline at end of file
+#end
+
+## ================================= Thread pool functions =================================
+class PooledTask:
+    """
+    A unit of work executed by the CustomThreadPool.
+
+    It mirrors the part of the CustomThread interface used by the stats methods,
+    so the tasks can be tracked in CustomThread.threads next to regular threads.
+    """
+    _counter = itertools.count(1)
+
+    def __init__(self, target, args=(), kwargs=None):
+        self.target = target
+        self.args = args
+        self.kwargs = kwargs or {}
+        self.name = f"PooledTask-{next(PooledTask._counter)}"
+        self.exception = None
+        self.exitcode = 0
+        self._started = False
+        self._done = threading.Event()
+
+    def run(self):
+        self._started = True
+        try:
+            self.target(*self.args, **self.kwargs)
+        except Exception as e:
+            self.exception = e
+            self.exitcode = 1
+        finally:
+            self._done.set()
+
+    def getName(self):
+        return self.name
+
+    def is_alive(self):
+        # A queued task is still considered alive, i.e. it is pending
+        return not self._done.is_set()
+
+    def is_queued(self):
+        return not self._started and not self._done.is_set()
+
+    def join(self, timeout=None):
+        self._done.wait(timeout)
+#end
+
+class TaskGroup:
+    """ The tasks of one top level call, including the ones its tasks submit recursively. """
+    def __init__(self):
+        self.pending = 0
+        self._condition = threading.Condition()
+
+    def add(self, n: int):
+        with self._condition:
+            self.pending += n
+            if self.pending == 0:
+                self._condition.notify_all()
+            #end
+        #end
+
+    def wait(self, timeout=None) -> bool:
+        """ Wait until all the tasks of the group are done. False on timeout. """
+        with self._condition:
+            return self._condition.wait_for(lambda: self.pending == 0, timeout)
+        #end
+#end
+
+class CustomThreadPool:
+    """
+    Bounded thread pool shared by the whole process.
+
+    The number of concurrently running tasks never exceeds max_workers regardless of how many
+    tasks are submitted, including the ones submitted from within running tasks (recursion).
+    Recursive submitters must not wait for their children, otherwise the pool can deadlock.
+    Instead the top level caller submits to a TaskGroup, which the tasks submitted from within its
+    tasks join as well, and waits for that group only with wait_for_group(). So independent top level
+    calls (e.g. two imports at the same time) do not wait for each other's tasks.
+    """
+    _shared = None# Static variable
+    _shared_lock = threading.Lock()
+    _local = threading.local()# The group of the task running in the thread (shared by the pools, in case the shared one is resized)
+
+    def __init__(self, max_workers: int, name: str = "CustomThreadPool"):
+        self.max_workers = max(1, int(max_workers))
+        self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix=name)
+        self._pending = 0
+        self._condition = threading.Condition()
+
+    @classmethod
+    def get_shared(cls, max_workers: int = None):
+        with cls._shared_lock:
+            if cls._shared is None:
+                cls._shared = cls(max_workers or 8)
+            elif max_workers is not None and max_workers != cls._shared.max_workers and cls._shared.get_pending_count() == 0:
+                # Resize only when idle, so the cap is never exceeded by two live executors
+                cls._shared.shutdown()
+                cls._shared = cls(max_workers)
+            #end
+            return cls._shared
+        #end
+
+    def submit(self, target, args=(), kwargs=None, group: TaskGroup = None) -> PooledTask:
+        # Without a group, a task submitted from within a task joins the group of that task
+        if group is None:
+            group = getattr(self._local, "group", None)
+        #end
+        task = PooledTask(target, args, kwargs)
+        CustomThread.threads.append(task)
+        if group is not None:
+            group.add(1)
+        #end
+        with self._condition:
+            self._pending += 1
+        #end
+        self._executor.submit(self._run_task, task, group)
+        return task
+
+    def _run_task(self, task: PooledTask, group: TaskGroup = None):
+        self._local.group = group
+        try:
+            task.run()
+        finally:
+            self._local.group = None
+            with self._condition:
+                self._pending -= 1
+                if self._pending == 0:
+                    self._condition.notify_all()
+                #end
+            #end
+            # NOTE: after the task, so its recursive submits were counted before the group can drain
+            if group is not None:
+                group.add(-1)
+            #end
+
+    def get_pending_count(self) -> int:
+        # Queued plus running tasks
+        with self._condition:
+            return self._pending
+        #end
+
+    def wait_for_all(self, timeout=None) -> bool:
+        with self._condition:
+            return self._condition.wait_for(lambda: self._pending == 0, timeout)
+        #end
+
+    def wait_for_group(self, group: TaskGroup, timeout=None) -> bool:
+        """ Wait for the tasks of the group, including the ones submitted recursively. """
+        return group.wait(timeout)
+
+    def shutdown(self, wait: bool = False):
+        self._executor.shutdown(wait=wait)
+#end
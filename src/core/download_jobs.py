@@ -0,0 +1,230 @@
+"""
+YouTube Video Downloader
+Copyright (C) 2023 JessyJP
+
+Author: JessyJP
+Year: 2024
+Description: This is a python source script part of the YouTube Video Downloader Suit.
+
+MIT License
+
+Copyright (c) 2024 JessyJP
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+# Imports
+import time
+import uuid
+import threading
+from collections import OrderedDict, deque
+from typing import Callable, List, Optional
+
+## ================================= Job definitions =================================
+DEFAULT_RUNNING_JOBS = 1# Jobs downloading at the same time, each one runs its own worker pool
+DEFAULT_FINISHED_KEPT = 100# Finished jobs kept for the status queries, the oldest are dropped
+
+# Job states
+JOB_QUEUED = "queued"
+JOB_RUNNING = "running"
+JOB_DONE = "done"
+JOB_CANCELLED = "cancelled"
+JOB_ERROR = "error"
+
+## ================================= Download job class =================================
+class DownloadJob:
+    """ One submitted download of a set of video items, with the parameters it was submitted with. """
+    def __init__(self, video_ids: List[str], **params):
+        self.job_id = uuid.uuid4().hex
+        self.video_ids = list(video_ids)
+        self.params = params
+        self.state = JOB_QUEUED
+        self.error = None
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+        self.cancel_event = threading.Event()
+
+    def is_active(self) -> bool:
+        return self.state in (JOB_QUEUED, JOB_RUNNING)
+
+    def to_dict(self) -> dict:
+        return {
+            "jobId": self.job_id,
+            "state": self.state,
+            "cancelRequested": self.cancel_event.is_set(),
+            "error": self.error,
+            "created": self.created,
+            "started": self.started,
+            "finished": self.finished,
+            "videoIds": list(self.video_ids),
+        }
+#end
+
+## ================================= Download job queue class =================================
+class DownloadJobQueue:
+    """
+    Background queue of download jobs.
+
+    submit() only records the job and returns it, the jobs are run in FIFO order by up to max_running_jobs
+    worker threads calling run_function(job). A queued job is cancelled by dropping it, a running one gets its
+    cancel_event set and cancel_function(job) called to abort its downloads in flight. A video id belongs to at
+    most one active job, so two submissions never download the same item at the same time.
+    """
+    def __init__(self, run_function: Callable[[DownloadJob], None], cancel_function: Callable[[DownloadJob], None] = None,
+                 max_running_jobs: int = DEFAULT_RUNNING_JOBS, max_finished_kept: int = DEFAULT_FINISHED_KEPT,
+                 on_idle: Callable[[], None] = None, name: str = "DownloadJob"):
+        self.run_function = run_function
+        self.cancel_function = cancel_function
+        self.max_running_jobs = max(1, int(max_running_jobs))
+        self.max_finished_kept = max_finished_kept
+        self.on_idle = on_idle
+        self.name = name
+
+        self._jobs = OrderedDict()# job id -> job, in submission order
+        self._queued = deque()
+        self._claimed = set()# Video ids of the active jobs
+        self._running = 0
+        self._workers = []
+        self._condition = threading.Condition()
+    #end
+
+    def submit(self, video_ids: List[str], **params) -> DownloadJob:
+        """ Queue a job of the video ids which are not in an active job already. Raises ValueError when none is left. """
+        with self._condition:
+            video_ids = [video_id for video_id in dict.fromkeys(video_ids) if video_id not in self._claimed]
+            if not video_ids:
+                raise ValueError("No items to download, they are all in active jobs")
+            #end
+            job = DownloadJob(video_ids, **params)
+            self._jobs[job.job_id] = job
+            self._claimed.update(video_ids)
+            self._queued.append(job)
+            self._start_worker()
+            self._condition.notify()
+            return job
+        #end
+
+    def get(self, job_id: str) -> Optional[DownloadJob]:
+        with self._condition:
+            return self._jobs.get(job_id)
+        #end
+
+    def get_jobs(self) -> List[DownloadJob]:
+        with self._condition:
+            return list(self._jobs.values())
+        #end
+
+    def cancel(self, job_id: str) -> bool:
+        """ Cancel a queued or running job. Returns False when the job is unknown or already finished. """
+        with self._condition:
+            job = self._jobs.get(job_id)
+            if job is None or not job.is_active():
+                return False
+            #end
+            job.cancel_event.set()
+            dropped = job.state == JOB_QUEUED
+            if dropped:
+                self._queued.remove(job)
+                self._finish(job, JOB_CANCELLED)
+                idle = not self._queued and self._running == 0
+            #end
+        #end
+        if dropped:
+            if idle and self.on_idle is not None:
+                self.on_idle()
+            #end
+            return True
+        #end
+        # NOTE: outside the lock, the abort may call back into the downloads
+        if self.cancel_function is not None:
+            self.cancel_function(job)
+        #end
+        return True
+
+    def is_idle(self) -> bool:
+        with self._condition:
+            return not self._queued and self._running == 0
+        #end
+
+    def wait_for_all(self, timeout: float = None) -> bool:
+        """ Wait until no job is queued or running. Returns False on timeout. """
+        with self._condition:
+            return self._condition.wait_for(lambda: not self._queued and self._running == 0, timeout)
+        #end
+
+    def get_stats(self) -> dict:
+        with self._condition:
+            states = [job.state for job in self._jobs.values()]
+            return {state: states.count(state) for state in (JOB_QUEUED, JOB_RUNNING, JOB_DONE, JOB_CANCELLED, JOB_ERROR)}
+        #end
+
+    # Helper methods
+    def _start_worker(self):
+        # NOTE: the caller holds the lock. The workers are started lazily and stay for the process lifetime.
+        if len(self._workers) < self.max_running_jobs and len(self._queued) > self._idle_workers():
+            t = threading.Thread(target=self._worker_loop, name=f"{self.name}-{len(self._workers)}", daemon=True)
+            self._workers.append(t)
+            t.start()
+        #end
+
+    def _idle_workers(self) -> int:
+        return len(self._workers) - self._running
+
+    def _finish(self, job: DownloadJob, state: str, error: str = None):
+        # NOTE: the caller holds the lock
+        job.state = state
+        job.error = error
+        job.finished = time.time()
+        self._claimed.difference_update(job.video_ids)
+        finished = [job_id for job_id, job in self._jobs.items() if not job.is_active()]
+        for job_id in finished[:max(0, len(finished) - self.max_finished_kept)]:
+            del self._jobs[job_id]
+        #end
+        self._condition.notify_all()
+
+    def _worker_loop(self):
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._queued)
+                job = self._queued.popleft()
+                job.state = JOB_RUNNING
+                job.started = time.time()
+                self._running += 1
+            #end
+
+            error = None
+            try:
+                self.run_function(job)
+            except Exception as e:
+                print(f"Download job {job.job_id} failed. Error: {e}")
+                error = str(e)
+            #end
+
+            with self._condition:
+                self._running -= 1
+                state = JOB_CANCELLED if job.cancel_event.is_set() else JOB_ERROR if error else JOB_DONE
+                self._finish(job, state, error)
+                idle = not self._queued and self._running == 0
+            #end
+            if idle and self.on_idle is not None:
+                self.on_idle()
+            #end
+        #end
+    #end
+#end
@@ -0,0 +1,208 @@
+"""
+YouTube Video Downloader
+Copyright (C) 2023 JessyJP
+
+Author: JessyJP
+Year: 2024
+Description: This is a python source script part of the YouTube Video Downloader Suit.
+
+MIT License
+
+Copyright (c) 2024 JessyJP
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+# Imports
+import itertools
+import queue
+import threading
+from collections import Counter
+from contextlib import contextmanager
+from urllib.parse import urlsplit
+
+## ================================= Worker limits =================================
+# Default caps used when the caller does not provide its own values
+DEFAULT_DOWNLOAD_WORKERS = 4# Concurrent network fetches (yt-dlp downloads)
+DEFAULT_MUX_WORKERS = 2# Concurrent CPU bound muxing processes (ffmpeg/mkvmerge)
+DEFAULT_ANALYSIS_WORKERS = 8# Concurrent URL analysis tasks (yt-dlp extract_info)
+DEFAULT_STREAMS_PER_HOST = 4# Concurrent stream fetches per media host, more trips the throttling
+
+## ================================= Download scheduler class =================================
+class DownloadScheduler:
+    """
+    Bounded worker pool which processes the queued items with a fixed number of threads.
+
+    Items are served in priority order (lower value first) and FIFO within the same priority.
+    The queue is bounded, so submit() blocks once it is full which provides the backpressure
+    towards the producer instead of spawning a thread per item.
+    """
+    _STOP = object()# Sentinel which tells a worker to exit
+
+    def __init__(self, worker_function, max_workers: int = DEFAULT_DOWNLOAD_WORKERS, max_queued: int = None, name: str = "DownloadWorker"):
+        self.worker_function = worker_function
+        self.max_workers = max(1, int(max_workers))
+        self.max_queued = max_queued if max_queued is not None else 2 * self.max_workers
+        self.name = name
+
+        self._queue = queue.PriorityQueue(maxsize=self.max_queued)
+        self._sequence = itertools.count()# Tie breaker to keep FIFO order within a priority
+        self._lock = threading.Lock()
+        self._workers = []
+        self.active = 0
+        self.completed = 0
+        self.errors = 0
+    #end
+
+    def __enter__(self):
+        self.start()
+        return self
+    #end
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.join()
+    #end
+
+    def start(self):
+        for n in range(self.max_workers):
+            t = threading.Thread(target=self._worker_loop, name=f"{self.name}-{n}", daemon=True)
+            t.start()
+            self._workers.append(t)
+        #end
+    #end
+
+    def submit(self, *args, priority: int = 0):
+        # NOTE: blocks while the queue is full (backpressure)
+        self._queue.put((priority, next(self._sequence), args))
+    #end
+
+    def join(self):
+        # The stop sentinels are queued last with the lowest priority so all pending work is drained first
+        for _ in self._workers:
+            self._queue.put((float("inf"), next(self._sequence), self._STOP))
+        #end
+        for t in self._workers:
+            t.join()
+        #end
+        self._workers.clear()
+    #end
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                "workers": self.max_workers,
+                "queued": self._queue.qsize(),
+                "active": self.active,
+                "completed": self.completed,
+                "errors": self.errors,
+            }
+        #end
+    #end
+
+    def _worker_loop(self):
+        while True:
+            _, _, args = self._queue.get()
+            if args is self._STOP:
+                self._queue.task_done()
+                return
+            #end
+
+            with self._lock:
+                self.active += 1
+            #end
+            try:
+                self.worker_function(*args)
+                with self._lock:
+                    self.completed += 1
+                #end
+            except Exception as e:
+                print(f"Scheduled task failed. Error: {e}")
+                with self._lock:
+                    self.errors += 1
+                #end
+            finally:
+                with self._lock:
+                    self.active -= 1
+                #end
+                self._queue.task_done()
+            #end
+        #end
+    #end
+#end
+
+## ================================= Per-host limiter class =================================
+class HostLimiter:
+    """
+    Caps the concurrent fetches per host (i.e. per googlevideo.com edge server).
+    The streams of all the items share it, so the audio and video fetches of the concurrent items
+    never open more than max_per_host connections to the same host.
+    """
+    def __init__(self, max_per_host: int = DEFAULT_STREAMS_PER_HOST):
+        self.max_per_host = max(1, int(max_per_host))
+        self._in_use = Counter()# Host -> connections held
+        self._condition = threading.Condition()
+
+    @contextmanager
+    def slot(self, *urls: str):
+        """ Hold a slot of each URL's host for the duration of the fetch, the slots of several URLs are taken at once. """
+        with self.connections(*urls):
+            yield
+        #end
+
+    @contextmanager
+    def connections(self, *urls: str, count: int = 1):
+        """
+        Hold count slots of each URL's host, all of them taken at once (so two fetches never hold a part each and wait
+        for the rest). The count is capped to max_per_host and the granted count is yielded.
+        """
+        with self._condition:
+            count = max(1, min(int(count), self.max_per_host))
+            wanted = Counter()
+            for url in urls:
+                wanted[urlsplit(url).netloc if url else ""] += count
+            #end
+            # NOTE: the URLs of one host ask for no more than the cap, else they would wait forever
+            wanted = Counter({host: min(n, self.max_per_host) for host, n in wanted.items()})
+            self._condition.wait_for(lambda: all(self._in_use[host] + n <= self.max_per_host for host, n in wanted.items()))
+            self._in_use.update(wanted)
+        #end
+        try:
+            yield count
+        finally:
+            with self._condition:
+                self._in_use.subtract(wanted)
+                self._in_use = +self._in_use# Drop the idle hosts
+                self._condition.notify_all()
+            #end
+        #end
+
+    def get_in_use(self, url: str) -> int:
+        with self._condition:
+            return self._in_use[urlsplit(url).netloc if url else ""]
+        #end
+
+    def set_max_per_host(self, max_per_host: int):
+        # The cap applies to the connections already held as well, a lower cap holds the new fetches until enough are released
+        with self._condition:
+            self.max_per_host = max(1, int(max_per_host))
+            self._condition.notify_all()
+        #end
+#end
+
+## ================================= Shared limiter =================================
+stream_host_limiter = HostLimiter()
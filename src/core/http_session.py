@@ -0,0 +1,134 @@
+"""
+YouTube Video Downloader
+Copyright (C) 2023 JessyJP
+
+Author: JessyJP
+Year: 2024
+Description: This is a python source script part of the YouTube Video Downloader Suit.
+
+MIT License
+
+Copyright (c) 2024 JessyJP
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+# Imports
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.util.retry import Retry
+
+## ================================= Client definitions =================================
+DEFAULT_POOL_HOSTS = 16# Number of per-host pools kept alive
+DEFAULT_PER_HOST_LIMIT = 8# Concurrent connections per host, further requests wait for a free connection
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF_FACTOR = 0.5# Sleeps 0.5s, 1s, 2s, ... between the retries
+DEFAULT_TIMEOUT = (5, 30)# (connect, read) seconds
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+HTTP_HEADERS = {"User-Agent": "Mozilla/5.0", "Accept-Language": "en-US,en;q=0.9"}
+
+## ================================= HTTP client class =================================
+class HttpClient:
+    """
+    Process-wide HTTP client for the thumbnails, pages and metadata.
+
+    One requests.Session with keep-alive connection pools, so the repeated requests to the same host
+    (i.ytimg.com, www.youtube.com) reuse the open TCP+TLS connections. The pools block at per_host_limit
+    connections per host, failed idempotent requests (GET, HEAD) are retried with an exponential backoff
+    and every request has a timeout. The counters show how many connections were opened versus reused.
+    """
+    def __init__(self, per_host_limit: int = DEFAULT_PER_HOST_LIMIT, pool_hosts: int = DEFAULT_POOL_HOSTS,
+                 retries: int = DEFAULT_RETRIES, backoff_factor: float = DEFAULT_BACKOFF_FACTOR, timeout=DEFAULT_TIMEOUT):
+        self.timeout = timeout
+        self._lock = threading.Lock()
+        self._counters = {"requests": 0, "retries": 0, "new_connections": 0, "errors": 0}
+
+        retry = self._make_retry_class()(total=retries, backoff_factor=backoff_factor, status_forcelist=RETRY_STATUS_CODES,
+                                         allowed_methods=frozenset(["GET", "HEAD"]), raise_on_status=False)
+        adapter = HTTPAdapter(pool_connections=pool_hosts, pool_maxsize=per_host_limit, pool_block=True, max_retries=retry)
+        adapter.poolmanager.pool_classes_by_scheme = self._make_pool_classes()
+        self.session = requests.Session()
+        self.session.headers.update(HTTP_HEADERS)
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        kwargs.setdefault("timeout", self.timeout)
+        self._count("requests")
+        try:
+            return self.session.request(method, url, **kwargs)
+        except requests.RequestException:
+            self._count("errors")
+            raise
+        #end
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def post(self, url: str, **kwargs) -> requests.Response:
+        return self.request("POST", url, **kwargs)
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            stats = dict(self._counters)
+        #end
+        # Every attempt (request or retry) either opened a new connection or reused a pooled one
+        stats["reused_connections"] = max(0, stats["requests"] + stats["retries"] - stats["new_connections"])
+        return stats
+
+    def close(self):
+        self.session.close()
+
+    # Helper methods
+    def _count(self, key: str):
+        with self._lock:
+            self._counters[key] += 1
+        #end
+
+    def _make_pool_classes(self) -> dict:
+        # urllib3 creates the pools itself, hence the counting is hooked into pool subclasses bound to this client
+        client = self
+
+        class CountingHTTPConnectionPool(HTTPConnectionPool):
+            def _new_conn(self):
+                client._count("new_connections")
+                return super()._new_conn()
+
+        class CountingHTTPSConnectionPool(HTTPSConnectionPool):
+            def _new_conn(self):
+                client._count("new_connections")
+                return super()._new_conn()
+
+        return {"http": CountingHTTPConnectionPool, "https": CountingHTTPSConnectionPool}
+
+    def _make_retry_class(self):
+        client = self
+
+        class CountingRetry(Retry):
+            # NOTE: Retry.new() copies via type(self), so the subclass is kept for every attempt
+            def increment(self, *args, **kwargs):
+                client._count("retries")
+                return super().increment(*args, **kwargs)
+
+        return CountingRetry
+#end
+
+## ================================= Shared client =================================
+http_client = HttpClient()
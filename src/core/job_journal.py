@@ -0,0 +1,212 @@
+"""
+YouTube Video Downloader
+Copyright (C) 2023 JessyJP
+
+Author: JessyJP
+Year: 2024
+Description: This is a python source script part of the YouTube Video Downloader Suit.
+
+MIT License
+
+Copyright (c) 2024 JessyJP
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+# Imports
+import os
+import json
+import time
+import threading
+from typing import List, Optional
+
+## ================================= Journal definitions =================================
+JOURNAL_FILENAME = ".download_journal.jsonl"# Stored in the output directory, next to the hidden .<video_id> temp dirs
+DEFAULT_COMPACT_THRESHOLD = 2000# Appended records after which the journal is rewritten as a snapshot
+
+# Job stages in the order they are passed
+STAGE_QUEUED = "queued"
+STAGE_DOWNLOADING = "downloading"
+STAGE_MUXING = "muxing"
+STAGE_DONE = "done"
+STAGE_ERROR = "error"
+
+## ================================= Job journal class =================================
+class JobJournal:
+    """
+    Write-ahead journal of the download jobs of one output directory.
+
+    Every checkpoint is appended as one JSON line and flushed to disk before the job moves on, so after a crash
+    the journal replays to the last stage, the chosen format ids, the bytes done and the output paths of every item.
+    A torn last line (the process died mid-write) is ignored on load. The journal is compacted into a snapshot
+    of the unfinished jobs once it grows over compact_threshold records, the done jobs are dropped then (their
+    outputs are in the output index), so the journal does not grow with every download.
+    """
+    def __init__(self, path: str, compact_threshold: int = DEFAULT_COMPACT_THRESHOLD, fsync: bool = True):
+        self.path = path
+        self.compact_threshold = compact_threshold
+        self.fsync = fsync
+        self._jobs = {}
+        self._records = 0
+        self._file = None
+        self._lock = threading.Lock()
+        self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            return
+        #end
+        with open(self.path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue# Torn write
+                #end
+                self._apply(record)
+                self._records += 1
+            #end
+        #end
+
+    def _apply(self, record: dict):
+        video_id = record.get('video_id')
+        if not video_id:
+            return
+        #end
+        if record.get('removed'):
+            self._jobs.pop(video_id, None)
+        else:
+            self._jobs.setdefault(video_id, {}).update(record)
+        #end
+
+    def _append(self, record: dict):
+        # NOTE: the caller holds the lock
+        if self._file is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            self._file = open(self.path, 'a', encoding='utf-8')
+        #end
+        self._file.write(json.dumps(record, separators=(',', ':')) + "\n")
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+        #end
+        self._records += 1
+        if self._records > self.compact_threshold and self._records > 2 * len(self._jobs):
+            self._compact()
+        #end
+
+    def checkpoint(self, video_id: str, **fields):
+        """ Merge the fields into the job of the video_id and persist the change before returning. """
+        record = {'video_id': video_id, **fields, 'updated': time.time()}
+        with self._lock:
+            self._apply(record)
+            self._append(record)
+        #end
+
+    def remove(self, video_id: str):
+        with self._lock:
+            if self._jobs.pop(video_id, None) is not None:
+                self._append({'video_id': video_id, 'removed': True})
+            #end
+        #end
+
+    def get(self, video_id: str) -> Optional[dict]:
+        with self._lock:
+            job = self._jobs.get(video_id)
+            return dict(job) if job is not None else None
+        #end
+
+    def get_stage(self, video_id: str) -> Optional[str]:
+        with self._lock:
+            job = self._jobs.get(video_id)
+            return job.get('stage') if job is not None else None
+        #end
+
+    def get_pending(self) -> List[dict]:
+        """ Get the jobs which did not reach the done stage, in the order they were first journaled. """
+        with self._lock:
+            return [dict(job) for job in self._jobs.values() if job.get('stage') != STAGE_DONE]
+        #end
+
+    def get_jobs(self) -> List[dict]:
+        with self._lock:
+            return [dict(job) for job in self._jobs.values()]
+        #end
+
+    def compact(self):
+        with self._lock:
+            self._compact()
+        #end
+
+    def _compact(self):
+        # Rewrite the current state as one record per unfinished job and atomically swap it in
+        # NOTE: a dropped done job reads as unknown (None stage), which the download treats the same as done
+        self._jobs = {video_id: job for video_id, job in self._jobs.items() if job.get('stage') != STAGE_DONE}
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        #end
+        tmp_path = self.path + ".tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            for job in self._jobs.values():
+                f.write(json.dumps(job, separators=(',', ':')) + "\n")
+            #end
+            f.flush()
+            if self.fsync:
+                os.fsync(f.fileno())
+            #end
+        #end
+        os.replace(tmp_path, self.path)
+        self._records = len(self._jobs)
+
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            #end
+        #end
+#end
+
+## ================================= Helper functions =================================
+_journals = {}
+_journals_lock = threading.Lock()
+
+def get_journal(output_dir: str) -> JobJournal:
+    """ Get the shared journal of the output directory, all the download workers of that directory checkpoint to it. """
+    path = os.path.join(os.path.abspath(output_dir), JOURNAL_FILENAME)
+    with _journals_lock:
+        journal = _journals.get(path)
+        if journal is None:
+            journal = _journals[path] = JobJournal(path)
+        #end
+        return journal
+    #end
+
+def get_partial_bytes(temp_path: str) -> int:
+    """ Get the bytes already on disk in a temp dir, i.e. what a resumed download continues from. """
+    total = 0
+    if os.path.isdir(temp_path):
+        for entry in os.scandir(temp_path):
+            if entry.is_file():
+                total += entry.stat().st_size
+            #end
+        #end
+    #end
+    return total
+#end
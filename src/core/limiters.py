@@ -1,3 +1,8 @@
+# Imports
+import time
+import threading
+from contextlib import contextmanager
+
 ## ================================= Limit and Priority class =================================
 class LimitsAndPriority:
     def __init__(self):
@@ -6,6 +11,8 @@ class LimitsAndPriority:
         self.resolution = None
         self.fps = None
         self.video_format_priority = None
+        # Parallel range connections for the large streams (None = handler default, 1 = single connection)
+        self.download_segments = None
     #end
 
     def setLimitsToMax(self):
@@ -24,6 +31,178 @@ class LimitsAndPriority:
 #end
 
 
+## ================================= Bandwidth limiter classes =================================
+class DownloadCancelled(Exception):
+    """ Raised into a download when its job of the bandwidth limiter is aborted. """
+#end
+
+class TokenBucket:
+    """
+    Token bucket in bytes. Consuming more than the available tokens puts the bucket in debt and the caller
+    sleeps it off, so the long run rate holds for any chunk size. A rate of 0 means unlimited.
+    """
+    def __init__(self, rate: float = 0, burst_seconds: float = 0.5):
+        self.rate = rate
+        self.burst_seconds = burst_seconds
+        self.tokens = 0.0
+        self.last = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, n_bytes: int) -> float:
+        """ Take n_bytes and return the time to wait before they may be used. """
+        with self._lock:
+            now = time.monotonic()
+            if self.rate <= 0:
+                self.tokens, self.last = 0.0, now
+                return 0.0
+            #end
+            self.tokens = min(self.rate * self.burst_seconds, self.tokens + (now - self.last) * self.rate)
+            self.last = now
+            self.tokens -= n_bytes
+            return -self.tokens / self.rate if self.tokens < 0 else 0.0
+        #end
+
+    def set_rate(self, rate: float):
+        with self._lock:
+            self.rate = max(0.0, float(rate or 0))
+        #end
+#end
+
+class BandwidthLimiter:
+    """
+    Global bandwidth governor with a fair share per job.
+
+    Every running job (one video item) gets its own bucket at min(job_rate, global_rate / active jobs), which
+    is recomputed when jobs start and finish or the limits change. The global bucket on top keeps the hard cap.
+    The rates are in bytes per second, 0 means unlimited. An aborted job raises DownloadCancelled at its next
+    accounted chunk, which is how a running download is cancelled.
+    """
+    def __init__(self, global_rate: float = 0, job_rate: float = 0):
+        self.global_rate = global_rate
+        self.job_rate = job_rate
+        self.global_bucket = TokenBucket(global_rate)
+        self._jobs = {}# job id -> [bucket, number of registrations, bytes done, aborted]
+        self._lock = threading.Lock()
+        self.bytes_total = 0
+        self.wait_time_total = 0.0
+
+    def set_limits(self, global_rate: float = None, job_rate: float = None):
+        """ Change the limits at runtime, None keeps the current value. """
+        with self._lock:
+            if global_rate is not None:
+                self.global_rate = max(0.0, float(global_rate))
+                self.global_bucket.set_rate(self.global_rate)
+            #end
+            if job_rate is not None:
+                self.job_rate = max(0.0, float(job_rate))
+            #end
+            self._rebalance()
+        #end
+
+    def get_job_rate(self, job_id=None) -> float:
+        """ Current rate of a job, or of a new job when it is not running. """
+        with self._lock:
+            if job_id in self._jobs:
+                return self._jobs[job_id][0].rate
+            #end
+            return self._fair_share(len(self._jobs) + 1)
+        #end
+
+    @contextmanager
+    def job(self, job_id):
+        """ Register a running job for the duration of the context and yield its consume function. """
+        with self._lock:
+            entry = self._jobs.setdefault(job_id, [TokenBucket(), 0, 0, False])
+            entry[1] += 1
+            self._rebalance()
+        #end
+        try:
+            yield lambda n_bytes: self.consume(job_id, n_bytes)
+        finally:
+            with self._lock:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    del self._jobs[job_id]
+                #end
+                self._rebalance()
+            #end
+        #end
+
+    def consume(self, job_id, n_bytes: int):
+        """ Account n_bytes of a job and block for as long as its share and the global limit require. """
+        entry = self._jobs.get(job_id)
+        if entry is not None and entry[3]:
+            raise DownloadCancelled(f"Download of {job_id} cancelled")
+        #end
+        wait = self.global_bucket.reserve(n_bytes)
+        if entry is not None:
+            wait = max(wait, entry[0].reserve(n_bytes))
+        #end
+        with self._lock:
+            if entry is not None:
+                entry[2] += n_bytes
+            #end
+            self.bytes_total += n_bytes
+            self.wait_time_total += wait
+        #end
+        if wait > 0:
+            time.sleep(wait)
+        #end
+
+    def abort(self, job_ids) -> int:
+        """ Abort the running jobs among job_ids, their downloads fail at the next chunk. Returns the number aborted. """
+        with self._lock:
+            running = [self._jobs[job_id] for job_id in job_ids if job_id in self._jobs]
+            for entry in running:
+                entry[3] = True
+            #end
+            return len(running)
+        #end
+
+    def is_running(self, job_id) -> bool:
+        with self._lock:
+            return job_id in self._jobs
+        #end
+
+    def get_job_bytes(self, job_id) -> int:
+        """ Bytes accounted so far by a running job (0 when it is not running). """
+        with self._lock:
+            entry = self._jobs.get(job_id)
+            return entry[2] if entry is not None else 0
+        #end
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {
+                "global_rate": self.global_rate,
+                "job_rate": self.job_rate,
+                "active_jobs": len(self._jobs),
+                "job_share": self._fair_share(len(self._jobs)),
+                "bytes_total": self.bytes_total,
+                "wait_time_total": round(self.wait_time_total, 3),
+            }
+        #end
+
+    # Helper methods (called with the lock held)
+    def _fair_share(self, n_jobs: int) -> float:
+        share = self.global_rate / max(1, n_jobs) if self.global_rate > 0 else 0
+        if self.job_rate > 0:
+            share = min(share, self.job_rate) if share > 0 else self.job_rate
+        #end
+        return share
+
+    def _rebalance(self):
+        share = self._fair_share(len(self._jobs))
+        for entry in self._jobs.values():
+            entry[0].set_rate(share)
+        #end
+#end
+
+## ================================= Shared bandwidth limiter =================================
+# A single governor for the process, every download path accounts its bytes here
+bandwidth_limiter = BandwidthLimiter()
+
+
 ## ================================= Helper functions =================================
 def propToInt(prop,str):
     intProp = prop.split(str)[0].strip()
@@ -44,3 +223,16 @@ def get_variable_names(cls):
 def get_variable_types(cls):
     return list(cls.__annotations__.values())
 #end
+
+def parse_rate(rate) -> float:
+    """ Parse a rate like 500K, 4.2M or 1G (bytes per second, binary multiples) into bytes per second. 0 or empty is unlimited. """
+    if rate is None or rate == "":
+        return 0.0
+    #end
+    if isinstance(rate, (int, float)):
+        return float(rate)
+    #end
+    text = str(rate).strip().upper().removesuffix("/S").removesuffix("B")
+    multiplier = {"K": 1024, "M": 1024 ** 2, "G": 1024 ** 3}.get(text[-1:], 1)
+    return float(text[:-1] if multiplier > 1 else text) * multiplier
+#end
@@ -0,0 +1,230 @@
+"""
+YouTube Video Downloader
+Copyright (C) 2023 JessyJP
+
+Author: JessyJP
+Year: 2024
+Description: This is a python source script part of the YouTube Video Downloader Suit.
+
+MIT License
+
+Copyright (c) 2024 JessyJP
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+# Imports
+import os
+import json
+import time
+import zlib
+import sqlite3
+import threading
+from typing import List, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+## ================================= Cache definitions =================================
+# Cache modes
+CACHE_OFF = "off"# Always extract from the network
+CACHE_METADATA = "metadata"# Hydrate from the cache, stale formats are re-resolved at download time
+CACHE_FRESH = "fresh"# Hydrate from the cache only while the formats (signed URLs) are still fresh
+CACHE_MODES = [CACHE_OFF, CACHE_METADATA, CACHE_FRESH]
+
+DEFAULT_CACHE_PATH = os.path.abspath(os.path.join(os.path.dirname(__file__), '../../data/metadata_cache.sqlite'))
+DEFAULT_TTL = 7 * 24 * 3600# Seconds the displayed metadata (title, author, views, ...) is kept
+DEFAULT_FORMATS_TTL = 4 * 3600# Seconds the formats are considered fresh at most. The signed stream URLs expire after about 6h
+URL_EXPIRY_MARGIN = 1800# Seconds before the expiry of the signed URLs the formats go stale, so a started download can finish
+DEFAULT_MAX_ENTRIES = 50000
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+# Only these fields of the extract_info result are stored, the rest is not used by VideoInfo
+INFO_KEYS = ['id', 'title', 'uploader', 'duration', 'description', 'upload_date', 'view_count',
+             'thumbnail', 'average_rating', 'webpage_url', 'extractor', 'extractor_key']
+# NOTE: the signed URL and its request headers are kept, so the fresh formats are downloaded without a re-extraction
+FORMAT_KEYS = ['format_id', 'ext', 'acodec', 'vcodec', 'abr', 'tbr', 'width', 'height', 'fps',
+               'filesize', 'filesize_approx', 'url', 'protocol', 'http_headers']
+URL_PROTOCOLS = ('http', 'https')# Only the formats fetched from their URL alone are stored, the manifest ones need their fragments
+
+## ================================= Metadata cache class =================================
+class MetadataCache:
+    """
+    Persistent SQLite cache of the trimmed extract_info results keyed by video_id.
+
+    Entries older than ttl are ignored and removed. The formats have their own, shorter freshness
+    window because the stream URLs are signed and expire: formats_ttl at most, and no later than the
+    earliest expiry of the stored URLs (less URL_EXPIRY_MARGIN). When the cache grows over max_entries
+    or max_bytes the least recently used entries are evicted; the entry count and byte total are kept
+    as running totals, so a put does not scan the table.
+    """
+    def __init__(self, path: str = DEFAULT_CACHE_PATH, ttl: float = DEFAULT_TTL, formats_ttl: float = DEFAULT_FORMATS_TTL,
+                 max_entries: int = DEFAULT_MAX_ENTRIES, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.path = path
+        self.ttl = ttl
+        self.formats_ttl = formats_ttl
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._connection = None
+        self._count = 0
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def _connect(self) -> sqlite3.Connection:
+        # NOTE: the database is opened lazily on first use
+        if self._connection is None:
+            if self.path != ":memory:":
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            #end
+            self._connection = sqlite3.connect(self.path, check_same_thread=False)
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS metadata ("
+                " video_id TEXT PRIMARY KEY,"
+                " info BLOB NOT NULL,"
+                " size INTEGER NOT NULL,"
+                " created REAL NOT NULL,"
+                " last_access REAL NOT NULL)")
+            self._connection.execute("CREATE INDEX IF NOT EXISTS metadata_last_access ON metadata (last_access)")
+            self._connection.execute("CREATE INDEX IF NOT EXISTS metadata_created ON metadata (created)")
+            self._connection.commit()
+            # The running totals start from the one scan of the opened table
+            self._count, self._bytes = self._connection.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM metadata").fetchone()
+        #end
+        return self._connection
+
+    def get(self, video_id: str) -> Optional[Tuple[dict, bool]]:
+        """ Return (info, formats_fresh) for the video_id or None if it is not cached or expired. """
+        if not video_id:
+            return None
+        #end
+        now = time.time()
+        with self._lock:
+            connection = self._connect()
+            row = connection.execute("SELECT info, created FROM metadata WHERE video_id = ?", (video_id,)).fetchone()
+            if row is None:
+                return None
+            #end
+            info_blob, created = row
+            if now - created > self.ttl:
+                self._delete(connection, [video_id])
+                connection.commit()
+                return None
+            #end
+            connection.execute("UPDATE metadata SET last_access = ? WHERE video_id = ?", (now, video_id))
+            connection.commit()
+        #end
+        info = json.loads(zlib.decompress(info_blob))
+        # NOTE: the entries stored without the URL expiry have no usable stream URLs
+        formats_fresh = now < min(info.pop('formats_expire', 0), created + self.formats_ttl)
+        return info, formats_fresh
+
+    def put(self, info_dict: dict):
+        """ Store the trimmed info dict, replacing the existing entry of the same video_id. """
+        video_id = info_dict.get('id')
+        if not video_id:
+            return
+        #end
+        now = time.time()
+        trimmed = trim_info_dict(info_dict)
+        trimmed['formats_expire'] = get_formats_expire(trimmed['formats'], now + self.formats_ttl)
+        info_blob = zlib.compress(json.dumps(trimmed, default=str).encode('utf-8'))
+        with self._lock:
+            connection = self._connect()
+            self._delete(connection, [video_id])
+            connection.execute("INSERT INTO metadata (video_id, info, size, created, last_access) VALUES (?, ?, ?, ?, ?)",
+                               (video_id, info_blob, len(info_blob), now, now))
+            self._count += 1
+            self._bytes += len(info_blob)
+            self._evict(connection)
+            connection.commit()
+        #end
+
+    def remove(self, video_id: str):
+        with self._lock:
+            connection = self._connect()
+            self._delete(connection, [video_id])
+            connection.commit()
+        #end
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            self._connect()
+            return {"entries": self._count, "bytes": self._bytes}
+        #end
+
+    def close(self):
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+            #end
+        #end
+
+    def _delete(self, connection: sqlite3.Connection, video_ids: List[str]):
+        # Delete the entries and take their sizes off the running totals
+        for video_id in video_ids:
+            row = connection.execute("SELECT size FROM metadata WHERE video_id = ?", (video_id,)).fetchone()
+            if row is not None:
+                connection.execute("DELETE FROM metadata WHERE video_id = ?", (video_id,))
+                self._count -= 1
+                self._bytes -= row[0]
+            #end
+        #end
+
+    def _evict(self, connection: sqlite3.Connection):
+        # Remove the expired entries first and then the least recently used ones until the bounds are met
+        expired = connection.execute("SELECT video_id FROM metadata WHERE created < ?", (time.time() - self.ttl,)).fetchall()
+        self._delete(connection, [video_id for video_id, in expired])
+        if self._count <= self.max_entries and self._bytes <= self.max_bytes:
+            return
+        #end
+        to_remove = []
+        count, total_bytes = self._count, self._bytes
+        for video_id, size in connection.execute("SELECT video_id, size FROM metadata ORDER BY last_access ASC"):
+            if count <= self.max_entries and total_bytes <= self.max_bytes:
+                break
+            #end
+            to_remove.append(video_id)
+            count -= 1
+            total_bytes -= size
+        #end
+        self._delete(connection, to_remove)
+#end
+
+## ================================= Helper functions =================================
+def trim_info_dict(info_dict: dict) -> dict:
+    trimmed = {key: info_dict.get(key) for key in INFO_KEYS}
+    trimmed['formats'] = [{key: f.get(key) for key in FORMAT_KEYS if f.get(key) is not None}
+                          for f in info_dict.get('formats') or [] if f.get('protocol', 'https') in URL_PROTOCOLS]
+    return trimmed
+
+def get_formats_expire(formats: List[dict], expire: float) -> float:
+    """ The time the formats go stale: the given bound, or earlier by the expiry of the signed URLs. 0 if a format has no URL. """
+    for f in formats:
+        if not f.get('url'):
+            return 0
+        #end
+        url_expire = parse_qs(urlsplit(f['url']).query).get('expire')
+        if url_expire and url_expire[0].isdigit():
+            expire = min(expire, int(url_expire[0]) - URL_EXPIRY_MARGIN)
+        #end
+    #end
+    return expire
+#end
+
+## ================================= Shared cache =================================
+metadata_cache = MetadataCache()
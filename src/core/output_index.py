@@ -0,0 +1,212 @@
+"""
+YouTube Video Downloader
+Copyright (C) 2023 JessyJP
+
+Author: JessyJP
+Year: 2024
+Description: This is a python source script part of the YouTube Video Downloader Suit.
+
+MIT License
+
+Copyright (c) 2024 JessyJP
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+# Imports
+import os
+import sqlite3
+import threading
+from typing import Dict, Optional
+
+## ================================= Index definitions =================================
+INDEX_FILENAME = ".output_index.sqlite"# Stored in the output directory, so the index travels with the files
+
+## ================================= Output index class =================================
+class OutputIndex:
+    """
+    Persistent index of the finished outputs of one output directory: (video_id, symbol) -> (path, size, mtime).
+
+    The entries are held in a dict for O(1) lookups and written through to SQLite. A lookup costs one stat
+    of the indexed file, entries whose file was deleted or changed size are dropped. Outputs of earlier runs
+    that were never indexed are found by their expected file name in a one-off listing of the directory,
+    unless that file is indexed as the output of another video (e.g. two videos with the same title).
+    """
+    def __init__(self, output_dir: str, path: str = None):
+        self.output_dir = os.path.abspath(output_dir)
+        self.path = path or os.path.join(self.output_dir, INDEX_FILENAME)
+        self._entries = {}
+        self._owners = {}# Path -> video_id of the indexed files
+        self._names = None# Lazy file name listing: {name: size}
+        self._connection = None
+        self._lock = threading.Lock()
+        self._load()
+
+    def _connect(self) -> sqlite3.Connection:
+        if self._connection is None:
+            if self.path != ":memory:":
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            #end
+            self._connection = sqlite3.connect(self.path, check_same_thread=False)
+            self._connection.execute("PRAGMA journal_mode=WAL")
+            self._connection.execute(
+                "CREATE TABLE IF NOT EXISTS outputs ("
+                " video_id TEXT NOT NULL,"
+                " symbol TEXT NOT NULL,"
+                " path TEXT NOT NULL,"
+                " size INTEGER NOT NULL,"
+                " mtime REAL NOT NULL,"
+                " PRIMARY KEY (video_id, symbol))")
+            self._connection.commit()
+        #end
+        return self._connection
+
+    def _load(self):
+        if self.path != ":memory:" and not os.path.exists(self.path):
+            return# NOTE: the database is only created by the first record
+        #end
+        with self._lock:
+            for video_id, symbol, path, size, mtime in self._connect().execute("SELECT video_id, symbol, path, size, mtime FROM outputs"):
+                self._entries[(video_id, symbol)] = (path, size, mtime)
+                self._owners[path] = video_id
+            #end
+        #end
+
+    def record(self, video_id: str, symbol: str, path: str) -> bool:
+        """ Index a finished output file. Returns False if the file does not exist. """
+        try:
+            stat = os.stat(path)
+        except OSError:
+            return False
+        #end
+        path = os.path.abspath(path)
+        with self._lock:
+            self._entries[(video_id, symbol)] = (path, stat.st_size, stat.st_mtime)
+            self._owners[path] = video_id
+            if self._names is not None and os.path.dirname(path) == self.output_dir:
+                self._names[os.path.basename(path)] = stat.st_size
+            #end
+            connection = self._connect()
+            connection.execute("INSERT OR REPLACE INTO outputs (video_id, symbol, path, size, mtime) VALUES (?, ?, ?, ?, ?)",
+                               (video_id, symbol, path, stat.st_size, stat.st_mtime))
+            connection.commit()
+        #end
+        return True
+
+    def record_all(self, video_id: str, outputs: Dict[str, str]):
+        for symbol, path in outputs.items():
+            if path:
+                self.record(video_id, symbol, path)
+            #end
+        #end
+
+    def lookup(self, video_id: str, symbol: str, expected_name: str = None) -> Optional[str]:
+        """ Get the path of an existing output, by the index or else by the expected file name in the output directory. """
+        with self._lock:
+            entry = self._entries.get((video_id, symbol))
+        #end
+        if entry is not None:
+            path, size, _ = entry
+            try:
+                if os.stat(path).st_size == size:
+                    return path
+                #end
+            except OSError:
+                pass
+            #end
+            self.remove(video_id, symbol)# Deleted or changed since it was indexed
+        #end
+        if expected_name and self._get_names().get(expected_name):
+            path = os.path.join(self.output_dir, expected_name)
+            with self._lock:
+                owner = self._owners.get(path)
+            #end
+            if owner is not None and owner != video_id:
+                return None# The same name but the output of another video
+            #end
+            if self.record(video_id, symbol, path):
+                return path
+            #end
+        #end
+        return None
+
+    def remove(self, video_id: str, symbol: str):
+        with self._lock:
+            entry = self._entries.pop((video_id, symbol), None)
+            if entry is not None:
+                if self._owners.get(entry[0]) == video_id:
+                    del self._owners[entry[0]]
+                #end
+                connection = self._connect()
+                connection.execute("DELETE FROM outputs WHERE video_id = ? AND symbol = ?", (video_id, symbol))
+                connection.commit()
+            #end
+        #end
+
+    def get_video_ids(self) -> set:
+        """ The ids of the videos with an indexed output. """
+        with self._lock:
+            return {video_id for video_id, _ in self._entries}
+        #end
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            return {"entries": len(self._entries), "listed_files": len(self._names) if self._names is not None else 0}
+        #end
+
+    def close(self):
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+            #end
+        #end
+
+    def _get_names(self) -> dict:
+        # One listing of the directory, later outputs are added by record
+        with self._lock:
+            if self._names is None:
+                names = {}
+                if os.path.isdir(self.output_dir):
+                    for entry in os.scandir(self.output_dir):
+                        if entry.is_file():
+                            names[entry.name] = entry.stat().st_size
+                        #end
+                    #end
+                #end
+                self._names = names
+            #end
+            return self._names
+        #end
+#end
+
+## ================================= Helper functions =================================
+_indexes = {}
+_indexes_lock = threading.Lock()
+
+def get_output_index(output_dir: str) -> OutputIndex:
+    """ Get the shared index of the output directory. """
+    output_dir = os.path.abspath(output_dir)
+    with _indexes_lock:
+        index = _indexes.get(output_dir)
+        if index is None:
+            index = _indexes[output_dir] = OutputIndex(output_dir)
+        #end
+        return index
+    #end
+#end
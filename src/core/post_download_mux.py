@@ -30,7 +30,16 @@ SOFTWARE.
 """
 
 # Imports
+import os
+import shutil
+import tempfile
 import subprocess
+import threading
+import time
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, Future
+from concurrent.futures.process import BrokenProcessPool
 from typing import Union
 import ffmpeg as ffmpeg # Video Editing Module
 
@@ -38,6 +47,96 @@ import ffmpeg as ffmpeg # Video Editing Module
 import sys
 isDeployed = getattr(sys, "frozen", False)
 
+from core.download_scheduler import DEFAULT_MUX_WORKERS
+
+## ================================= Mux concurrency limit =================================
+# Muxing is CPU/disk bound, hence it is capped separately from the network downloads
+max_mux_workers = DEFAULT_MUX_WORKERS
+mux_slots = threading.BoundedSemaphore(DEFAULT_MUX_WORKERS)
+
+def get_max_mux_workers() -> int:
+    return max_mux_workers
+
+def set_max_mux_workers(max_workers: int):
+    # The cap of the muxes in the download threads and the size of the mux stage
+    global mux_slots, max_mux_workers
+    max_workers = max(1, int(max_workers))
+    if max_workers == max_mux_workers:
+        return
+    #end
+    max_mux_workers = max_workers
+    # NOTE: muxes already running release the semaphore they acquired
+    mux_slots = threading.BoundedSemaphore(max_workers)
+    with _mux_stage_lock:
+        if _mux_stage is not None:
+            _mux_stage.set_max_workers(max_workers)
+        #end
+    #end
+#end
+
+
+## ================================= Mux tool selection =================================
+MUX_TOOL_AUTO = "auto"
+MUX_TOOL_FFMPEG = "ffmpeg"
+MUX_TOOL_MKVMERGE = "mkvmerge"
+# Names accepted from config.ini (list_of_merge_tools) and the command line
+MUX_TOOL_ALIASES = {"AUTO": MUX_TOOL_AUTO, "FFMPG": MUX_TOOL_FFMPEG, "FFMPEG": MUX_TOOL_FFMPEG,
+                    "MKVTOOLS": MUX_TOOL_MKVMERGE, "MKVMERGE": MUX_TOOL_MKVMERGE}
+# Auto selection order per container, fastest first (see tests/bench_muxers.py): mkvmerge is the native matroska
+# writer and does not go through a demux/remux of every packet, the other containers are only written by ffmpeg
+MUX_PREFERENCE = {".mkv": (MUX_TOOL_MKVMERGE, MUX_TOOL_FFMPEG), ".mka": (MUX_TOOL_MKVMERGE, MUX_TOOL_FFMPEG)}
+MUX_PREFERENCE_DEFAULT = (MUX_TOOL_FFMPEG,)
+
+mux_tool_selection = MUX_TOOL_AUTO
+_mux_tools = None# Probed tool -> executable path, cached
+_mkvmerge_dir = None
+
+def probe_mux_tools(refresh: bool = False) -> dict:
+    """ Find the available mux tools (PATH, the configured mkvmerge dir and the bundled mkvtoolnix), cached after the first call. """
+    global _mux_tools
+    if _mux_tools is None or refresh:
+        tools = {}
+        ffmpeg_path = shutil.which("ffmpeg")
+        if ffmpeg_path:
+            tools[MUX_TOOL_FFMPEG] = ffmpeg_path
+        #end
+        # The configured directory first, then PATH and the bundled mkvtoolnix
+        candidates = [os.path.join(_mkvmerge_dir, "mkvmerge")] if _mkvmerge_dir else []
+        candidates += ["mkvmerge", os.path.join("mkvtoolnix", "mkvmerge")]
+        for candidate in candidates:
+            mkvmerge_path = shutil.which(candidate)
+            if mkvmerge_path:
+                tools[MUX_TOOL_MKVMERGE] = mkvmerge_path
+                break
+            #end
+        #end
+        _mux_tools = tools
+    #end
+    return _mux_tools
+
+def set_mux_tool(tool: str = MUX_TOOL_AUTO, mkvmerge_dir: str = None) -> dict:
+    """ Select the mux tool by name (auto, ffmpeg, mkvmerge or the config.ini names) and re-probe the tools. """
+    global mux_tool_selection, _mkvmerge_dir
+    tool_key = str(tool or MUX_TOOL_AUTO).strip().strip('"').upper()
+    if tool_key not in MUX_TOOL_ALIASES:
+        raise ValueError(f"Unknown mux tool: {tool}")
+    #end
+    mux_tool_selection = MUX_TOOL_ALIASES[tool_key]
+    _mkvmerge_dir = mkvmerge_dir.strip().strip('"') if mkvmerge_dir else None
+    return probe_mux_tools(refresh=True)
+
+def get_mux_tool_order(output_file: str) -> list:
+    """ The available tools to try for the output container, the selected tool first. """
+    tools = probe_mux_tools()
+    extension = os.path.splitext(output_file)[1].lower()
+    order = list(MUX_PREFERENCE.get(extension, MUX_PREFERENCE_DEFAULT))
+    if mux_tool_selection in order:
+        order.remove(mux_tool_selection)
+        order.insert(0, mux_tool_selection)
+    #end
+    return [tool for tool in order if tool in tools]
+#end
+
 
 ## ================================= Progress & Other function =================================
 
@@ -48,10 +147,29 @@ def on_progress(stream, chunk, bytes_remaining):
 ## ================================= Combine audio-video functions =================================
 def combine_via_auto_selection(output_file, video_filename, audio_filenames, subtitle_filenames):
 
-    # if os_name == 'Windows' and os_arch == '64bit':
-    #     combine_via_mkvmerge(output_file, video_filename, audio_filenames, subtitle_filenames)
-    # else:
-    combine_via_ffmpeg(output_file, video_filename, audio_filenames, subtitle_filenames)
+    # Wait for a free mux slot
+    with mux_slots:
+        return combine_with_tool_order(output_file, video_filename, audio_filenames, subtitle_filenames)
+    #end
+#end
+
+def combine_with_tool_order(output_file, video_filename, audio_filenames, subtitle_filenames):
+    # The tools are tried in the selection order of the container, the next one is the fallback if one fails
+    tool_order = get_mux_tool_order(output_file)
+    if not tool_order:
+        raise RuntimeError(f"No mux tool found for [{output_file}], install ffmpeg or mkvmerge")
+    #end
+    combine_functions = {MUX_TOOL_FFMPEG: combine_via_ffmpeg, MUX_TOOL_MKVMERGE: combine_via_mkvmerge}
+    for n, tool in enumerate(tool_order):
+        try:
+            combine_functions[tool](output_file, video_filename, audio_filenames, subtitle_filenames)
+            return tool
+        except Exception as e:
+            if n == len(tool_order) - 1:
+                raise
+            #end
+            print(f"Mux via {tool} failed, fallback to {tool_order[n + 1]}. Error: {e}")
+        #end
     #end
 #end
 
@@ -60,11 +178,14 @@ def combine_via_ffmpeg(output_file, video_filename, audio_filenames, subtitle_fi
     audio = ffmpeg.input(audio_filenames[0])
 
     # Combine video and audio streams using the 'copy' codec to avoid transcoding
-    output = ffmpeg.output(video, audio, output_file, format='matroska', vcodec='copy', acodec='copy')
+    # NOTE: matroska is forced for .mkv only, the other containers follow the output extension
+    output_format = {'format': 'matroska'} if os.path.splitext(output_file)[1].lower() in (".mkv", ".mka") else {}
+    output = ffmpeg.output(video, audio, output_file, vcodec='copy', acodec='copy', **output_format)
+    executable = probe_mux_tools().get(MUX_TOOL_FFMPEG, "ffmpeg")
 
     if isDeployed:
         # Run the ffmpeg command
-        process = output.run_async(pipe_stdout=True, pipe_stderr=True, overwrite_output=True)
+        process = output.run_async(cmd=executable, pipe_stdout=True, pipe_stderr=True, overwrite_output=True)
         stdout, stderr = process.communicate()
 
         # stdout and stderr are bytes, decode them to strings if needed
@@ -74,14 +195,284 @@ def combine_via_ffmpeg(output_file, video_filename, audio_filenames, subtitle_fi
         print(stdout, stderr)
     else:
         # Run the ffmpeg command
-         output.run(overwrite_output=True)
+         output.run(cmd=executable, overwrite_output=True)
+    #end
+#end
+
+## ================================= Process pool mux stage =================================
+def _run_mux_job(output_file, video_filename, audio_filenames, subtitle_filenames, tools, tool_selection):
+    # Runs in a mux process: the tool probe and selection of the parent are applied, then the mux is timed
+    global _mux_tools, mux_tool_selection
+    _mux_tools, mux_tool_selection = tools, tool_selection
+    start = time.perf_counter()
+    tool = combine_with_tool_order(output_file, video_filename, audio_filenames, subtitle_filenames)
+    return tool, time.perf_counter() - start
+#end
+
+class MuxStage:
+    """
+    Dedicated mux stage on a process pool (max_mux_workers processes).
+
+    The download threads hand the finished streams off with submit() and move on to the next item, the mux and
+    its ffmpeg/mkvmerge child run in the pool processes instead of competing with the download, progress and web
+    server threads of this process. The continuation of an item (moving its files, cleanup, bookkeeping) runs on a
+    finalize thread once its mux is done. The stats report the queue depth and the per-mux latency.
+    Where the process pool cannot run (e.g. no multiprocessing on the platform) the muxes run inline instead.
+    """
+    def __init__(self, max_workers: int = None, latency_window: int = 200):
+        self.max_workers = max(1, int(max_workers or os.cpu_count() or 1))
+        self._pool = None
+        self.pool_error = None# Set when the process pool failed, the muxes run inline from then on
+        self._finalize_pool = ThreadPoolExecutor(max_workers=2, thread_name_prefix="MuxFinalize")
+        self._lock = threading.Lock()
+        self._idle = threading.Condition(self._lock)
+        self._outstanding = {}# Result future -> its batch
+        self.submitted = 0
+        self.completed = 0
+        self.errors = 0
+        self.mux_latencies = deque(maxlen=latency_window)# Time in the mux tool
+        self.total_latencies = deque(maxlen=latency_window)# Time from the hand-off to the muxed file, queue wait included
+
+    def submit(self, output_file, video_filename, audio_filenames, subtitle_filenames, then=None, batch=None) -> Future:
+        """ Queue a mux and return a future of then() (run on a finalize thread after the mux), or of the mux tool name. """
+        mux_args = (output_file, video_filename, audio_filenames, subtitle_filenames)
+        mux_future = self._submit_to_pool(mux_args)
+        if mux_future is None:
+            # Inline in the calling thread, the same as without the stage
+            result = Future()
+            try:
+                tool = combine_via_auto_selection(*mux_args)
+                result.set_result(then() if then is not None else tool)
+            except BaseException as e:
+                result.set_exception(e)
+            #end
+            return result
+        #end
+
+        result = Future()
+        submitted_at = time.perf_counter()
+        with self._lock:
+            self.submitted += 1
+            self._outstanding[result] = batch
+        #end
+
+        def finalize(mux_future):
+            try:
+                mux_error = mux_future.exception()
+                mux_result = mux_future.result() if mux_error is None else None
+                if isinstance(mux_error, BrokenProcessPool):
+                    # The pool processes could not run, the mux is retried inline (on this finalize thread)
+                    self._set_pool_error(mux_error)
+                    try:
+                        mux_result, mux_error = _run_mux_job(*mux_args, probe_mux_tools(), mux_tool_selection), None
+                    except Exception as e:
+                        mux_error = e
+                    #end
+                #end
+                with self._lock:
+                    if mux_error is None:
+                        self.completed += 1
+                        tool, mux_latency = mux_result
+                        self.mux_latencies.append(mux_latency)
+                        self.total_latencies.append(time.perf_counter() - submitted_at)
+                    else:
+                        self.errors += 1
+                    #end
+                #end
+                if mux_error is not None:
+                    raise mux_error
+                #end
+                result.set_result(then() if then is not None else tool)
+            except BaseException as e:
+                result.set_exception(e)
+            finally:
+                # NOTE: after set_result, so the done callbacks of the result have run as well
+                with self._lock:
+                    self._outstanding.pop(result, None)
+                    self._idle.notify_all()
+                #end
+            #end
+        #end
+        # NOTE: the done callback runs on the pool's management thread, hence the continuation is moved to a finalize thread
+        mux_future.add_done_callback(lambda mux_future: self._finalize_pool.submit(finalize, mux_future))
+        return result
+
+    def batch(self) -> "MuxBatch":
+        """ A handle for the muxes of one download batch, its join() does not wait for the other batches. """
+        return MuxBatch(self)
+
+    def join(self, timeout: float = None, batch=None) -> bool:
+        """
+        Wait until the handed off muxes (all, or those of the batch), their continuations and done callbacks are done.
+        False on timeout.
+        """
+        with self._lock:
+            if batch is None:
+                return self._idle.wait_for(lambda: not self._outstanding, timeout)
+            #end
+            return self._idle.wait_for(lambda: batch not in self._outstanding.values(), timeout)
+        #end
+
+    def set_max_workers(self, max_workers: int):
+        # The running pool finishes its queued muxes, the next hand-offs start a pool of the new size
+        with self._lock:
+            self.max_workers = max(1, int(max_workers))
+            pool, self._pool = self._pool, None
+        #end
+        if pool is not None:
+            pool.shutdown(wait=False)
+        #end
+
+    def get_stats(self) -> dict:
+        with self._lock:
+            in_flight = self.submitted - self.completed - self.errors
+            return {
+                "workers": self.max_workers,
+                "inline": self.pool_error is not None,
+                "in_flight": in_flight,
+                "queue_depth": max(0, in_flight - self.max_workers),
+                "completed": self.completed,
+                "errors": self.errors,
+                "mux_latency_avg": _average(self.mux_latencies),
+                "mux_latency_max": round(max(self.mux_latencies), 3) if self.mux_latencies else 0.0,
+                "handoff_latency_avg": _average(self.total_latencies),
+            }
+        #end
+
+    def shutdown(self):
+        self.join()
+        with self._lock:
+            pool, self._pool = self._pool, None
+        #end
+        if pool is not None:
+            pool.shutdown()
+        #end
+
+    def _submit_to_pool(self, mux_args) -> Union[Future, None]:
+        # The pool is created on the first hand-off. The spawn start method is used, forking a process with running threads
+        # is unsafe. None if the pool cannot run.
+        try:
+            with self._lock:
+                if self.pool_error is not None:
+                    return None
+                #end
+                if self._pool is None:
+                    self._pool = ProcessPoolExecutor(max_workers=self.max_workers, mp_context=multiprocessing.get_context("spawn"))
+                #end
+                pool = self._pool
+            #end
+            return pool.submit(_run_mux_job, *mux_args, probe_mux_tools(), mux_tool_selection)
+        except Exception as e:
+            self._set_pool_error(e)
+            return None
+        #end
+
+    def _set_pool_error(self, error: BaseException):
+        with self._lock:
+            if self.pool_error is None:
+                print(f"The mux process pool cannot run, the muxes run inline. Error: {error}")
+                self.pool_error = error
+            #end
+        #end
+#end
+
+class MuxBatch:
+    """ The muxes of one download batch on the shared mux stage. """
+    def __init__(self, stage: MuxStage):
+        self.stage = stage
+
+    def submit(self, output_file, video_filename, audio_filenames, subtitle_filenames, then=None) -> Future:
+        return self.stage.submit(output_file, video_filename, audio_filenames, subtitle_filenames, then=then, batch=self)
+
+    def join(self, timeout: float = None) -> bool:
+        """ Wait for the muxes of this batch only. """
+        return self.stage.join(timeout, batch=self)
+#end
+
+def _average(values) -> float:
+    return round(sum(values) / len(values), 3) if values else 0.0
+#end
+
+# A single mux stage for the process, shared by the download batches
+_mux_stage = None
+_mux_stage_lock = threading.Lock()
+
+def get_mux_stage() -> MuxStage:
+    # Sized by set_max_mux_workers
+    global _mux_stage
+    with _mux_stage_lock:
+        if _mux_stage is None:
+            _mux_stage = MuxStage(max_mux_workers)
+        #end
+        return _mux_stage
+    #end
+#end
+
+def get_mux_stage_stats() -> dict:
+    # The stats without creating the stage
+    return _mux_stage.get_stats() if _mux_stage is not None else {"workers": 0, "in_flight": 0, "queue_depth": 0}
+#end
+
+## ================================= Streaming mux =================================
+def is_streaming_mux_supported() -> bool:
+    # The streams are handed to ffmpeg as inherited pipe file descriptors (pipe:N), which needs POSIX fd passing
+    return os.name == "posix" and shutil.which("ffmpeg") is not None
+#end
+
+def combine_via_ffmpeg_pipes(output_file, video_source_args, audio_source_args):
+    """
+    Mux the video and audio streams while they are being fetched.
+    Each source command writes its stream to stdout, ffmpeg reads both pipes and copies them into a matroska
+    file, so nothing is staged on disk and the mux finishes together with the slower of the two fetches.
+    """
+    # NOTE: the stderr of the sources goes to temp files, a full stderr pipe would stall a source
+    with tempfile.TemporaryFile() as video_err, tempfile.TemporaryFile() as audio_err:
+        video_proc = subprocess.Popen(video_source_args, stdout=subprocess.PIPE, stderr=video_err)
+        audio_proc = subprocess.Popen(audio_source_args, stdout=subprocess.PIPE, stderr=audio_err)
+        mux_returncode, mux_err = None, b""
+        try:
+            video_fd, audio_fd = video_proc.stdout.fileno(), audio_proc.stdout.fileno()
+            args = ["ffmpeg", "-hide_banner", "-loglevel", "error", "-y",
+                    "-i", f"pipe:{video_fd}", "-i", f"pipe:{audio_fd}",
+                    "-map", "0:v:0", "-map", "1:a:0", "-c", "copy", "-f", "matroska", output_file]
+            mux_proc = subprocess.Popen(args, pass_fds=(video_fd, audio_fd), stdin=subprocess.DEVNULL,
+                                        stdout=subprocess.DEVNULL, stderr=subprocess.PIPE)
+            # Only ffmpeg keeps the read ends open, so a source gets a broken pipe instead of blocking if ffmpeg dies
+            video_proc.stdout.close()
+            audio_proc.stdout.close()
+            _, mux_err = mux_proc.communicate()
+            mux_returncode = mux_proc.returncode
+        finally:
+            for proc in (video_proc, audio_proc):
+                if mux_returncode != 0 and proc.poll() is None:
+                    proc.kill()
+                #end
+                proc.wait()
+            #end
+        #end
+
+        if mux_returncode != 0 or video_proc.returncode != 0 or audio_proc.returncode != 0:
+            errors = []
+            for name, returncode, err in (("ffmpeg", mux_returncode, mux_err), ("video", video_proc.returncode, video_err),
+                                          ("audio", audio_proc.returncode, audio_err)):
+                if not isinstance(err, bytes):
+                    err.seek(0)
+                    err = err.read()
+                #end
+                errors.append(f"{name} exit code {returncode}: {err.decode('utf-8', 'replace').strip()[-500:]}")
+            #end
+            raise RuntimeError("Streaming mux failed. " + " | ".join(errors))
+        #end
     #end
 #end
 
 def combine_via_mkvmerge(output_file, video_filename, audio_filenames, subtitle_filenames):
-    executable = r"./mkvtoolnix/mkvmerge.exe"#TODO: this has to be edited, maybe add the c\program files\-path
+    executable = probe_mux_tools().get(MUX_TOOL_MKVMERGE)
+    if executable is None:
+        raise RuntimeError("mkvmerge was not found on PATH, in the configured mkvmerge_dir or in ./mkvtoolnix")
+    #end
     # Prepare the arguments for mkvmerge
-    args = [executable, "-o", output_file, video_filename]
+    args = [executable, "--quiet", "-o", output_file, video_filename]
     for audio in audio_filenames:
         args += ["--language", "0:und", audio]
     #end
@@ -89,6 +480,9 @@ def combine_via_mkvmerge(output_file, video_filename, audio_filenames, subtitle_
         args += ["--language", "0:und", subtitle]
     #end
 
-    # Call mkvmerge via the command line
-    subprocess.run(args, check=True)
+    # Call mkvmerge via the command line, the exit code 1 means completed with warnings
+    result = subprocess.run(args, stdout=subprocess.PIPE, stderr=subprocess.STDOUT)
+    if result.returncode not in (0, 1):
+        raise RuntimeError(f"mkvmerge exit code {result.returncode}: {result.stdout.decode('utf-8', 'replace').strip()[-500:]}")
+    #end
 #end
\ No newline at end of file
@@ -47,8 +47,9 @@ from core.validation_methods import check_for_disallowed_filename_chars
 from core.download_options import setOutputKeepsStr
 from core.download_options import *  # TODO: list them one by one
 from core.post_download_mux import combine_via_auto_selection
+from core.http_session import http_client
 
-from core.limiters import LimitsAndPriority, propToInt
+from core.limiters import LimitsAndPriority, propToInt, bandwidth_limiter
 
 
 ## ================================= Video Info class =================================
@@ -191,7 +192,7 @@ class VideoInfo(YouTube):
         format: 'blob' (return binary data), 'pil' (return PIL image), 'raw' (return raw response content)
         """
         try:
-            response = requests.get(self.thumbnail_url)
+            response = http_client.get(self.thumbnail_url)
             response.raise_for_status()
 
             if format == 'blob':
@@ -240,8 +241,12 @@ class VideoInfo(YouTube):
         return video_file
     #end
 
-    def process_downloads_combine_keep(self, limits, output_dir, outputExt=".mkv"):
+    def process_downloads_combine_keep(self, limits, output_dir, outputExt=".mkv", journal=None, output_index=None, mux_stage=None):
+        # NOTE: pytube streams cannot be resumed, only the job stages are journaled (by the list manager).
+        # The output index is only updated by the list manager as well. The mux runs inline, the mux stage is not used.
         strOut = f"Process Entry Download: ";
+        # The stream chunks are accounted to the bandwidth limiter, the callback blocks while over the limit
+        self.register_on_progress_callback(lambda stream, chunk, bytes_remaining: bandwidth_limiter.consume(self.video_id, len(chunk)))
         output_dir = os.path.abspath(output_dir)
         temp_path = self.make_tmp_dir(output_dir)
         self.log("Create temporary directory: "+temp_path)
@@ -315,7 +320,7 @@ class VideoInfo(YouTube):
     def download_thumbnail(self, output_dir: str, format="jpg") -> str:
         thumbnail_url = self.thumbnail_url
         thumbnail_filename = os.path.join(output_dir, f"{self.base_output_name}.{format}")
-        thumbnail_data = requests.get(thumbnail_url).content
+        thumbnail_data = http_client.get(thumbnail_url).content
         with open(thumbnail_filename, 'wb') as f:
             f.write(thumbnail_data)
         return thumbnail_filename
@@ -0,0 +1,214 @@
+"""
+YouTube Video Downloader
+Copyright (C) 2023 JessyJP
+
+Author: JessyJP
+Year: 2024
+Description: This is a python source script part of the YouTube Video Downloader Suit.
+
+MIT License
+
+Copyright (c) 2024 JessyJP
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+# Imports
+import os
+import mmap
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, Tuple
+
+from core.http_session import http_client
+
+## ================================= Segmented download definitions =================================
+DEFAULT_SEGMENTS = 4# Parallel connections per format
+DEFAULT_MIN_SEGMENTED_SIZE = 32 * 1024 * 1024# Smaller formats are not worth the extra connections
+DEFAULT_REQUEST_SIZE = 10 * 1024 * 1024# Bytes per range request, larger single requests get throttled by the media servers
+READ_SIZE = 1024 * 1024
+
+class SegmentStopped(IOError):
+    """ Raised in the segments which stop because another segment failed. """
+
+## ================================= Segmented downloader class =================================
+class SegmentedDownloader:
+    """
+    Multi-connection downloader for one large stream.
+
+    The size is probed with a one byte range request, the output is preallocated to it, and the byte range is
+    split into one segment per connection. Each connection fetches its segment in request_size range requests
+    and writes the data at its offset, with pwrite where available and through an mmap of the file otherwise.
+    The first failed segment stops the others (they check a shared event per chunk), and the result is verified
+    against the probed size.
+    """
+    def __init__(self, segments: int = DEFAULT_SEGMENTS, request_size: int = DEFAULT_REQUEST_SIZE, client=http_client, on_data=None):
+        self.segments = max(1, int(segments))
+        self.request_size = max(READ_SIZE, int(request_size))
+        self.client = client
+        # Called with the size of every received chunk (e.g. the bandwidth limiter), it may block to slow the segment down
+        self.on_data = on_data
+
+    def probe_size(self, url: str, headers: dict = None) -> int:
+        """ Get the total size from the Content-Range of a one byte request. """
+        response = self.client.get(url, headers={**(headers or {}), 'Range': 'bytes=0-0'}, stream=True)
+        try:
+            response.raise_for_status()
+            content_range = response.headers.get('Content-Range', '')
+            if response.status_code != 206 or '/' not in content_range or content_range.endswith('/*'):
+                raise IOError(f"Range requests are not supported (status {response.status_code})")
+            #end
+            return int(content_range.rsplit('/', 1)[1])
+        finally:
+            response.close()
+        #end
+
+    def download(self, url: str, output_file: str, headers: dict = None) -> int:
+        """ Download the URL into output_file and return its verified size. """
+        total_size = self.probe_size(url, headers)
+        fd = os.open(output_file, os.O_RDWR | os.O_CREAT | getattr(os, 'O_BINARY', 0), 0o644)
+        try:
+            # Preallocate, so the segments can be written at their offsets in any order
+            if hasattr(os, 'posix_fallocate') and total_size:
+                os.posix_fallocate(fd, 0, total_size)
+            #end
+            os.ftruncate(fd, total_size)
+            if total_size:
+                writer = _PwriteWriter(fd) if hasattr(os, 'pwrite') else _MmapWriter(fd, total_size)
+                stop = threading.Event()
+                try:
+                    with ThreadPoolExecutor(max_workers=self.segments, thread_name_prefix="Segment") as pool:
+                        futures = [pool.submit(self._fetch_segment, url, headers, writer, start, end, stop)
+                                   for start, end in split_byte_ranges(total_size, self.segments)]
+                    #end
+                finally:
+                    writer.close()
+                #end
+                # Raise the error of the failed segment, not the stop of the others
+                for future in futures:
+                    if future.exception() is not None and not isinstance(future.exception(), SegmentStopped):
+                        raise future.exception()
+                    #end
+                #end
+                written = sum(future.result() for future in futures)
+            else:
+                written = 0
+            #end
+            if written != total_size or os.fstat(fd).st_size != total_size:
+                raise IOError(f"Segmented download incomplete: {written} of {total_size} bytes")
+            #end
+        finally:
+            os.close(fd)
+        #end
+        return total_size
+
+    def _fetch_segment(self, url: str, headers: dict, writer, start: int, end: int, stop: threading.Event) -> int:
+        # Fetch [start, end] (inclusive) in request_size range requests, a failure stops the other segments
+        try:
+            return self._fetch_range(url, headers, writer, start, end, stop)
+        except BaseException:
+            stop.set()
+            raise
+        #end
+
+    def _fetch_range(self, url: str, headers: dict, writer, start: int, end: int, stop: threading.Event) -> int:
+        written = 0
+        offset = start
+        while offset <= end:
+            if stop.is_set():
+                raise SegmentStopped("Another segment failed")
+            #end
+            request_end = min(end, offset + self.request_size - 1)
+            response = self.client.get(url, headers={**(headers or {}), 'Range': f'bytes={offset}-{request_end}'}, stream=True)
+            try:
+                response.raise_for_status()
+                if response.status_code != 206:
+                    raise IOError(f"Range request answered with status {response.status_code}")
+                #end
+                for chunk in response.iter_content(READ_SIZE):
+                    if stop.is_set():
+                        raise SegmentStopped("Another segment failed")
+                    #end
+                    if offset + len(chunk) > request_end + 1:
+                        raise IOError("Range response is larger than requested")
+                    #end
+                    if self.on_data is not None:
+                        self.on_data(len(chunk))
+                    #end
+                    writer.write(chunk, offset)
+                    offset += len(chunk)
+                    written += len(chunk)
+                #end
+            finally:
+                response.close()
+            #end
+            if offset != request_end + 1:
+                raise IOError(f"Range response is short: {offset - start} of {end - start + 1} bytes")
+            #end
+        #end
+        return written
+#end
+
+## ================================= Writers =================================
+class _PwriteWriter:
+    # Positional writes on the shared fd, safe from the segment threads
+    def __init__(self, fd: int):
+        self.fd = fd
+
+    def write(self, data: bytes, offset: int):
+        view = memoryview(data)
+        while view:
+            n = os.pwrite(self.fd, view, offset)
+            view = view[n:]
+            offset += n
+        #end
+
+    def close(self):
+        pass
+
+class _MmapWriter:
+    # Fallback where there is no pwrite (Windows): the segments are copied into a shared mapping of the file
+    def __init__(self, fd: int, size: int):
+        self.map = mmap.mmap(fd, size)
+
+    def write(self, data: bytes, offset: int):
+        self.map[offset:offset + len(data)] = data
+
+    def close(self):
+        self.map.flush()
+        self.map.close()
+#end
+
+## ================================= Helper functions =================================
+def split_byte_ranges(total_size: int, segments: int) -> List[Tuple[int, int]]:
+    """ Split [0, total_size) into at most `segments` contiguous inclusive byte ranges. """
+    segments = max(1, min(int(segments), total_size))
+    step, remainder = divmod(total_size, segments)
+    ranges, start = [], 0
+    for n in range(segments):
+        end = start + step + (1 if n < remainder else 0) - 1
+        ranges.append((start, end))
+        start = end + 1
+    #end
+    return ranges
+
+def is_segmentable(stream: dict, min_size: int = DEFAULT_MIN_SEGMENTED_SIZE) -> bool:
+    """ Check if a format is a plain HTTP(S) file which is large enough for a segmented download. """
+    size = stream.get('filesize') or stream.get('filesize_approx') or 0
+    return bool(stream.get('url')) and stream.get('protocol', 'https') in ('http', 'https') and size >= min_size
+#end
@@ -44,6 +44,8 @@ import googleapiclient.errors
 from core.pytube_handler import VideoInfo as VideoInfoPyTube
 from core.youtube_dl_handler import VideoInfo as VideoInfoDL
 from core.yt_dlp_handler import VideoInfo as VideoInfoYTDLP
+from core.http_session import http_client
+from core.yt_dlp_provider import ydl_provider
 
 # from core.common import logger
 import logging
@@ -133,6 +135,44 @@ def get_video_urls_from_playlist(playlist_url: str) -> Set[str]:
     return video_urls
 #end
 
+def get_flat_playlist_entries(url: str, max_depth: int = 2) -> List[dict]:
+    """
+    Lists the video entries of a playlist or channel with the yt-dlp flat extraction.
+
+    The whole (paginated) listing is a single pass without extracting the videos themselves. The entries carry the
+    id, url, title, channel, duration and view count. Nested tabs and playlists (e.g. the Videos/Shorts/Live tabs
+    of a channel) are listed as well, up to max_depth levels.
+
+    Args:
+        url (str): The URL of the playlist or channel.
+        max_depth (int): The nesting levels to follow.
+
+    Returns:
+        List[dict]: The flat video entries, without duplicates.
+    """
+    with ydl_provider.borrow({'extract_flat': 'in_playlist'}) as ydl:
+        info = ydl.extract_info(url, download=False)
+    #end
+    entries, seen_ids = [], set()
+    for entry in info.get('entries') or []:
+        if not entry:
+            continue
+        #end
+        if entry.get('_type') == 'playlist' or entry.get('ie_key') == 'YoutubeTab':
+            nested = get_flat_playlist_entries(entry['url'], max_depth - 1) if max_depth > 0 and entry.get('url') else []
+        else:
+            nested = [entry]
+        #end
+        for video_entry in nested:
+            if video_entry.get('id') and video_entry['id'] not in seen_ids:
+                seen_ids.add(video_entry['id'])
+                entries.append(video_entry)
+            #end
+        #end
+    #end
+    return entries
+#end
+
 def get_videos_and_playlists_from_Channel(channel_url: str) -> Set[str]:
     channel = Channel(channel_url)
     return set(channel.video_urls + channel.playlist_urls)
@@ -151,7 +191,7 @@ def get_html_content(url: str, timeout: int = 10) -> Optional[Union[str, Excepti
         otherwise an exception object describing the error.
     """
     try:
-        response = requests.get(url, timeout=timeout)
+        response = http_client.get(url, timeout=timeout)
         response.raise_for_status()
         return response.text
     except requests.exceptions.RequestException as e:
@@ -164,7 +204,7 @@ def get_html_content(url: str, timeout: int = 10) -> Optional[Union[str, Excepti
 
 def extract_video_urls_from_page(youtube_url):#TODO doesn't work 
     # Send a GET request to the YouTube page
-    response = requests.get(youtube_url)
+    response = http_client.get(youtube_url)
 
     # Parse the HTML content of the page using BeautifulSoup
     soup = BeautifulSoup(response.content, 'html.parser')
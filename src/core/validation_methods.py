@@ -94,4 +94,15 @@ def is_valid_youtube_channel(url: str) -> bool:
     pattern = r'(https?://)?(www\.)?youtube\.com/(channel/UC[\w-]{22}|c/[\w-]+|@[\w-]+)'
     match = re.match(pattern, url)
     return match is not None
-#end
\ No newline at end of file
+#end
+
+def extract_youtube_video_id(url: str):
+    # Extract the 11 character video ID from the common YouTube video URL formats:
+    # https://www.youtube.com/watch?v=ID, https://youtu.be/ID, https://www.youtube.com/shorts/ID, .../embed/ID, .../v/ID
+    if not isinstance(url, str):
+        return None
+    #end
+    pattern = r'(?:[?&]v=|youtu\.be/|/shorts/|/embed/|/v/|/live/)([a-zA-Z0-9_-]{11})(?![a-zA-Z0-9_-])'
+    match = re.search(pattern, url)
+    return match.group(1) if match else None
+#end
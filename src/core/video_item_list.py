@@ -0,0 +1,383 @@
+"""
+YouTube Video Downloader
+Copyright (C) 2023 JessyJP
+
+Author: JessyJP
+Year: 2024
+Description: This is a python source script part of the YouTube Video Downloader Suit.
+
+MIT License
+
+Copyright (c) 2024 JessyJP
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+# Imports
+import uuid
+import heapq
+import itertools
+import threading
+from collections import OrderedDict, deque
+from contextlib import contextmanager
+from typing import Iterator, List, Optional, Tuple
+
+## ================================= Indexed video item list class =================================
+class VideoItemList:
+    """
+    Thread-safe ordered store of the video info items indexed by video_id and by URL.
+
+    Lookup, membership, insertion and removal are O(1). A video_id can only be stored once,
+    so duplicates are rejected on insertion. The insertion order is kept by the underlying dict.
+    Positional access (indexing, index()) uses an ordered snapshot which is rebuilt lazily after a change,
+    so loops over positions without changes in between are O(1) per access.
+    It supports the list operations used across the code base (len, iteration, indexing, index, append, remove, pop).
+
+    The writes are serialised per video_id by a striped lock, so the analysis workers inserting different
+    videos do not contend on one global lock. The single dict operations are atomic on their own.
+
+    A change log keeps the version of the last insertion, change (see touch()) or removal of every video_id,
+    ordered by version, so get_changes_since() costs the number of changes since a version and not the list size.
+    The versions come from a lock-free counter and every stripe keeps the log of its video_ids, so the writers
+    only hold their stripe. The readers of the log (get_change_version(), get_changes_since()) hold all the
+    stripes briefly instead, so no version is visible before its change is logged.
+    """
+    NUMBER_OF_STRIPES = 64
+    MAX_TOMBSTONES = 10000# Removals kept in the change log, a client behind the oldest dropped one reloads in full
+
+    def __init__(self, items=None):
+        self._by_video_id = {}# video_id -> item, in insertion order
+        self._by_url = {}# url -> video_id
+        self._urls_by_video_id = {}# video_id -> urls, used to drop the URL entries on removal
+        self._urls_in_progress = {}# url -> claim token, the URLs which are being analysed right now
+        self._claim_tokens = itertools.count(1)
+        self._stripes = [threading.Lock() for _ in range(self.NUMBER_OF_STRIPES)]
+        # Every change takes a new version. The cached snapshot is only used while its version is current
+        self._versions = itertools.count(1)
+        self._version = 0
+        self._cache = (-1, None, None)# (version, snapshot, positions)
+        # Change log per stripe: video_id -> (version, removed), the latest change last
+        self.list_id = uuid.uuid4().hex[:8]# Tells the versions of this list from the ones of another list (e.g. before a restart)
+        self._change_logs = [OrderedDict() for _ in range(self.NUMBER_OF_STRIPES)]
+        self._stripe_versions = [0] * self.NUMBER_OF_STRIPES# The latest logged version per stripe
+        self._tombstones = [0] * self.NUMBER_OF_STRIPES
+        self._removals = [deque() for _ in range(self.NUMBER_OF_STRIPES)]# (version, video_id) of the removals, oldest first
+        self._cleared_version = 0
+        self._min_since = 0# Versions older than this cannot be served as a delta
+        self._compact_lock = threading.Lock()
+        for item in items or []:
+            self.append(item)
+        #end
+
+    # ----- Item keys -----
+    @staticmethod
+    def get_item_urls(item) -> List[str]:
+        # The yt-dlp items have "url" and the pytube items have "watch_url"
+        urls = [getattr(item, "url", None), getattr(item, "watch_url", None)]
+        return [url for url in dict.fromkeys(urls) if url]
+
+    # ----- List interface -----
+    def __len__(self) -> int:
+        return len(self._by_video_id)
+
+    def __iter__(self) -> Iterator:
+        # Iterate over a snapshot so the store can be changed while iterating
+        return iter(self._get_snapshot())
+
+    def __getitem__(self, index):
+        return self._get_snapshot()[index]
+
+    def __contains__(self, item) -> bool:
+        return self._by_video_id.get(getattr(item, "video_id", None)) is item
+
+    def __bool__(self) -> bool:
+        return bool(self._by_video_id)
+
+    def index(self, item) -> int:
+        positions = self._get_positions()
+        if item not in self or item.video_id not in positions:
+            raise ValueError(f"{item} is not in the list")
+        #end
+        return positions[item.video_id]
+
+    def append(self, item) -> bool:
+        """ Insert the item at the end. Returns False (and does not insert) when the video_id is already stored. """
+        return self.add_if_absent(item)
+
+    def add_if_absent(self, item) -> bool:
+        """ Atomic insert if the video_id is absent. Returns True if the item was inserted. """
+        video_id = item.video_id
+        n = self._get_stripe_index(video_id)
+        with self._stripes[n]:
+            if video_id in self._by_video_id:
+                return False
+            #end
+            self._urls_by_video_id[video_id] = []
+            self._by_video_id[video_id] = item
+            for url in self.get_item_urls(item):
+                self._add_url(url, video_id)
+            #end
+            self._invalidate()
+            self._record_change(video_id, n)
+        #end
+        return True
+
+    def add_url_alias(self, url: str, video_id: str):
+        """ Register an extra URL (e.g. the input URL the item was analysed from) for the video_id. """
+        with self._get_stripe(video_id):
+            if video_id in self._by_video_id:
+                self._add_url(url, video_id)
+            #end
+        #end
+
+    def remove(self, item):
+        n = self._get_stripe_index(item.video_id)
+        with self._stripes[n]:
+            if item not in self:
+                raise ValueError(f"{item} is not in the list")
+            #end
+            self._remove_video_id(item.video_id, n)
+        #end
+        # NOTE: after the stripe is released, the compaction holds all of them
+        if sum(self._tombstones) > self.MAX_TOMBSTONES:
+            self._compact_change_log()
+        #end
+
+    def pop(self, index: int = -1):
+        item = self._get_snapshot()[index]
+        self.remove(item)
+        return item
+
+    def clear(self):
+        with self._all_stripes():
+            self._by_video_id.clear()
+            self._by_url.clear()
+            self._urls_by_video_id.clear()
+            self._invalidate()
+            # NOTE: no tombstones, the clients of an earlier version reload in full
+            for change_log in self._change_logs:
+                change_log.clear()
+            #end
+            self._tombstones = [0] * self.NUMBER_OF_STRIPES
+            for removals in self._removals:
+                removals.clear()
+            #end
+            self._cleared_version = self._min_since = next(self._versions)
+        #end
+
+    # ----- Indexed lookup -----
+    def get_by_video_id(self, video_id: str) -> Optional[object]:
+        return self._by_video_id.get(video_id)
+
+    def get_by_url(self, url: str) -> Optional[object]:
+        video_id = self._by_url.get(url)
+        return self._by_video_id.get(video_id) if video_id is not None else None
+
+    def has_video_id(self, video_id: str) -> bool:
+        return video_id in self._by_video_id
+
+    def has_url(self, url: str) -> bool:
+        return url in self._by_url
+
+    def get_urls(self) -> set:
+        return set(self._by_url)
+
+    def get_video_ids(self) -> set:
+        return set(self._by_video_id)
+
+    # ----- Change tracking -----
+    def touch(self, item):
+        """ Record a change of the (mutable) fields of a stored item, which the next delta will include. """
+        n = self._get_stripe_index(item.video_id)
+        with self._stripes[n]:
+            if item in self:
+                self._record_change(item.video_id, n)
+            #end
+        #end
+
+    def get_change_version(self) -> int:
+        """ The list version, it increases with every insertion, removal and touch. Read it before the items it versions. """
+        with self._all_stripes():
+            return max(self._cleared_version, *self._stripe_versions)
+        #end
+
+    def get_changes_since(self, since: int) -> Optional[Tuple[list, List[str], int]]:
+        """
+        The items inserted or changed after the version since (in list order), the video ids removed after it and the
+        current version. Returns None when since cannot be served as a delta (too old or not of this list).
+        """
+        changes = []
+        with self._all_stripes():
+            version = max(self._cleared_version, *self._stripe_versions)
+            if since < self._min_since or since > version:
+                return None
+            #end
+            for change_log in self._change_logs:
+                for video_id in reversed(change_log):
+                    change_version, removed = change_log[video_id]
+                    if change_version <= since:
+                        break
+                    #end
+                    changes.append((change_version, video_id, removed))
+                #end
+            #end
+        #end
+        # The latest change first, the same as a single log
+        changes.sort(reverse=True)
+        changed_ids = [video_id for _, video_id, removed in changes if not removed]
+        removed_ids = [video_id for _, video_id, removed in changes if removed]
+        changed = [item for item in map(self._by_video_id.get, changed_ids) if item is not None]
+        if changed:
+            positions = self._get_positions()
+            changed.sort(key=lambda item: positions.get(item.video_id, len(positions)))
+        #end
+        return changed, removed_ids, version
+
+    # ----- URL claims for the concurrent analysis -----
+    def claim_url(self, url: str) -> Optional[int]:
+        """
+        Atomically claim a URL for analysis. Returns the claim token to release it with, or None if the URL is stored or
+        claimed already (by any caller, also one on the same thread, e.g. the async engine's event loop).
+        """
+        if url in self._by_url:
+            return None
+        #end
+        # NOTE: next() of the counter and dict.setdefault are atomic, only the first caller gets its own token back
+        token = next(self._claim_tokens)
+        return token if self._urls_in_progress.setdefault(url, token) == token else None
+
+    def release_url(self, url: str, token: int):
+        # NOTE: only the holder of the claim can release it, and nobody else replaces a claim, so the check holds until the pop
+        if self._urls_in_progress.get(url) == token:
+            del self._urls_in_progress[url]
+        #end
+
+    # ----- Helper methods -----
+    def _get_stripe_index(self, key: str) -> int:
+        return hash(key) % self.NUMBER_OF_STRIPES
+
+    def _get_stripe(self, key: str) -> threading.Lock:
+        return self._stripes[self._get_stripe_index(key)]
+
+    @contextmanager
+    def _all_stripes(self):
+        # Always in the same order, so two holders of all the stripes cannot deadlock
+        for stripe in self._stripes:
+            stripe.acquire()
+        #end
+        try:
+            yield
+        finally:
+            for stripe in self._stripes:
+                stripe.release()
+            #end
+        #end
+
+    def _add_url(self, url: str, video_id: str):
+        # NOTE: called with the stripe of the video_id held
+        if self._by_url.setdefault(url, video_id) == video_id:
+            self._urls_by_video_id[video_id].append(url)
+        #end
+
+    def _remove_video_id(self, video_id: str, n: int):
+        # NOTE: called with the stripe n of the video_id held
+        del self._by_video_id[video_id]
+        for url in self._urls_by_video_id.pop(video_id, []):
+            self._by_url.pop(url, None)
+        #end
+        self._invalidate()
+        self._record_change(video_id, n, removed=True)
+
+    def _get_snapshot(self) -> list:
+        version, snapshot, _ = self._cache
+        if version != self._version or snapshot is None:
+            version = self._version# Read the version before the copy, so a concurrent change is never cached as current
+            snapshot = list(self._by_video_id.values())
+            self._cache = (version, snapshot, None)
+        #end
+        return snapshot
+
+    def _get_positions(self) -> dict:
+        version, snapshot, positions = self._cache
+        if version != self._version or positions is None:
+            version = self._version
+            snapshot = list(self._by_video_id.values())
+            positions = {item.video_id: n for n, item in enumerate(snapshot)}
+            self._cache = (version, snapshot, positions)
+        #end
+        return positions
+
+    def _invalidate(self):
+        self._version = next(self._versions)
+
+    def _record_change(self, video_id: str, n: int, removed: bool = False):
+        # NOTE: called with the stripe n of the video_id held. The version is taken under the stripe, so the log
+        # of the stripe stays ordered by version and a reader (which holds all the stripes) never sees a version
+        # before its change is logged.
+        change_log = self._change_logs[n]
+        version = next(self._versions)# NOTE: atomic
+        if change_log.get(video_id, (0, False))[1]:
+            self._tombstones[n] -= 1
+        #end
+        change_log[video_id] = (version, removed)
+        change_log.move_to_end(video_id)
+        self._stripe_versions[n] = version
+        if removed:
+            self._tombstones[n] += 1
+            self._removals[n].append((version, video_id))
+        #end
+
+    def _compact_change_log(self):
+        # Drop the oldest log entries until half of MAX_TOMBSTONES removals remain, so the compaction (which holds all
+        # the stripes) runs once per MAX_TOMBSTONES / 2 removals. A client from before them has to reload in full.
+        with self._compact_lock, self._all_stripes():
+            n_tombstones = sum(self._tombstones)
+            if n_tombstones <= self.MAX_TOMBSTONES:
+                return
+            #end
+            # The removals are ordered by version per stripe, so their merge is walked up to the cutoff removal only.
+            # NOTE: a removal whose video_id was added again since is not a tombstone anymore, hence it is not counted.
+            n_dropped, cutoff = n_tombstones - self.MAX_TOMBSTONES // 2, 0
+            for version, video_id in heapq.merge(*self._removals):
+                if self._change_logs[self._get_stripe_index(video_id)].get(video_id) == (version, True):
+                    n_dropped -= 1
+                    if n_dropped == 0:
+                        cutoff = version
+                        break
+                    #end
+                #end
+            #end
+            for n, change_log in enumerate(self._change_logs):
+                while change_log:
+                    video_id, (version, removed) = change_log.popitem(last=False)
+                    if version > cutoff:
+                        # The first entry to keep, back to the front (the log is short after a compaction)
+                        change_log[video_id] = (version, removed)
+                        change_log.move_to_end(video_id, last=False)
+                        break
+                    #end
+                    self._tombstones[n] -= removed
+                #end
+                removals = self._removals[n]
+                while removals and removals[0][0] <= cutoff:
+                    removals.popleft()
+                #end
+            #end
+            self._min_since = max(self._min_since, cutoff)
+        #end
+#end
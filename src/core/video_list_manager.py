@@ -30,17 +30,28 @@ SOFTWARE.
 """
 
 import threading
-from typing import List, Union
+from typing import List, Tuple, Union
 from core.download_options import DownloadProgress
 from core.pytube_handler import LimitsAndPriority, VideoInfo
+from core.yt_dlp_handler import VideoInfo as VideoInfoYTDLP
 import shutil
 from time import sleep
-import warnings
 
-from core.custom_thread import CustomThread # TODO:NOTE could be named "CustomThreading" too
+from core.video_item_list import VideoItemList
+from core.video_list_query import VideoListQuery
+from core.custom_thread import CustomThread, CustomThreadPool, TaskGroup # TODO:NOTE could be named "CustomThreading" too
+from core.download_scheduler import DownloadScheduler, DEFAULT_DOWNLOAD_WORKERS, DEFAULT_MUX_WORKERS, DEFAULT_ANALYSIS_WORKERS
+from core.download_scheduler import DEFAULT_STREAMS_PER_HOST, stream_host_limiter
+from core.post_download_mux import get_max_mux_workers, set_max_mux_workers, set_mux_tool, MUX_TOOL_AUTO, MuxBatch, get_mux_stage
+from core.limiters import bandwidth_limiter
+from core.metadata_cache import CACHE_METADATA, CACHE_MODES
+from core.output_index import OutputIndex, get_output_index
+from core.job_journal import JobJournal, get_journal, get_partial_bytes, STAGE_QUEUED, STAGE_DONE, STAGE_ERROR
 from core.validation_methods import checkForValidYoutubeURLs, is_valid_youtube_channel, is_valid_youtube_playlist
 from core.url_text_processor import extract_URL_list_from_text, get_html_content, get_video_urls_from_playlist, get_videos_and_playlists_from_Channel
-from core.url_text_processor import get_video_info_item_from_url
+from core.url_text_processor import get_video_info_item_from_url, get_flat_playlist_entries
+from core.async_analysis import AsyncAnalysisEngine
+from core.channel_sync import get_channel_sync_state, list_new_entries
 
 # TODO: some functions could be expanded with a union of various video info classes if other library interfaces are implemented
 class VideoListManager:
@@ -48,9 +59,108 @@ class VideoListManager:
     diagnostics_thread = None;# Static variable
     # Class constructor
     def __init__(self):        
-        # Video Info list
-        self.infoList: List[VideoInfo] = []
+        # Video Info list, indexed by video_id and URL
+        self.infoList: VideoItemList = VideoItemList()
+        # Sorted/filtered/paginated views of the list, the sort indexes follow the list's change log
+        self.list_query = VideoListQuery(self.infoList)
         self.diagnostic_refresh_interval = 0.25# TODO a moderate value to be adjusted
+        # Global cap of concurrent URL analysis tasks (shared by the recursive playlist/channel/page analysis)
+        self.max_analysis_workers = DEFAULT_ANALYSIS_WORKERS
+        # Run the URL import on the asyncio analysis engine instead of the thread pool
+        self.use_async_analysis = False
+        # List the playlists and channels with the yt-dlp flat extraction (stub items first, enriched in batches afterwards)
+        self.use_flat_playlist_extraction = True
+        self.enrich_batch_size = 25
+        # Worker limits for the multithreaded download (network fetch) and mux (CPU bound) stages
+        self.max_download_workers = DEFAULT_DOWNLOAD_WORKERS
+        self.max_mux_workers = DEFAULT_MUX_WORKERS# NOTE: the mux slots and the mux stage of the process
+        # Cap of the concurrent stream fetches per media host (the audio and video of an item are fetched at the same time)
+        self.max_streams_per_host = DEFAULT_STREAMS_PER_HOST
+        # Checkpoint the downloads to the job journal of the output directory and keep the partial downloads of
+        # failed items, so that an interrupted batch can be resumed (see resume_from_journal). Opt-in, the CLI
+        # turns it on for its --resume and the GUIs by the resume_downloads setting.
+        self.resume_downloads = False
+        # Skip the outputs which already exist in the output directory (by its output index)
+        self.skip_existing_outputs = True
+        # NOTE: the settings below configure process globals (shared by the concurrent download jobs), so their
+        # setters apply them once when they are changed and never per download batch
+        # Stream the yt-dlp downloads straight into ffmpeg instead of staging them in the temp dir
+        self.stream_mux = False
+        # Fetch the audio and video of an item concurrently, else one after the other (a single yt-dlp pass for the combined-only downloads)
+        self.concurrent_streams = True
+        # Metadata cache mode of the analysis: off, metadata (the stale formats are re-resolved before the download) or fresh
+        self.metadata_cache_mode = CACHE_METADATA
+        # Mux tool (auto, ffmpeg or mkvmerge) and an optional mkvmerge directory, the available tools are probed when they are set
+        self._merge_tool = MUX_TOOL_AUTO
+        self.mkvmerge_dir = None
+        # Hand the muxes of the multithreaded download off to the process pool mux stage, instead of muxing in the download threads
+        self.use_mux_stage = True
+        # Bandwidth limits in bytes per second (0 = unlimited): the global cap, shared fairly by the running items, and the per item cap
+        self.max_download_rate = 0
+        self.max_job_rate = 0
+
+    ## Process wide download settings (properties, their setters apply the globals)
+    @property
+    def stream_mux(self) -> bool:
+        return VideoInfoYTDLP.stream_mux
+
+    @stream_mux.setter
+    def stream_mux(self, stream_mux: bool):
+        VideoInfoYTDLP.stream_mux = bool(stream_mux)
+
+    @property
+    def concurrent_streams(self) -> bool:
+        return VideoInfoYTDLP.concurrent_streams
+
+    @concurrent_streams.setter
+    def concurrent_streams(self, concurrent_streams: bool):
+        VideoInfoYTDLP.concurrent_streams = bool(concurrent_streams)
+
+    @property
+    def metadata_cache_mode(self) -> str:
+        return VideoInfoYTDLP.cache_mode
+
+    @metadata_cache_mode.setter
+    def metadata_cache_mode(self, cache_mode: str):
+        if cache_mode not in CACHE_MODES:
+            raise ValueError(f"Unknown metadata cache mode: {cache_mode}")
+        #end
+        VideoInfoYTDLP.cache_mode = cache_mode
+
+    @property
+    def merge_tool(self) -> str:
+        return self._merge_tool
+
+    @merge_tool.setter
+    def merge_tool(self, merge_tool: str):
+        set_mux_tool(merge_tool, self.mkvmerge_dir)
+        self._merge_tool = merge_tool
+
+    @property
+    def mkvmerge_dir(self) -> str:
+        return self._mkvmerge_dir
+
+    @mkvmerge_dir.setter
+    def mkvmerge_dir(self, mkvmerge_dir: str):
+        set_mux_tool(self._merge_tool, mkvmerge_dir)
+        self._mkvmerge_dir = mkvmerge_dir
+
+    @property
+    def max_streams_per_host(self) -> int:
+        return stream_host_limiter.max_per_host
+
+    @max_streams_per_host.setter
+    def max_streams_per_host(self, max_streams_per_host: int):
+        # NOTE: the fetches already running keep their connections, a lower cap holds the new ones until enough are released
+        stream_host_limiter.set_max_per_host(max_streams_per_host)
+
+    @property
+    def max_mux_workers(self) -> int:
+        return get_max_mux_workers()
+
+    @max_mux_workers.setter
+    def max_mux_workers(self, max_mux_workers: int):
+        set_max_mux_workers(max_mux_workers)
 
     def getVideoList(self):
         return self.infoList;
@@ -62,14 +172,14 @@ class VideoListManager:
         index = self.infoList.index(video_info)
         return index
     
-    def addItem(self, video_info: VideoInfo):
-        self.infoList.append(video_info)
+    def addItem(self, video_info: VideoInfo) -> bool:
+        # Returns False if an item with the same video_id is already in the list
+        return self.infoList.append(video_info)
 
     def removeItem(self, video_info: VideoInfo):        
         if video_info is not None:
             # Remove the VideoInfo object from the infoList
-            index_to_remove = self.infoList.index(video_info)
-            self.infoList.pop(index_to_remove)
+            self.infoList.remove(video_info)
 
     # This method is used to locate a video info from a list
     def getItemByIndexOrVideoID(self, video_id: str, index: int = -1) -> Union[VideoInfo, None]:
@@ -78,23 +188,15 @@ class VideoListManager:
             return self.infoList[index]
         #end
 
-        # Warning if the first check fails
-        warnings.warn(f"Initial search by index {index} failed, performing exhaustive search.", RuntimeWarning)
-
-        # If the index is not valid or the video_id doesn't match, search exhaustively
-        for idx, video_info in enumerate(self.infoList):
-            if video_info.video_id == video_id:
-                warnings.warn(f"Found video at index {idx} instead of {index}.", RuntimeWarning)
-                return video_info
-            #end
-        #end
+        # Otherwise use the video_id index. If no match is found, return None
+        return self.infoList.get_by_video_id(video_id)
+    #end
 
-        # Warning if the first check fails
-        warnings.warn("Initial search by index failed, performing exhaustive search.", RuntimeWarning)
+    def containsURL(self, url: str) -> bool:
+        return self.infoList.has_url(url)
 
-        # If no match is found, return None
-        return None
-    #end
+    def containsVideoID(self, video_id: str) -> bool:
+        return self.infoList.has_video_id(video_id)
 
     def getItemProp(index,property):
         pass
@@ -106,40 +208,23 @@ class VideoListManager:
 
     # Get the current URLs in the tree view and video IDs
     def getURL_videoIDList(self):
-        current_url_entries = set()
-        current_video_ids = set()
-        for item in self.getVideoList():
-            current_url_entries.add(item.watch_url)
-            current_video_ids.add(item.video_id)
-        #end
-        return current_url_entries, current_video_ids
+        return self.infoList.get_urls(), self.infoList.get_video_ids()
     #end
 
     def remove_duplicate_items(self):
-        # Get the current video IDs in the tree view
-        current_video_ids = set()
-        for item in self.getVideoList():
-            current_video_ids.add(item.video_id)
-        #end
-        
-        # Check each row in the tree view and remove duplicates
-        for item in self.getVideoList():
-            video_id = item.video_id
-            if video_id in current_video_ids:
-                current_video_ids.remove(video_id)
-            else:
-                self.removeItem(item)
-            #end
-        #end
+        # NOTE: the indexed list rejects duplicates on insertion, so the list itself never has to be swept.
+        # The method remains as an insertion point for the UI containers which keep their own rows.
+        pass
     #end
 
     ## --------------------------- URL/Text Analysis methods ----------------------------------------
     
     # Process Text and URLs
     def import_valid_Youtube_videos_from_textOrURL_list(self, text, use_analysis_multithreading, recursiveCheckOfURLcontent_mode=0):
-
-        # Make sure to clean up the download list and simplify it from duplicates
-        self.remove_duplicate_items()
+        # The async engine handles the recursion itself, so only the top level is redirected
+        if self.use_async_analysis and recursiveCheckOfURLcontent_mode == 0:
+            return self.import_valid_Youtube_videos_async(text)
+        #end
 
         numYT_vidMSG = "- YouTube Video URL(s)"
         # Check the recursion level and check the input type. At the end the output should be a URL list.
@@ -161,7 +246,12 @@ class VideoListManager:
         URLs_toCheck = set(URLs_toCheck)
         N = len(URLs_toCheck)
         n = 0
-        analysisThreads = []# This is used in the multithreading case only
+        if use_analysis_multithreading:
+            # NOTE: the recursive calls get the same shared pool, hence the cap is global.
+            # The top level tasks form a group, which the tasks they submit join (by the pool thread) as well.
+            analysisPool = CustomThreadPool.get_shared(self.max_analysis_workers)
+            analysis_group = TaskGroup() if recursiveCheckOfURLcontent_mode == 0 else None
+        #end
         self.setUiDispStatus(f"{dispPrefix} found {N}")
         self.update_progressbar(n, N, recursiveCheckOfURLcontent_mode)
 
@@ -170,9 +260,7 @@ class VideoListManager:
             # Run in Single thread or multithread mode
             if use_analysis_multithreading: 
                 self.updateUiDistStatus_in_multithread_mode(self.diagnostic_refresh_interval);               
-                t = CustomThread(target=self.process_url, args=(url, use_analysis_multithreading, recursiveCheckOfURLcontent_mode))
-                t.start()
-                analysisThreads.append(t)                
+                analysisPool.submit(self.process_url, args=(url, use_analysis_multithreading, recursiveCheckOfURLcontent_mode), group=analysis_group)
             else:
                 n=n+1;
                 self.setUiDispStatus(f"{dispPrefix} {n} of {N} {numYT_vidMSG} {len(self.getVideoList())} ")
@@ -181,18 +269,16 @@ class VideoListManager:
             #end
         #end
 
-        # In the multithread case wait for the analysis threads to first join
-        if use_analysis_multithreading:
-            # Wait for all threads to complete
-            for t in analysisThreads:
-                t.join()
-            #end
+        # In the multithread case wait for the analysis tasks to complete.
+        # The recursive calls run inside a pool worker, and waiting there for their sub-tasks could exhaust the
+        # pool and deadlock. Instead, only the top level waits for its group, which includes all the sub-tasks
+        # (and not the tasks of the other imports sharing the pool).
+        if use_analysis_multithreading and recursiveCheckOfURLcontent_mode == 0:
+            analysisPool.wait_for_group(analysis_group)
         #end
 
         # To finish up the analysis
         if recursiveCheckOfURLcontent_mode == 0:  # This checks the recursion mode
-            # Make sure to clean up the download list and simplify it from duplicates
-            self.remove_duplicate_items()
             # Update the UI elements
             self.setUiDispStatus("URL import and Analysis is Complete!")  # Clear the diagnostic output
             # self.setUiDispStatus("");# Clear the diagnostic output #TODO: select one
@@ -200,46 +286,213 @@ class VideoListManager:
         #end
     #end
 
+    def import_valid_Youtube_videos_async(self, text):
+        # The URLs are coroutines on a single event loop, only the yt-dlp extraction uses (max_analysis_workers) threads
+        dispPrefix = "Import Youtube URLs (async) : Processed URL(s)"
+        URLs_toCheck = extract_URL_list_from_text(text)
+
+        def on_item(url, vi_item):
+            # NOTE: addItem is an atomic insert if the video ID is absent
+            self.addItem(vi_item)
+            self.infoList.add_url_alias(url, vi_item.video_id)
+        #end
+
+        def on_progress(stats):
+            self.setUiDispStatus(f"{dispPrefix} {stats['done']} of {stats['submitted']} (in flight {stats['in_flight']}) "
+                                 f"- YouTube Video URL(s) {len(self.getVideoList())}")
+            self.update_progressbar(stats['done'], stats['submitted'], 0)
+        #end
+
+        engine = AsyncAnalysisEngine(get_video_info_item_from_url, on_item,
+                                     claim_url=self.infoList.claim_url, release_url=self.infoList.release_url,
+                                     on_progress=on_progress, is_cancelled=lambda: getattr(self, "cancel_flag", False),
+                                     max_extract_workers=self.max_analysis_workers)
+        self.setUiDispStatus(f"{dispPrefix} found {len(URLs_toCheck)}")
+        stats = engine.run(URLs_toCheck)
+
+        # To finish up the analysis
+        self.setUiDispStatus("URL import and Analysis is Complete!")
+        self.update_progressbar(stats['done'], stats['done'], 0)
+        return stats
+    #end
+
     def process_url(self, url, use_analysis_multithreading, recursiveCheckOfURLcontent_mode):  
-        # Get the latest list of URL(s) and VideoID(s)
-        current_url_entries, current_video_ids = self.getURL_videoIDList()
-
-        if url not in current_url_entries:
-            vi_item = get_video_info_item_from_url(url)
-
-            if vi_item is None:
-                if recursiveCheckOfURLcontent_mode == 0 or recursiveCheckOfURLcontent_mode == 2:  # This checks the recursion mode
-                    try:
-                        if is_valid_youtube_playlist(url):
-                            recursiveCheckOfURLcontent_mode = 1  # This controls the recursion mode for playlists
-                            urlsFromPlaylist = get_video_urls_from_playlist(url)
-                            self.import_valid_Youtube_videos_from_textOrURL_list(urlsFromPlaylist, use_analysis_multithreading, recursiveCheckOfURLcontent_mode)
-                        elif is_valid_youtube_channel(url):
-                            recursiveCheckOfURLcontent_mode = 2  # This controls the recursion mode for channels
-                            urlsFromChannel = get_videos_and_playlists_from_Channel(url)
-                            self.import_valid_Youtube_videos_from_textOrURL_list(urlsFromChannel, use_analysis_multithreading, recursiveCheckOfURLcontent_mode)
-                        else:
-                            recursiveCheckOfURLcontent_mode = 3  # This controls the recursion mode for other urls
-                            web_page_html = get_html_content(url)
-                            self.import_valid_Youtube_videos_from_textOrURL_list(web_page_html, use_analysis_multithreading, recursiveCheckOfURLcontent_mode)
+        # Atomically claim the URL (O(1)), so the concurrent workers neither analyse nor insert the same URL twice
+        claim = self.infoList.claim_url(url)
+        if claim is not None:
+            try:
+                vi_item = get_video_info_item_from_url(url)
+
+                if vi_item is None:
+                    if recursiveCheckOfURLcontent_mode == 0 or recursiveCheckOfURLcontent_mode == 2:  # This checks the recursion mode
+                        try:
+                            if self.use_flat_playlist_extraction and (is_valid_youtube_playlist(url) or is_valid_youtube_channel(url)) \
+                                    and self.import_flat_playlist(url, use_analysis_multithreading):
+                                pass# Listed in one pass, the stubs are enriched in the background
+                            elif is_valid_youtube_playlist(url):
+                                recursiveCheckOfURLcontent_mode = 1  # This controls the recursion mode for playlists
+                                urlsFromPlaylist = get_video_urls_from_playlist(url)
+                                self.import_valid_Youtube_videos_from_textOrURL_list(urlsFromPlaylist, use_analysis_multithreading, recursiveCheckOfURLcontent_mode)
+                            elif is_valid_youtube_channel(url):
+                                recursiveCheckOfURLcontent_mode = 2  # This controls the recursion mode for channels
+                                urlsFromChannel = get_videos_and_playlists_from_Channel(url)
+                                self.import_valid_Youtube_videos_from_textOrURL_list(urlsFromChannel, use_analysis_multithreading, recursiveCheckOfURLcontent_mode)
+                            else:
+                                recursiveCheckOfURLcontent_mode = 3  # This controls the recursion mode for other urls
+                                web_page_html = get_html_content(url)
+                                self.import_valid_Youtube_videos_from_textOrURL_list(web_page_html, use_analysis_multithreading, recursiveCheckOfURLcontent_mode)
+                            #end
+                        #end
+                        except Exception as e:
+                            print(f"Error: {e}")
+                        finally:
+                            recursiveCheckOfURLcontent_mode = 0  # This controls the recursion mode
                         #end
                     #end
-                    except Exception as e:
-                        print(f"Error: {e}")
-                    finally:
-                        recursiveCheckOfURLcontent_mode = 0  # This controls the recursion mode
-                    #end
+                    return
                 #end
-                return
-            #end
   
-            # Check if the video ID already exists and insert a new row in the table with the URL and an empty checkbox and videoProperties
-            if vi_item.video_id not in current_video_ids:
+                # Insert a new row in the table with the URL and an empty checkbox and videoProperties.
+                # NOTE: addItem is an atomic insert if the video ID is absent
                 self.addItem(vi_item)
+                # Remember the input URL as well, so a re-paste of the same URL is not analysed again
+                self.infoList.add_url_alias(url, vi_item.video_id)
+            finally:
+                self.infoList.release_url(url, claim)
             #end
         #end
     #end
     
+    def import_flat_playlist(self, url: str, use_analysis_multithreading: bool) -> bool:
+        """
+        Playlist/channel fast path: list all the entries with one flat yt-dlp extraction, add them as stub items
+        right away and enrich the stubs in batches. Returns False if the listing failed (the caller falls back).
+        """
+        try:
+            entries = get_flat_playlist_entries(url)
+        except Exception as e:
+            print(f"Flat playlist extraction failed for {url}, fallback to the per video analysis. Error: {e}")
+            return False
+        #end
+        stubs = self.add_flat_entries(entries)
+        self.setUiDispStatus(f"Import Youtube URLs : listed {len(entries)} video(s) of {url}, enriching {len(stubs)} new item(s)")
+        self.enrich_stubs(stubs, use_analysis_multithreading)
+        return True
+    #end
+
+    def add_flat_entries(self, entries: List[dict]) -> List[VideoInfoYTDLP]:
+        # Add the flat entries as stub items, the ones already in the list are skipped
+        stubs = []
+        for entry in entries:
+            stub = VideoInfoYTDLP.from_flat_entry(entry)
+            claim = self.infoList.claim_url(stub.url)
+            if claim is not None:
+                try:
+                    # NOTE: addItem is an atomic insert if the video ID is absent
+                    if self.addItem(stub):
+                        stubs.append(stub)
+                    #end
+                finally:
+                    self.infoList.release_url(stub.url, claim)
+                #end
+            #end
+        #end
+        return stubs
+    #end
+
+    def enrich_stubs(self, stubs: List[VideoInfoYTDLP], use_analysis_multithreading: bool, group: TaskGroup = None):
+        # The batches go to the shared analysis pool, in the given group or else the group of the calling task, which the top level waits for
+        batches = [stubs[n:n + self.enrich_batch_size] for n in range(0, len(stubs), self.enrich_batch_size)]
+        if use_analysis_multithreading:
+            analysisPool = CustomThreadPool.get_shared(self.max_analysis_workers)
+            for batch in batches:
+                analysisPool.submit(self.enrich_items, args=(batch,), group=group)
+            #end
+        else:
+            for batch in batches:
+                self.enrich_items(batch)
+            #end
+        #end
+    #end
+
+    def sync_channels(self, channel_urls: List[str], outputDir: str, use_analysis_multithreading: bool,
+                      max_new_per_channel: int = None) -> Tuple[dict, List[VideoInfoYTDLP]]:
+        """
+        Incremental channel sync: list only the uploads newer than the last sync of each channel (the listing stops
+        at the known content), add them as items and enrich them. The sync state lives in the output directory.
+        The synced uploads which are not downloaded yet (see ChannelSyncState) are added again by each sync.
+        Returns the number of new uploads per channel (None for a failed channel) and the items of the uploads to download.
+        """
+        state = get_channel_sync_state(outputDir)
+        # NOTE: the synced uploads stay pending in the state until their outputs are indexed, without the index they are taken once
+        downloaded_ids = get_output_index(outputDir).get_video_ids() if self.skip_existing_outputs else None
+        new_per_channel = {}
+        all_stubs = []
+        listed_items = []
+        taken_ids = set()
+        for n, channel_url in enumerate(channel_urls):
+            if getattr(self, "cancel_flag", False):
+                break
+            #end
+            try:
+                entries = list_new_entries(channel_url, state.get(channel_url), max_new_per_channel)
+                complete = not max_new_per_channel or len(entries) < max_new_per_channel
+                if downloaded_ids is None:
+                    state.update(channel_url, entries, complete, [entry['id'] for entry in state.get_pending(channel_url)])
+                else:
+                    state.update(channel_url, entries, complete, downloaded_ids)
+                #end
+                state.save()
+            except Exception as e:
+                print(f"Channel sync failed for {channel_url}. Error: {e}")
+                new_per_channel[channel_url] = None
+                continue
+            #end
+            # The new uploads and the earlier ones whose download failed or was interrupted
+            pending = state.get_pending(channel_url)
+            stubs = self.add_flat_entries(pending)
+            all_stubs += stubs
+            # NOTE: an upload whose download failed earlier in this session is still in the list
+            taken_ids.update(stub.video_id for stub in stubs)
+            for entry in pending:
+                item = self.infoList.get_by_video_id(entry['id']) if entry['id'] not in taken_ids else None
+                if item is not None:
+                    listed_items.append(item)
+                    taken_ids.add(item.video_id)
+                #end
+            #end
+            new_per_channel[channel_url] = len(entries)
+            self.setUiDispStatus(f"Channel sync : {n + 1} of {len(channel_urls)} channel(s), {len(all_stubs) + len(listed_items)} upload(s) to download")
+            self.update_progressbar(n + 1, len(channel_urls), 0)
+        #end
+
+        enrich_group = TaskGroup()
+        self.enrich_stubs(all_stubs, use_analysis_multithreading, enrich_group)
+        if use_analysis_multithreading:
+            CustomThreadPool.get_shared(self.max_analysis_workers).wait_for_group(enrich_group)
+        #end
+        self.setUiDispStatus(f"Channel sync is Complete! {len(all_stubs) + len(listed_items)} upload(s) to download from {len(new_per_channel)} channel(s)")
+        return new_per_channel, all_stubs + listed_items
+    #end
+
+    def enrich_items(self, items: List[VideoInfoYTDLP]):
+        # Resolve the full info of a batch of stub items, on the thread's warm YoutubeDL instance
+        for item in items:
+            if getattr(self, "cancel_flag", False):
+                return
+            #end
+            if not item.is_stub():
+                continue
+            #end
+            try:
+                item.enrich()
+                self.updateVideoItemUIFields(item)
+            except Exception as e:
+                item.log(f"Enrichment failed, the formats are resolved before the download. Error: {e}")
+            #end
+        #end
+    #end
+
     def updateUiDistStatus_in_multithread_mode(self, interval=0.01):# TODO: Could add this as a class variable so that it can be controlled
         # TODO: This could be redesigned such that it gets diagnostic message function which takes the relevant numbers. 
         # Only if the thread is not running
@@ -250,6 +503,7 @@ class VideoListManager:
                     f"Active: {stats['active_threads']}    "
                     f"Completed: {stats['successful_threads']}    "
                     f"Errors: {stats['errored_threads']}    "
+                    f"Queued: {stats['queued_threads']}    "
                 )
                 return message
             #end
@@ -281,13 +535,52 @@ class VideoListManager:
 
     ## --------------------------- Video info download ----------------------------------------
 
-    def video_item_process_download(self, item: VideoInfo, limits: LimitsAndPriority, outputdir: str, outputExt: str):
+    def video_item_process_download(self, item: VideoInfo, limits: LimitsAndPriority, outputdir: str, outputExt: str, journal: JobJournal = None,
+                                    output_index: OutputIndex = None, mux_stage: MuxBatch = None):
         # TODO: get local limits here maybe. And if they exists apply them here. If not use global
         
         # Start 
         self.updateVideoItemUIDownloadState(item, DownloadProgress.IN_PROGRESS)
+        pending_mux, error = None, None
+        try:
+            # The item is a job of the bandwidth limiter while it downloads, its share is rebalanced as the other items come and go
+            with bandwidth_limiter.job(item.video_id):
+                pending_mux = item.process_downloads_combine_keep(limits, outputdir, outputExt, journal=journal, output_index=output_index, mux_stage=mux_stage)
+            #end
+        except Exception as e:
+            error = e
+        #end
+        if pending_mux is not None:
+            # Handed off to the mux stage: this thread moves on and the item is completed after its mux
+            pending_mux.add_done_callback(lambda future: self.video_item_complete_download(item, outputdir, journal, output_index, future.exception()))
+            return
+        #end
+        self.video_item_complete_download(item, outputdir, journal, output_index, error)
+    #end
+
+    def video_item_process_download_unless_cancelled(self, item: VideoInfo, limits: LimitsAndPriority, outputdir: str, outputExt: str, journal: JobJournal = None,
+                                                     output_index: OutputIndex = None, mux_stage: MuxBatch = None, cancel_event: threading.Event = None):
+        # The items still in the scheduler queue when the download is cancelled are left untouched, i.e. still pending
+        if cancel_event is not None and cancel_event.is_set():
+            item.log("Download cancelled before it started")
+            return
+        #end
+        self.video_item_process_download(item, limits, outputdir, outputExt, journal, output_index, mux_stage)
+    #end
+
+    def video_item_complete_download(self, item: VideoInfo, outputdir: str, journal: JobJournal = None, output_index: OutputIndex = None, error: Exception = None):
+        # Record the result of a processed item
         try:
-            item.process_downloads_combine_keep(limits, outputdir, outputExt)                
+            if error is not None:
+                raise error
+            #end
+            if output_index is not None:
+                output_index.record_all(item.video_id, item.outputFilepaths)
+            #end
+            if journal is not None:
+                outputs = {symbol: path for symbol, path in item.outputFilepaths.items() if path}
+                journal.checkpoint(item.video_id, stage=STAGE_DONE, outputs=outputs, bytes_done=0)
+            #end
             item.download_status = DownloadProgress.DONE
             item.log("Download and Combine is complete!")
         except Exception as e:
@@ -295,40 +588,102 @@ class VideoListManager:
             item.log(f"File not finished. Error: {e}")
             print(f"File not finished. Error: {e}")
             temp_path = item.make_tmp_dir(outputdir)
-            shutil.rmtree(temp_path)
+            if journal is not None:
+                # Keep the partial streams, a resumed run continues them with range requests
+                journal.checkpoint(item.video_id, stage=STAGE_ERROR, error=str(e), bytes_done=get_partial_bytes(temp_path))
+            else:
+                shutil.rmtree(temp_path)
+            #end
         #end
         # Finish
         self.updateVideoItemUIDownloadState(item)
     #end
 
+    def set_bandwidth_limits(self, max_download_rate: float = None, max_job_rate: float = None) -> dict:
+        """ Change the bandwidth limits (bytes per second, 0 = unlimited, None = keep), effective for the running downloads too. """
+        if max_download_rate is not None:
+            self.max_download_rate = max_download_rate
+        #end
+        if max_job_rate is not None:
+            self.max_job_rate = max_job_rate
+        #end
+        bandwidth_limiter.set_limits(self.max_download_rate, self.max_job_rate)
+        return bandwidth_limiter.get_stats()
+
     ## Process the download entries method
-    def downloadAllVideoItems(self, process_via_multithreading: bool, limits: LimitsAndPriority, outputDir: str, outputExt: str):
-        # Create a list to hold thread objects
-        download_threads = []
+    def downloadAllVideoItems(self, process_via_multithreading: bool, limits: LimitsAndPriority, outputDir: str, outputExt: str,
+                              items: List[VideoInfo] = None, cancel_event: threading.Event = None):
+        # The given items (a download job) or else the whole list
+        items = list(self.infoList) if items is None else items
         # Get lengths
-        n = 0; N = len(self.infoList);
-        # Loop over all entries in the tree view
-        # for info in self.infoList:
-        for n in range(N):
-
-            self.infoList[n].log(f"Process Entry Download {n+1} of {N}: ");
-
-            # Run in Single thread or multithread mode
-            if process_via_multithreading:
-                t = threading.Thread(target=self.video_item_process_download, args=(self.infoList[n], limits, outputDir, outputExt))
-                t.start()
-                download_threads.append(t)            
-            else:
-                self.video_item_process_download(self.infoList[n], limits, outputDir, outputExt)
+        n = 0; N = len(items);
+
+        # Write-ahead: all the jobs are journaled as queued before any of them starts
+        journal = get_journal(outputDir) if self.resume_downloads else None
+        output_index = get_output_index(outputDir) if self.skip_existing_outputs else None
+        if journal is not None:
+            for item in items:
+                if journal.get_stage(item.video_id) in (None, STAGE_DONE):
+                    # NOTE: a new job (or a re-run of a done one) drops the formats pinned by an earlier run
+                    journal.checkpoint(item.video_id, stage=STAGE_QUEUED, url=item.url, download_status=item.download_status,
+                                       audio_format_id=None, video_format_id=None)
+                #end
             #end
         #end
 
         if process_via_multithreading:
-            # Wait for all threads to complete
-            for t in download_threads:
-                t.join()
+            # The worker pool caps the concurrent downloads. The muxes go to the process pool mux stage, or without it the
+            # mux slots cap the concurrent ffmpeg/mkvmerge runs in the download threads (both sized by max_mux_workers).
+            # NOTE: the stage is shared by the concurrent download jobs, each batch only waits for its own muxes
+            mux_stage = get_mux_stage().batch() if self.use_mux_stage else None
+            with DownloadScheduler(self.video_item_process_download_unless_cancelled, max_workers=self.max_download_workers) as scheduler:
+                for n in range(N):
+                    if cancel_event is not None and cancel_event.is_set():
+                        break
+                    #end
+                    items[n].log(f"Process Entry Download {n+1} of {N}: ");
+                    # NOTE: blocks while the scheduler queue is full
+                    scheduler.submit(items[n], limits, outputDir, outputExt, journal, output_index, mux_stage, cancel_event)
+                #end
+            #end# Leaving the context waits for all the queued items to complete
+            if mux_stage is not None:
+                # And the handed off muxes of this batch
+                mux_stage.join()
+            #end
+        else:
+            # Loop over all entries in the tree view
+            for n in range(N):
+                if cancel_event is not None and cancel_event.is_set():
+                    break
+                #end
+                items[n].log(f"Process Entry Download {n+1} of {N}: ");
+                self.video_item_process_download(items[n], limits, outputDir, outputExt, journal, output_index)
             #end
         #end
+    #end
+
+    def resume_from_journal(self, outputDir: str, use_analysis_multithreading: bool = False) -> int:
+        """
+        Re-import the unfinished jobs of the output directory's journal with their download flags.
+        The items are hydrated from the metadata cache where possible and the download then continues
+        the partial streams in the temp dirs. Returns the number of resumed items.
+        """
+        pending = [job for job in get_journal(outputDir).get_pending() if job.get('url')]
+        if not pending:
+            return 0
+        #end
+        self.import_valid_Youtube_videos_from_textOrURL_list(" ".join(job['url'] for job in pending), use_analysis_multithreading)
+        resumed = 0
+        for job in pending:
+            item = self.getItemByIndexOrVideoID(job['video_id'])
+            if item is not None:
+                item.download_status = job.get('download_status', item.download_status)
+                item.log(f"Resumed from the journal at stage {job.get('stage')}")
+                resumed += 1
+            #end
+        #end
+        return resumed
+    #end
 
     def update_download_progress(self):
         # Global GUI update while downloading
@@ -371,9 +726,13 @@ class VideoListManager:
         # Interface provision 
         pass
 
+    def updateVideoItemUIFields(self, videoItem):
+        # Interface provision: the displayed fields of an item changed (e.g. an enriched stub). By default the list version is bumped.
+        self.infoList.touch(videoItem)
+
     # TODO: this function could be renamed and somewhat reimplemented. 
     def updateVideoItemUIDownloadState(self, videoItem, download_status=None):
         # Interface provision but by default: 
-        # Also update the global download progress
-        self.update_download_progress()
-        pass
\ No newline at end of file
+        # Bump the list version of the item and also update the global download progress
+        self.infoList.touch(videoItem)
+        self.update_download_progress()
\ No newline at end of file
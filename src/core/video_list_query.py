@@ -0,0 +1,245 @@
+"""
+YouTube Video Downloader
+Copyright (C) 2023 JessyJP
+
+Author: JessyJP
+Year: 2024
+Description: This is a python source script part of the YouTube Video Downloader Suit.
+
+MIT License
+
+Copyright (c) 2024 JessyJP
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+# Imports
+import threading
+from bisect import bisect_left, insort
+from typing import Callable, List, Optional, Tuple
+from core.download_options import DownloadProgress, MediaSymbols
+from core.video_item_list import VideoItemList
+
+## ================================= Query definitions =================================
+# Sortable fields (the column keys of the item dicts) and how to read them from an item
+SORT_FIELDS = {
+    "download_status": lambda item: item.download_status,
+    "watch_url":       lambda item: getattr(item, "url", None) or getattr(item, "watch_url", None),
+    "title":           lambda item: item.title,
+    "author":          lambda item: item.author,
+    "length":          lambda item: item.length,
+    "description":     lambda item: item.description,
+    "publish_date":    lambda item: item.publish_date,
+    "views":           lambda item: item.views,
+    "rating":          lambda item: item.rating,
+    "video_id":        lambda item: item.video_id,
+    "quality_str":     lambda item: item.quality_str,
+    "download_size":   lambda item: item.video_size_mb,
+}
+SORT_ALIASES = {"video_size_mb": "download_size", "duration": "length", "url": "watch_url"}
+LIST_ORDER = "index"# The insertion order of the list, no index needed
+
+# Status filter values
+STATUS_DONE = "done"
+STATUS_ERROR = "error"
+STATUS_PENDING = "pending"# At least one output is kept
+STATUS_SKIPPED = "skipped"# No output is kept
+
+## ================================= Helper functions =================================
+def get_sort_value(value) -> tuple:
+    """
+    Totally ordered sort key of a field value: the numbers (or numeric text) first in numeric order,
+    then the text case-insensitively, then the missing values. Mixed columns never compare a number with a text.
+    """
+    if value is None or value == "" or value == "None":
+        return (2, 0, "")
+    #end
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return (0, float(value), "")
+    #end
+    text = str(value)
+    try:
+        return (0, float(text), "")
+    except ValueError:
+        return (1, 0, text.casefold())
+    #end
+
+def get_status_category(item) -> str:
+    if item.download_status == DownloadProgress.DONE:
+        return STATUS_DONE
+    #end
+    if item.download_status == DownloadProgress.ERROR:
+        return STATUS_ERROR
+    #end
+    symbols = MediaSymbols.get_all_symbol_values_as_list()
+    return STATUS_PENDING if any(symbol in (item.download_status or "") for symbol in symbols) else STATUS_SKIPPED
+
+def get_sort_field(sort: Optional[str]) -> str:
+    """ Resolve a sort key (or alias), None sorts by the list order. Raises ValueError for an unknown key. """
+    if not sort or sort == LIST_ORDER:
+        return LIST_ORDER
+    #end
+    sort = SORT_ALIASES.get(sort, sort)
+    if sort not in SORT_FIELDS:
+        raise ValueError(f"Unknown sort key: {sort}")
+    #end
+    return sort
+
+def make_item_filter(author: str = None, status: str = None, min_length: float = None, max_length: float = None,
+                     text: str = None) -> Optional[Callable]:
+    """ Build the predicate of the given filters (all must match), None when there is no filter. """
+    checks = []
+    if author:
+        author = author.casefold()
+        checks.append(lambda item: author == str(item.author or "").casefold())
+    #end
+    if status:
+        statuses = set(status.split(","))
+        checks.append(lambda item: get_status_category(item) in statuses)
+    #end
+    if min_length is not None or max_length is not None:
+        low = float("-inf") if min_length is None else min_length
+        high = float("inf") if max_length is None else max_length
+        checks.append(lambda item: isinstance(item.length, (int, float)) and low <= item.length <= high)
+    #end
+    if text:
+        text = text.casefold()
+        checks.append(lambda item: any(text in str(value or "").casefold() for value in (item.title, item.author, item.description, item.video_id)))
+    #end
+    if not checks:
+        return None
+    #end
+    return lambda item: all(check(item) for check in checks)
+
+## ================================= Sort index class =================================
+class SortIndex:
+    """
+    The video ids of a list sorted by one field, kept up to date from the list's change log.
+
+    The first use sorts the whole list, afterwards every refresh only re-positions the items changed since
+    (bisect removal and insertion), so a sorted page of a large list costs the churn and not a sort.
+    """
+    def __init__(self, item_list: VideoItemList, field: str):
+        self.item_list = item_list
+        self.field = field
+        self._read = SORT_FIELDS[field]
+        self._keys = []# Sorted (sort value, video_id)
+        self._key_by_id = {}
+        self._list_id = None
+        self._version = None
+        self._lock = threading.Lock()
+
+    def get_sorted_ids(self, descending: bool = False) -> List[str]:
+        """ The sorted video ids, the items without a value stay last in both directions. """
+        with self._lock:
+            self._refresh()
+            keys = self._keys
+            if descending:
+                missing = bisect_left(keys, ((2,),))# The first key of a missing value
+                keys = keys[:missing][::-1] + keys[missing:]
+            #end
+            return [video_id for _, video_id in keys]
+        #end
+
+    # Helper methods (called with the lock held)
+    def _refresh(self):
+        changes = None
+        if self._list_id == self.item_list.list_id and self._version is not None:
+            changes = self.item_list.get_changes_since(self._version)
+        #end
+        if changes is None:
+            self._rebuild()
+            return
+        #end
+        changed, removed_ids, self._version = changes
+        for video_id in removed_ids:
+            self._remove_key(video_id)
+        #end
+        for item in changed:
+            self._remove_key(item.video_id)
+            key = (get_sort_value(self._read(item)), item.video_id)
+            insort(self._keys, key)
+            self._key_by_id[item.video_id] = key
+        #end
+
+    def _rebuild(self):
+        # NOTE: the version is read before the items, the changes after it are applied by the next refresh
+        self._list_id, self._version = self.item_list.list_id, self.item_list.get_change_version()
+        self._key_by_id = {item.video_id: (get_sort_value(self._read(item)), item.video_id) for item in self.item_list}
+        self._keys = sorted(self._key_by_id.values())
+
+    def _remove_key(self, video_id: str):
+        key = self._key_by_id.pop(video_id, None)
+        if key is not None:
+            position = bisect_left(self._keys, key)
+            if position < len(self._keys) and self._keys[position] == key:
+                del self._keys[position]
+            #end
+        #end
+#end
+
+## ================================= Video list query class =================================
+class VideoListQuery:
+    """ Sorted, filtered and paginated views of a video item list, backed by one sort index per used field. """
+    def __init__(self, item_list: VideoItemList):
+        self.item_list = item_list
+        self._indexes = {}
+        self._lock = threading.Lock()
+
+    def get_sorted_items(self, sort: str = None, descending: bool = False) -> list:
+        """ All the items sorted by the field (the list order by default), the items without a value last. """
+        field = get_sort_field(sort)
+        if field == LIST_ORDER:
+            items = list(self.item_list)
+            return items[::-1] if descending else items
+        #end
+        sorted_ids = self._get_index(field).get_sorted_ids(descending)
+        return [item for item in map(self.item_list.get_by_video_id, sorted_ids) if item is not None]
+
+    def query(self, offset: int = 0, limit: int = None, sort: str = None, descending: bool = False, **filters) -> Tuple[list, int, int]:
+        """
+        One page of the sorted and filtered items. Returns the page, the number of matching items and the list version
+        the page was read at. The filters are the ones of make_item_filter().
+        """
+        version = self.item_list.get_change_version()
+        item_filter = make_item_filter(**filters)
+        field = get_sort_field(sort)
+        offset = max(0, offset)
+        if item_filter is None and field != LIST_ORDER:
+            # Without a filter only the ids of the page are resolved to items
+            sorted_ids = self._get_index(field).get_sorted_ids(descending)
+            end = len(sorted_ids) if limit is None else offset + max(0, limit)
+            page = [item for item in map(self.item_list.get_by_video_id, sorted_ids[offset:end]) if item is not None]
+            return page, len(sorted_ids), version
+        #end
+        items = self.get_sorted_items(field, descending)
+        if item_filter is not None:
+            items = [item for item in items if item_filter(item)]
+        #end
+        end = len(items) if limit is None else offset + max(0, limit)
+        return items[offset:end], len(items), version
+
+    def _get_index(self, field: str) -> SortIndex:
+        with self._lock:
+            index = self._indexes.get(field)
+            if index is None:
+                index = self._indexes[field] = SortIndex(self.item_list, field)
+            #end
+            return index
+        #end
+#end
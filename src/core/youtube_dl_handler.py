@@ -30,7 +30,7 @@ SOFTWARE.
 """
 import youtube_dl
 import os
-import requests
+from core.http_session import http_client
 from typing import Tuple
 
 
@@ -94,7 +94,7 @@ class VideoInfo:
     def download_thumbnail(self, output_dir: str, format="jpg") -> str:
         thumbnail_url = self.thumbnail_url
         thumbnail_filename = os.path.join(output_dir, f"{self.title}_thumbnail.{format}")
-        thumbnail_data = requests.get(thumbnail_url).content
+        thumbnail_data = http_client.get(thumbnail_url).content
         with open(thumbnail_filename, 'wb') as f:
             f.write(thumbnail_data)
         return thumbnail_filename
@@ -30,25 +30,73 @@ SOFTWARE.
 """
 
 import os
+import sys
+import json
+import math
 import subprocess
-from yt_dlp import YoutubeDL
-from typing import Tuple
+from array import array
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Tuple
 import requests
 import shutil
 from datetime import datetime
 from PIL import Image
 from io import BytesIO
 
-from core.validation_methods import check_for_disallowed_filename_chars
+from core.validation_methods import check_for_disallowed_filename_chars, extract_youtube_video_id
 from core.download_options import setOutputKeepsStr
 from core.download_options import *  # TODO: list them one by one
-from core.post_download_mux import combine_via_auto_selection
+from core.post_download_mux import combine_via_auto_selection, combine_via_ffmpeg_pipes, is_streaming_mux_supported
+from core.post_download_mux import get_mux_tool_order, MUX_TOOL_FFMPEG
+from core.yt_dlp_provider import ydl_provider
+from core.http_session import http_client
+from core.download_scheduler import stream_host_limiter
+from core.metadata_cache import metadata_cache, CACHE_OFF, CACHE_METADATA, CACHE_FRESH
+from core.job_journal import STAGE_DOWNLOADING, STAGE_MUXING, get_partial_bytes
+from core.segmented_download import SegmentedDownloader, is_segmentable, DEFAULT_MIN_SEGMENTED_SIZE
 
-from core.limiters import LimitsAndPriority, propToInt
+from core.limiters import LimitsAndPriority, propToInt, bandwidth_limiter
 
 
+# Long-lived threads for the concurrent audio fetches, so their thread-local YoutubeDL instances are reused
+stream_fetch_pool = ThreadPoolExecutor(max_workers=32, thread_name_prefix="StreamFetch")
+
 ## ================================= Video Info class =================================
 class VideoInfo:
+    # Metadata cache mode, see core.metadata_cache
+    cache_mode = CACHE_METADATA
+    # Compact mode: the full info dict is dropped after the analysis and only the displayed fields and a compact
+    # format table are kept. The full formats are re-resolved for the duration of process_downloads_combine_keep.
+    compact = True
+    # Download options for resuming: the streams are written to .part files in the temp dir and an interrupted
+    # download continues from the bytes on disk with an HTTP range request instead of restarting from byte zero
+    resume_opts = {'continuedl': True, 'nopart': False}
+    # Streaming mux: yt-dlp writes both streams into pipes which ffmpeg muxes (-c copy) as the data arrives,
+    # so nothing is staged in the temp dir and the mux overlaps with the download (POSIX, .mkv output only)
+    stream_mux = False
+    # Fetch the audio and the video stream of an item at the same time (capped per host by the stream_host_limiter).
+    # Off, they are fetched one after the other, and a combined-only download is a single yt-dlp pass (see can_single_pass)
+    concurrent_streams = True
+    # Parallel range connections per large stream (1 = off), the LimitsAndPriority.download_segments overrides it per job
+    download_segments = 1
+    segmented_min_size = DEFAULT_MIN_SEGMENTED_SIZE
+
+    # Fixed attribute set, so the (many) list items do not carry a per-instance __dict__
+    __slots__ = (
+        'url', 'download_status', 'inputOrderIndex', 'logger', 'formats_stale', 'info',
+        'title', 'author', 'length', 'description', 'publish_date', 'views', 'thumbnail_url', 'rating', 'video_id',
+        'quality_str', 'audio_bitrate', 'video_resolution', 'video_fps', 'video_size_bytes', 'video_size_mb',
+        'base_output_name', 'outputFilepaths', 'creationTimestamp', 'format_ids', 'format_table',
+        '_revision', '_serialized',
+    )
+    # The displayed fields (see as_tuple), setting any of them drops the cached serialisation of the item
+    SERIALIZED_FIELDS = frozenset((
+        'download_status', 'url', 'title', 'author', 'length', 'description', 'publish_date', 'views',
+        'thumbnail_url', 'rating', 'video_id', 'quality_str', 'video_size_mb',
+    ))
+    # Columns of the compact format table, stored as a flat array of doubles (NaN for missing values)
+    FORMAT_TABLE_COLUMNS = ('abr', 'height', 'fps', 'filesize', 'has_audio', 'has_video')
+
     def __init__(
         self,
         url: str,
@@ -59,46 +107,189 @@ class VideoInfo:
         self.download_status = download_status
         self.inputOrderIndex = inputOrderIndex
         self.logger = []
+        # Set when the item is hydrated from the cache with formats that may have expired
+        self.formats_stale = False
+
+        info_dict = self.get_cached_info(extract_youtube_video_id(url))
+        if info_dict is None:
+            info_dict = self.extract_info()
+        #end
+        self.set_info(info_dict)
+
+    @classmethod
+    def from_info_dict(cls, url: str, info_dict: dict, download_status: str = setOutputKeepsStr(combined=True), inputOrderIndex: int = None):
+        """ Create an item from an already extracted info dict without touching the network. """
+        item = cls.__new__(cls)
+        item.url = url
+        item.download_status = download_status
+        item.inputOrderIndex = inputOrderIndex
+        item.logger = []
+        item.formats_stale = False
+        item.set_info(info_dict)
+        return item
+
+    @classmethod
+    def from_flat_entry(cls, entry: dict, download_status: str = setOutputKeepsStr(combined=True), inputOrderIndex: int = None):
+        """ Create a stub item from a flat playlist entry. The formats are resolved later by enrich() or before the download. """
+        url = entry.get('url') or f"https://www.youtube.com/watch?v={entry['id']}"
+        thumbnails = entry.get('thumbnails') or [{}]
+        info_dict = {
+            'id': entry['id'],
+            'title': entry.get('title') or entry['id'],
+            'uploader': entry.get('uploader') or entry.get('channel'),
+            'duration': entry.get('duration'),
+            'description': entry.get('description'),
+            'upload_date': entry.get('upload_date'),
+            'view_count': entry.get('view_count'),
+            'thumbnail': entry.get('thumbnail') or thumbnails[-1].get('url'),
+            'formats': [],
+        }
+        item = cls.from_info_dict(url, info_dict, download_status, inputOrderIndex)
+        item.formats_stale = True
+        return item
+
+    def is_stub(self) -> bool:
+        """ Check if the item was listed from a flat entry and is not enriched yet. """
+        return not self.format_ids
+
+    def enrich(self):
+        """ Replace the flat entry fields of a stub with the full info (from the metadata cache if possible). """
+        creation_timestamp = self.creationTimestamp
+        info_dict = self.get_cached_info(self.video_id)
+        if info_dict is None:
+            info_dict = self.extract_info()
+        #end
+        self.set_info(info_dict)
+        # NOTE: the listing order stays the sort order
+        self.creationTimestamp = creation_timestamp
+        self.log("Enriched from the flat playlist entry")
+
+    def get_cached_info(self, video_id):
+        """ Get the info dict from the metadata cache without touching the network. """
+        if self.cache_mode == CACHE_OFF or not video_id:
+            return None
+        cached = metadata_cache.get(video_id)
+        if cached is None:
+            return None
+        info_dict, formats_fresh = cached
+        if not formats_fresh and self.cache_mode == CACHE_FRESH:
+            return None
+        self.formats_stale = not formats_fresh
+        self.log(f"Video info loaded from the metadata cache (formats fresh: {formats_fresh})")
+        return info_dict
 
+    def extract_info(self) -> dict:
+        """ Extract the info dict via yt-dlp and store it in the metadata cache. """
         ydl_opts = {'format': 'bestaudio+bestvideo/best'}
-        with YoutubeDL(ydl_opts) as ydl:
+        with ydl_provider.borrow(ydl_opts) as ydl:
             info_dict = ydl.extract_info(self.url, download=False)
-            self.info = info_dict
-            self.title = info_dict.get('title', None)
-            self.author = info_dict.get('uploader', None)
-            self.length = info_dict.get('duration', None)
-            self.description = info_dict.get('description', None)
-            self.publish_date = info_dict.get('upload_date', None)
-            self.views = info_dict.get('view_count', None)
-            self.thumbnail_url = info_dict.get('thumbnail', None)
-            self.rating = info_dict.get('average_rating', None)
-            self.video_id = info_dict.get('id', None)
-
-            # Extract video and audio information
-            audio_stream = self.get_best_audio_stream(info_dict['formats'])
-            video_stream = self.get_best_video_stream(info_dict['formats'])
-
-            # Quality string
-            if audio_stream and video_stream:
-                self.quality_str = f"{video_stream['height']}p@{video_stream.get('fps', 0)}fps/{audio_stream['abr']}kbps"
-            else:
-                self.quality_str = "Unknown"
-
-            self.audio_bitrate = audio_stream.get('abr', 0) if audio_stream else None
-            self.video_resolution = video_stream.get('height', None) if video_stream else None
-            self.video_fps = video_stream.get('fps', 0) if video_stream else None
-
-            # Filesize
-            self.video_size_bytes = (video_stream.get('filesize', 0) or 0) + (audio_stream.get('filesize', 0) or 0) if video_stream and audio_stream else 0
-            self.video_size_mb = round(self.video_size_bytes / (1024 * 1024), 2) if self.video_size_bytes else 0
-
-            self.base_output_name = check_for_disallowed_filename_chars(self.title)
-
-            # Output filepaths dictionary which stores the paths for each download symbol
-            self.outputFilepaths = {symbol: None for symbol in MediaSymbols.get_all_symbol_values_as_list()}
-            # self.outputFilepaths = SimpleNamespace(**self.outputFilepaths)
-            # Creation timestamp, which can be used for sorting
-            self.creationTimestamp = datetime.now()
+        if self.cache_mode != CACHE_OFF:
+            try:
+                metadata_cache.put(info_dict)
+            except Exception as e:
+                self.log(f"Error storing the video info in the metadata cache: {e}")
+        self.formats_stale = False
+        return info_dict
+
+    def refresh_formats(self):
+        """ Re-resolve the full formats, which are either dropped (compact mode) or may have gone stale since the item was cached. """
+        info_dict = self.extract_info()
+        self.info = info_dict
+        self.set_format_table(info_dict['formats'])
+        self.log("Formats refreshed")
+
+    def release_formats(self):
+        """ Drop the full info dict in compact mode, the compact format table remains. """
+        if self.compact:
+            self.info = None
+        #end
+
+    def set_format_table(self, formats):
+        """ Store the fields used by the stream selection in a compact table. """
+        self.format_ids = tuple(str(f.get('format_id')) for f in formats)
+        table = array('d')
+        for f in formats:
+            table.extend((
+                _float_or_nan(f.get('abr')),
+                _float_or_nan(f.get('height')),
+                _float_or_nan(f.get('fps')),
+                _float_or_nan(f.get('filesize')),
+                0.0 if f.get('acodec') == 'none' else 1.0,
+                0.0 if f.get('vcodec') == 'none' else 1.0,
+            ))
+        #end
+        self.format_table = table
+
+    def get_formats(self) -> list:
+        """ Get the full formats if resolved, otherwise the formats rebuilt from the compact table. """
+        if self.info is not None:
+            return self.info['formats']
+        #end
+        stride = len(self.FORMAT_TABLE_COLUMNS)
+        formats = []
+        for n, format_id in enumerate(self.format_ids):
+            abr, height, fps, filesize, has_audio, has_video = self.format_table[n * stride:(n + 1) * stride]
+            formats.append({
+                'format_id': format_id,
+                'abr': _nan_to_none(abr),
+                'height': _nan_to_none(height, int),
+                'fps': _nan_to_none(fps),
+                'filesize': _nan_to_none(filesize, int),
+                'acodec': 'unknown' if has_audio else 'none',
+                'vcodec': 'unknown' if has_video else 'none',
+            })
+        #end
+        return formats
+
+    def set_info(self, info_dict: dict):
+        """ Populate the displayed fields from an info dict. """
+        self.info = info_dict
+        # NOTE: a flat playlist entry has no formats yet
+        formats = info_dict.get('formats') or []
+        self.set_format_table(formats)
+        self.title = info_dict.get('title', None)
+        self.author = info_dict.get('uploader', None)
+        self.length = info_dict.get('duration', None)
+        self.description = info_dict.get('description', None)
+        self.publish_date = info_dict.get('upload_date', None)
+        self.views = info_dict.get('view_count', None)
+        self.thumbnail_url = info_dict.get('thumbnail', None)
+        self.rating = info_dict.get('average_rating', None)
+        self.video_id = info_dict.get('id', None)
+
+        # Extract video and audio information
+        audio_stream = self.get_best_audio_stream(formats)
+        video_stream = self.get_best_video_stream(formats)
+
+        # Quality string
+        if audio_stream and video_stream:
+            self.quality_str = f"{video_stream['height']}p@{video_stream.get('fps', 0)}fps/{audio_stream['abr']}kbps"
+        else:
+            self.quality_str = "Unknown"
+
+        self.audio_bitrate = audio_stream.get('abr', 0) if audio_stream else None
+        self.video_resolution = video_stream.get('height', None) if video_stream else None
+        self.video_fps = video_stream.get('fps', 0) if video_stream else None
+
+        # Filesize
+        self.video_size_bytes = (video_stream.get('filesize', 0) or 0) + (audio_stream.get('filesize', 0) or 0) if video_stream and audio_stream else 0
+        self.video_size_mb = round(self.video_size_bytes / (1024 * 1024), 2) if self.video_size_bytes else 0
+
+        self.base_output_name = check_for_disallowed_filename_chars(self.title)
+
+        # Output filepaths dictionary which stores the paths for each download symbol
+        self.outputFilepaths = {symbol: None for symbol in MediaSymbols.get_all_symbol_values_as_list()}
+        # self.outputFilepaths = SimpleNamespace(**self.outputFilepaths)
+        # Creation timestamp, which can be used for sorting
+        self.creationTimestamp = datetime.now()
+
+        # Only the displayed fields and the compact format table are kept
+        self.release_formats()
+
+    @property
+    def watch_url(self) -> str:
+        # Same name as in the pytube VideoInfo
+        return self.url
 
     def get_best_audio_stream(self, formats):
         """ Get the best audio stream from the list of formats. """
@@ -106,7 +297,7 @@ class VideoInfo:
             audio_streams = [f for f in formats if f.get('acodec') != 'none' and f.get('abr') is not None]
             if audio_streams:
                 best_audio_stream = max(audio_streams, key=lambda f: f['abr'], default=None)
-                self.log(f"Best audio stream found: {best_audio_stream}")
+                self.log(f"Best audio stream found: {best_audio_stream.get('format_id')} {best_audio_stream.get('abr')}kbps")
                 return best_audio_stream
             else:
                 self.log("No valid audio streams found.")
@@ -121,7 +312,7 @@ class VideoInfo:
             video_streams = [f for f in formats if f.get('vcodec') != 'none' and f.get('height') is not None]
             if video_streams:
                 best_video_stream = max(video_streams, key=lambda f: f['height'], default=None)
-                self.log(f"Best video stream found: {best_video_stream}")
+                self.log(f"Best video stream found: {best_video_stream.get('format_id')} {best_video_stream.get('height')}p@{best_video_stream.get('fps')}fps")
                 return best_video_stream
             else:
                 self.log("No valid video streams found.")
@@ -130,6 +321,26 @@ class VideoInfo:
             self.log(f"Error selecting best video stream: {e}")
             return None
 
+    def __setattr__(self, name, value):
+        if name in VideoInfo.SERIALIZED_FIELDS:
+            object.__setattr__(self, '_revision', getattr(self, '_revision', 0) + 1)
+        #end
+        object.__setattr__(self, name, value)
+
+    def get_serialized(self, serializer: Callable):
+        """
+        The serializer's result for this item, cached until one of the displayed fields changes. The cache is tagged
+        with the revision read before serialising, so a field changed meanwhile is serialised again on the next call.
+        """
+        revision = getattr(self, '_revision', 0)
+        cached = getattr(self, '_serialized', None)
+        if cached is not None and cached[0] == revision and cached[1] is serializer:
+            return cached[2]
+        #end
+        serialized = serializer(self)
+        self._serialized = (revision, serializer, serialized)
+        return serialized
+
     def as_tuple(self) -> Tuple:
         return (
             self.download_status,
@@ -166,7 +377,7 @@ class VideoInfo:
 
     # ----- Stream Selection functions and download from stream -----
     def select_audio_stream(self, max_audio_bitrate, formatPriority=[]):
-        audio_streams = self.info['formats']
+        audio_streams = self.get_formats()
         audio_streams_to_check = [f for f in audio_streams if f.get('acodec') != 'none' and f.get('abr') is not None]
 
         # Sort by audio bitrate descending
@@ -179,7 +390,7 @@ class VideoInfo:
         return audio_streams_to_check[0] if audio_streams_to_check else None
 
     def select_video_stream(self, max_resolution, max_fps, formatPriority=[]):
-        video_streams = self.info['formats']
+        video_streams = self.get_formats()
         video_streams_to_check = [f for f in video_streams if f.get('vcodec') != 'none' and f.get('height') is not None]
 
         # Sort by resolution descending
@@ -201,7 +412,7 @@ class VideoInfo:
         format: 'blob' (return binary data), 'pil' (return PIL image), 'raw' (return raw response content)
         """
         try:
-            response = requests.get(self.thumbnail_url)
+            response = http_client.get(self.thumbnail_url)
             response.raise_for_status()
 
             if format == 'blob':
@@ -217,7 +428,7 @@ class VideoInfo:
             print(f"Error downloading image: {e}")
             return None
 
-    def download_audio(self, audio_stream, output):
+    def download_audio(self, audio_stream, output, segments: int = 1):
         """ Download the audio stream. """
         audio_filename = f"{self.base_output_name}.aac"
         audio_filename = check_for_disallowed_filename_chars(audio_filename)
@@ -226,15 +437,16 @@ class VideoInfo:
         ydl_opts = {
             'format': audio_stream['format_id'],
             'outtmpl': os.path.join(output, audio_filename),
+            **self.resume_opts,
         }
-        with YoutubeDL(ydl_opts) as ydl:
-            ydl.download([self.url])
-
         audio_file = os.path.join(output, audio_filename)
+        if not self.download_segmented(audio_stream, audio_file, segments):
+            self.download_format(ydl_opts)
+
         print(f"Download complete: {audio_file}")
         return audio_file
 
-    def download_video(self, video_stream, output):
+    def download_video(self, video_stream, output, segments: int = 1):
         """ Download the video stream. """
         video_filename = f"{self.base_output_name}.mp4"
         video_filename = check_for_disallowed_filename_chars(video_filename)
@@ -243,69 +455,322 @@ class VideoInfo:
         ydl_opts = {
             'format': video_stream['format_id'],
             'outtmpl': os.path.join(output, video_filename),
+            **self.resume_opts,
         }
-        with YoutubeDL(ydl_opts) as ydl:
-            ydl.download([self.url])
-
         video_file = os.path.join(output, video_filename)
+        if not self.download_segmented(video_stream, video_file, segments):
+            self.download_format(ydl_opts)
+
         print(f"Download complete: {video_file}")
         return video_file
 
-    def process_downloads_combine_keep(self, limits, output_dir, outputExt=".mkv"):
-        """ Process audio and video downloads and combine them based on the download flags. """
+    def download_format(self, ydl_opts):
+        """ Download with the given options, from the resolved info dict if it has the stream URLs, else from the video URL. """
+        ydl_opts = {**ydl_opts, 'progress_hooks': [self.get_bandwidth_hook()]}
+        with ydl_provider.borrow(ydl_opts) as ydl:
+            if self.info is not None and all(f.get('url') for f in self.info.get('formats') or [{}]):
+                # NOTE: the formats were just resolved, hence the URL is not extracted again for every stream.
+                # sanitize_info returns a copy, so the concurrent stream fetches do not share the dict.
+                ydl.process_ie_result(ydl.sanitize_info(self.info, True), download=True)
+            else:
+                ydl.download([self.url])
+
+    def download_segmented(self, stream, output_file, segments: int) -> bool:
+        """ Download a large stream over several range connections. Returns False when the stream is not eligible or it failed. """
+        if segments <= 1 or not is_segmentable(stream, self.segmented_min_size) or os.path.exists(output_file):
+            return False
+        #end
+        # NOTE: written to its own part file, so an interrupted (preallocated) file is not mistaken for a finished one
+        part_file = output_file + ".seg.part"
+        try:
+            downloader = SegmentedDownloader(segments, on_data=self.consume_bandwidth)
+            size = downloader.download(stream['url'], part_file, stream.get('http_headers'))
+            os.replace(part_file, output_file)
+            self.log(f"Segmented download over {segments} connections: {size} bytes")
+            return True
+        except Exception as e:
+            self.log(f"Segmented download failed, fallback to yt-dlp. Error: {e}")
+            if os.path.exists(part_file):
+                os.remove(part_file)
+            #end
+            return False
+        #end
+
+    def consume_bandwidth(self, n_bytes: int):
+        """ Account downloaded bytes to this item's job of the bandwidth limiter, blocks while over the limit. """
+        bandwidth_limiter.consume(self.video_id, n_bytes)
+
+    def get_bandwidth_hook(self):
+        """ yt-dlp progress hook which feeds the bandwidth limiter. Blocking in the hook slows the download down. """
+        downloaded = {}
+        def hook(status: dict):
+            if status.get('status') != 'downloading':
+                return
+            #end
+            key = status.get('tmpfilename') or status.get('filename')
+            done = status.get('downloaded_bytes') or 0
+            # NOTE: the first report of a resumed file includes the bytes from disk, hence it only sets the baseline
+            previous = downloaded.get(key, done)
+            downloaded[key] = done
+            if done > previous:
+                self.consume_bandwidth(done - previous)
+            #end
+        #end
+        return hook
+
+    def fetch_stream(self, download_function, stream, output, segments: int = 1):
+        """
+        Run a stream download while holding a slot of the stream's host per connection. A segmented download holds one
+        slot per segment and opens as many segments as it was granted (within max_per_host).
+        """
+        segments = segments if segments > 1 and is_segmentable(stream, self.segmented_min_size) else 1
+        with stream_host_limiter.connections(stream.get('url'), count=segments) as granted:
+            return download_function(stream, output, segments=granted)
+
+    def get_download_segments(self, limits: LimitsAndPriority) -> int:
+        """ Connections per stream, from the job limits or else the handler default. """
+        return max(1, int(getattr(limits, 'download_segments', None) or self.download_segments))
+
+    def download_combined(self, video_stream, audio_stream, output, outputExt=".mkv"):
+        """ Download the video and audio streams in a single yt-dlp invocation which also merges them. """
+        merge_format = outputExt.lstrip(".")
+        combined_filename = f"{self.base_output_name}.{merge_format}"
+        combined_filename = check_for_disallowed_filename_chars(combined_filename)
+        print(f"Downloading video ({video_stream['height']}p) and audio for [{self.title}] ...")
+
+        ydl_opts = {
+            'format': f"{video_stream['format_id']}+{audio_stream['format_id']}",
+            'outtmpl': os.path.join(output, combined_filename),
+            'merge_output_format': merge_format,
+            **self.resume_opts,
+        }
+        self.download_format(ydl_opts)
+
+        combined_file = os.path.join(output, combined_filename)
+        if not os.path.exists(combined_file):
+            raise FileNotFoundError(f"Merged output was not created: {combined_file}")
+        print(f"Download complete: {combined_file}")
+        return combined_file
+
+    def can_stream_mux(self, outputExt=".mkv") -> bool:
+        # NOTE: the streamed mux is always done by ffmpeg, the selected mux tool does not apply to it
+        return self.stream_mux and outputExt == ".mkv" and is_streaming_mux_supported() and bool(get_yt_dlp_command())
+
+    def can_single_pass(self, outputExt=".mkv") -> bool:
+        # yt-dlp fetches the formats of a single pass one after the other, hence it is only used when the concurrent stream
+        # fetch is off. yt-dlp merges with ffmpeg in the download thread (not on the mux stage), so ffmpeg has to be the
+        # selected (or for the container preferred) mux tool.
+        if self.concurrent_streams:
+            return False
+        #end
+        return get_mux_tool_order(self.base_output_name + outputExt)[:1] == [MUX_TOOL_FFMPEG]
+
+    def get_stream_source_args(self, stream, info_file: str = None) -> list:
+        """
+        Get the yt-dlp command which writes one format of this video to stdout, with the provider's options (cookies, proxy, ...).
+        From the resolved info file if one is given, so the subprocess does not extract the video again.
+        """
+        # NOTE: the subprocess cannot feed the bandwidth limiter, it is capped to half of the item's current share instead
+        rate = bandwidth_limiter.get_job_rate(self.video_id)
+        rate_args = ['--limit-rate', str(max(1, int(rate / 2)))] if rate > 0 else []
+        source_args = ['--load-info-json', info_file] if info_file else [self.url]
+        return get_yt_dlp_command() + ['--quiet', '--no-warnings', '--no-part', *ydl_provider.get_command_line_args(), *rate_args,
+                                       '-f', str(stream['format_id']), '-o', '-', *source_args]
+
+    def write_resolved_info(self, output) -> str:
+        """ Write the resolved info dict for the yt-dlp subprocesses, None if the formats are not resolved (no stream URLs). """
+        if self.info is None or not all(f.get('url') for f in self.info.get('formats') or [{}]):
+            return None
+        #end
+        info_file = os.path.join(output, f"{self.video_id}.info.json")
+        with ydl_provider.borrow() as ydl:
+            info = ydl.sanitize_info(self.info, True)
+        #end
+        with open(info_file, 'w', encoding='utf-8') as f:
+            json.dump(info, f)
+        #end
+        return info_file
+
+    def download_streamed(self, video_stream, audio_stream, output):
+        """ Fetch the video and audio streams concurrently into pipes which ffmpeg muxes as they arrive. """
+        combined_filename = check_for_disallowed_filename_chars(f"{self.base_output_name}.mkv")
+        combined_file = os.path.join(output, combined_filename)
+        print(f"Streaming video ({video_stream['height']}p) and audio for [{self.title}] into the muxer ...")
+        # Both sources load the formats resolved by this process instead of extracting the video again
+        info_file = self.write_resolved_info(output)
+        try:
+            combine_via_ffmpeg_pipes(combined_file, self.get_stream_source_args(video_stream, info_file),
+                                     self.get_stream_source_args(audio_stream, info_file))
+        finally:
+            if info_file is not None and os.path.exists(info_file):
+                os.remove(info_file)
+            #end
+        #end
+        print(f"Download complete: {combined_file}")
+        return combined_file
+
+    def process_downloads_combine_keep(self, limits, output_dir, outputExt=".mkv", journal=None, output_index=None, mux_stage=None):
+        """
+        Process audio and video downloads and combine them based on the download flags, checkpointing to the optional job journal.
+        With a mux stage the combine is handed off to it and a future of the rest of the item's processing is returned, else None.
+        """
+        # The outputs found in the output index are not downloaded again
+        download_status = self.skip_existing_outputs(output_index, outputExt) if output_index else self.download_status
+        if not any(symbol in download_status for symbol in self.get_expected_output_names(outputExt)):
+            self.log("All the outputs exist already, download skipped")
+            return
+        #end
+        # The full formats are dropped in compact mode and the cached ones may have expired
+        if self.info is None or self.formats_stale:
+            self.refresh_formats()
+        #end
+        try:
+            return self._process_downloads_combine_keep(limits, output_dir, outputExt, journal, download_status, mux_stage)
+        finally:
+            self.release_formats()
+        #end
+
+    def _process_downloads_combine_keep(self, limits, output_dir, outputExt=".mkv", journal=None, download_status=None, mux_stage=None):
+        download_status = self.download_status if download_status is None else download_status
         strOut = f"Process Entry Download: "
         output_dir = os.path.abspath(output_dir)
         temp_path = self.make_tmp_dir(output_dir)
         self.log("Create temporary directory: " + temp_path)
 
+        # A resumed job continues with the same formats, so that the partial files in the temp dir stay valid
+        job = journal.get(self.video_id) if journal else None
+        if job:
+            self.log(f"Resume from the journal: stage {job.get('stage')}, {job.get('bytes_done', 0)} bytes done")
+        #end
+
         # Initialize variables to hold the file paths
         audio_filename, video_filename = None, None
-
-        # Check flags and download audio if needed
-        if COMBINED_SYMBOL in self.download_status or AUDIO_ONLY_SYMBOL in self.download_status:
-            audio_stream = self.select_audio_stream(limits.bitrate, limits.audio_format_priority)
-            audio_filename = self.download_audio(audio_stream, temp_path)
+        combined_done = False
+
+        # Fast path: when only the combined output is kept, both formats are fetched and merged in one go, either streamed
+        # into ffmpeg or by a single yt-dlp invocation (when the concurrent stream fetch is off). The separate audio, video
+        # and mux flow below remains as the fallback, and it is the default, as it fetches the two streams concurrently.
+        if COMBINED_SYMBOL in download_status and AUDIO_ONLY_SYMBOL not in download_status and VIDEO_ONLY_SYMBOL not in download_status \
+                and (self.can_stream_mux(outputExt) or self.can_single_pass(outputExt)):
+            audio_stream = self.select_journaled_stream(job, 'audio_format_id') or self.select_audio_stream(limits.bitrate, limits.audio_format_priority)
+            video_stream = self.select_journaled_stream(job, 'video_format_id') or self.select_video_stream(limits.resolution, limits.fps, limits.video_format_priority)
+            # NOTE: large streams are left to the separate flow below when the segmented download is enabled
+            segments = self.get_download_segments(limits)
+            if segments > 1 and any(is_segmentable(stream or {}, self.segmented_min_size) for stream in (audio_stream, video_stream)):
+                audio_stream = video_stream = None
+            #end
+            if audio_stream and video_stream:
+                self.checkpoint(journal, stage=STAGE_DOWNLOADING, temp_path=temp_path,
+                                audio_format_id=audio_stream['format_id'], video_format_id=video_stream['format_id'])
+                output_filename = self.base_output_name + outputExt
+                output_filename = os.path.join(output_dir, check_for_disallowed_filename_chars(output_filename))
+                if self.can_stream_mux(outputExt):
+                    try:
+                        # NOTE: both connections are open at the same time, hence a slot of each stream's host is held
+                        with stream_host_limiter.slot(video_stream.get('url'), audio_stream.get('url')):
+                            combined_filename = self.download_streamed(video_stream, audio_stream, temp_path)
+                        #end
+                        os.replace(combined_filename, output_filename)
+                        self.outputFilepaths[COMBINED_SYMBOL] = output_filename
+                        self.log(strOut + "Streamed Audio and Video: " + output_filename)
+                        combined_done = True
+                    except Exception as e:
+                        self.log(f"Streaming mux failed, fallback to the {'single pass' if self.can_single_pass(outputExt) else 'separate'} download. Error: {e}")
+                    #end
+                #end
+                if not combined_done and self.can_single_pass(outputExt):
+                    try:
+                        # NOTE: yt-dlp opens one connection at a time
+                        with stream_host_limiter.slot(video_stream.get('url')):
+                            combined_filename = self.download_combined(video_stream, audio_stream, temp_path, outputExt)
+                        #end
+                        os.replace(combined_filename, output_filename)# NOTE: overwrites, same as the ffmpeg mux
+                        self.outputFilepaths[COMBINED_SYMBOL] = output_filename
+                        self.log(strOut + "Single pass Audio and Video: " + output_filename)
+                        combined_done = True
+                    except Exception as e:
+                        self.log(f"Single pass download failed, fallback to separate download and mux. Error: {e}")
+                    #end
+                #end
+            #end
+        #end
+
+        # Check flags and select the audio and video streams if needed
+        need_audio = (COMBINED_SYMBOL in download_status and not combined_done) or AUDIO_ONLY_SYMBOL in download_status
+        need_video = (COMBINED_SYMBOL in download_status and not combined_done) or VIDEO_ONLY_SYMBOL in download_status
+        if need_audio:
+            audio_stream = self.select_journaled_stream(job, 'audio_format_id') or self.select_audio_stream(limits.bitrate, limits.audio_format_priority)
+            self.checkpoint(journal, stage=STAGE_DOWNLOADING, temp_path=temp_path, audio_format_id=audio_stream['format_id'])
+        if need_video:
+            video_stream = self.select_journaled_stream(job, 'video_format_id') or self.select_video_stream(limits.resolution, limits.fps, limits.video_format_priority)
+            self.checkpoint(journal, stage=STAGE_DOWNLOADING, temp_path=temp_path, video_format_id=video_stream['format_id'])
+
+        # Download the streams, both at the same time when both are needed: the audio on the shared stream pool, the video here
+        segments = self.get_download_segments(limits)
+        if need_audio and need_video and self.concurrent_streams:
+            audio_future = stream_fetch_pool.submit(self.fetch_stream, self.download_audio, audio_stream, temp_path, segments)
+            try:
+                video_filename = self.fetch_stream(self.download_video, video_stream, temp_path, segments)
+            finally:
+                audio_filename = audio_future.result()# NOTE: waits for the audio even if the video failed
+        else:
+            audio_filename = self.fetch_stream(self.download_audio, audio_stream, temp_path, segments) if need_audio else None
+            video_filename = self.fetch_stream(self.download_video, video_stream, temp_path, segments) if need_video else None
+        if audio_filename:
+            self.checkpoint(journal, audio_file=audio_filename, bytes_done=get_partial_bytes(temp_path))
             self.log(strOut + "Audio: " + audio_filename + " ...")
-
-        # Check flags and download video if needed
-        if COMBINED_SYMBOL in self.download_status or VIDEO_ONLY_SYMBOL in self.download_status:
-            video_stream = self.select_video_stream(limits.resolution, limits.fps, limits.video_format_priority)
-            video_filename = self.download_video(video_stream, temp_path)
+        if video_filename:
+            self.checkpoint(journal, video_file=video_filename, bytes_done=get_partial_bytes(temp_path))
             self.log(strOut + "Video: " + video_filename + " ...")
 
         # TODO: download all subtitles and integrate them
 
-        # If combined download is needed, combine the audio and video files
-        if COMBINED_SYMBOL in self.download_status:
+        # If combined download is needed, combine the audio and video files (or hand them off to the mux stage)
+        mux_future = None
+        if COMBINED_SYMBOL in download_status and not combined_done:
             output_filename = self.base_output_name + outputExt
             output_filename = os.path.join(output_dir, check_for_disallowed_filename_chars(output_filename))
             audio_filenames = [audio_filename] if audio_filename else []
             subtitle_filenames = []  # Assuming no subtitles for now
             self.log(strOut + "Combining Audio and Video: " + output_filename)
-            combine_via_auto_selection(output_filename, video_filename, audio_filenames, subtitle_filenames)
+            self.checkpoint(journal, stage=STAGE_MUXING)
+            if mux_stage is not None:
+                # NOTE: the streams stay in the temp dir until the mux is done, hence the moves and the cleanup follow it
+                mux_future = mux_stage.submit(output_filename, video_filename, audio_filenames, subtitle_filenames,
+                                              then=lambda: self.finish_outputs(download_status, output_dir, temp_path, audio_filename, video_filename))
+            else:
+                combine_via_auto_selection(output_filename, video_filename, audio_filenames, subtitle_filenames)
+            #end
             self.outputFilepaths[COMBINED_SYMBOL] = output_filename
 
-        # Move audio-only files to the output directory
-        if AUDIO_ONLY_SYMBOL in self.download_status and audio_filename:
-             self.outputFilepaths[AUDIO_ONLY_SYMBOL] = move_file_with_handling(audio_filename, output_dir)
-
-        # Move video-only files to the output directory
-        if VIDEO_ONLY_SYMBOL in self.download_status and video_filename:
-            self.outputFilepaths[VIDEO_ONLY_SYMBOL] = move_file_with_handling(video_filename, output_dir)
-
         # Subtitles, thumbnails, video info, comments
-        if SUBTITLES_ONLY_SYMBOL in self.download_status:
+        if SUBTITLES_ONLY_SYMBOL in download_status:
             self.download_subtitles(output_dir, any)  # TODO: implement subtitle download and move
 
-        if THUMBNAIL_SYMBOL in self.download_status:
+        if THUMBNAIL_SYMBOL in download_status:
             self.outputFilepaths[THUMBNAIL_SYMBOL] = self.download_thumbnail(output_dir)
 
-        if INFO_SYMBOL in self.download_status:
+        if INFO_SYMBOL in download_status:
             self.outputFilepaths[INFO_SYMBOL] = self.download_video_info(output_dir)
 
-        if COMMENTS_SYMBOL in self.download_status:
+        if COMMENTS_SYMBOL in download_status:
             self.outputFilepaths[COMMENTS_SYMBOL] = self.download_comments(output_dir)
 
+        if mux_future is not None:
+            return mux_future
+        #end
+        self.finish_outputs(download_status, output_dir, temp_path, audio_filename, video_filename)
+
+    def finish_outputs(self, download_status, output_dir, temp_path, audio_filename, video_filename):
+        """ Move the kept audio-only and video-only files to the output directory and delete the temp dir. """
+        # Move audio-only files to the output directory
+        if AUDIO_ONLY_SYMBOL in download_status and audio_filename:
+             self.outputFilepaths[AUDIO_ONLY_SYMBOL] = move_file_with_handling(audio_filename, output_dir)
+
+        # Move video-only files to the output directory
+        if VIDEO_ONLY_SYMBOL in download_status and video_filename:
+            self.outputFilepaths[VIDEO_ONLY_SYMBOL] = move_file_with_handling(video_filename, output_dir)
+
         # Clean up the temporary directory and delete it
         self.log("Clean: " + temp_path)
         shutil.rmtree(temp_path)
@@ -314,7 +779,7 @@ class VideoInfo:
         """ Download the thumbnail image. """
         thumbnail_url = self.thumbnail_url
         thumbnail_filename = os.path.join(output_dir, f"{self.base_output_name}_thumbnail.{format}")
-        thumbnail_data = requests.get(thumbnail_url).content
+        thumbnail_data = http_client.get(thumbnail_url).content
         with open(thumbnail_filename, 'wb') as f:
             f.write(thumbnail_data)
         return thumbnail_filename
@@ -357,6 +822,42 @@ class VideoInfo:
         """ Log a message by appending it to the logger list. """
         self.logger.append(message)
 
+    def get_expected_output_names(self, outputExt=".mkv") -> dict:
+        """ Get the output file names per symbol, as written by the download methods. """
+        return {
+            COMBINED_SYMBOL: check_for_disallowed_filename_chars(self.base_output_name + outputExt),
+            AUDIO_ONLY_SYMBOL: check_for_disallowed_filename_chars(f"{self.base_output_name}.aac"),
+            VIDEO_ONLY_SYMBOL: check_for_disallowed_filename_chars(f"{self.base_output_name}.mp4"),
+            THUMBNAIL_SYMBOL: f"{self.base_output_name}_thumbnail.jpg",
+            INFO_SYMBOL: f"{self.base_output_name}_info.txt",
+            COMMENTS_SYMBOL: check_for_disallowed_filename_chars(f"{self.base_output_name}.comments.json"),
+        }
+
+    def skip_existing_outputs(self, output_index, outputExt=".mkv") -> str:
+        """ Get the download flags without the outputs which already exist in the output index. """
+        download_status = self.download_status
+        for symbol, expected_name in self.get_expected_output_names(outputExt).items():
+            if symbol not in download_status:
+                continue
+            path = output_index.lookup(self.video_id, symbol, expected_name)
+            if path:
+                self.outputFilepaths[symbol] = path
+                download_status = updateOutputKeepsStr(download_status, symbol, 'off')
+                self.log(f"Output exists already, skipped: {path}")
+        return download_status
+
+    def checkpoint(self, journal, **fields) -> None:
+        """ Persist the job progress of this item to the journal, if journaling is enabled. """
+        if journal is not None:
+            journal.checkpoint(self.video_id, **fields)
+
+    def select_journaled_stream(self, job, key):
+        """ Get the format chosen by an earlier (interrupted) run of the job, if it is still offered. """
+        format_id = job.get(key) if job else None
+        if not format_id:
+            return None
+        return next((f for f in self.get_formats() if str(f.get('format_id')) == format_id), None)
+
     def make_tmp_dir(self, output_dir):
         """ Create a temporary directory for download storage. """
         dir_prefix = "."
@@ -370,6 +871,23 @@ class VideoInfo:
         return "☑" in self.download_status
 
 
+## ================================= Helper functions =================================
+def _float_or_nan(value) -> float:
+    try:
+        return float(value) if value is not None else math.nan
+    except (TypeError, ValueError):
+        return math.nan
+
+def _nan_to_none(value: float, cast=float):
+    return None if math.isnan(value) else cast(value)
+
+def get_yt_dlp_command() -> list:
+    """ Get the command which runs yt-dlp in a subprocess, empty if there is none (frozen build without yt-dlp on PATH). """
+    executable = shutil.which("yt-dlp")
+    if executable:
+        return [executable]
+    return [] if getattr(sys, "frozen", False) else [sys.executable, "-m", "yt_dlp"]
+
 def move_file_with_handling(src, dst_dir):
     """
     Move a file to the destination directory. If a file with the same name
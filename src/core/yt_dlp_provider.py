@@ -0,0 +1,176 @@
+"""
+YouTube Video Downloader
+Copyright (C) 2023 JessyJP
+
+Author: JessyJP
+Year: 2024
+Description: This is a python source script part of the YouTube Video Downloader Suit.
+
+MIT License
+
+Copyright (c) 2024 JessyJP
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+# Imports
+import threading
+from contextlib import contextmanager
+from yt_dlp import YoutubeDL
+
+_MISSING = object()
+
+# The base options which a yt-dlp subprocess (e.g. a streamed source) takes as command line flags with the same value
+COMMAND_LINE_FLAGS = {
+    "cookiefile": "--cookies",
+    "proxy": "--proxy",
+    "geo_verification_proxy": "--geo-verification-proxy",
+    "source_address": "--source-address",
+    "socket_timeout": "--socket-timeout",
+    "username": "--username",
+    "password": "--password",
+    "usenetrc": "--netrc",
+}
+
+## ================================= YoutubeDL provider class =================================
+class YoutubeDLProvider:
+    """
+    Thread-local pool of YoutubeDL instances.
+
+    Every worker thread gets one YoutubeDL which is kept alive between the calls, so the extractors,
+    cookie jar and HTTP connections stay warm instead of being re-initialised for every call.
+    The per-call options (format, output template, ...) are applied on borrow and restored afterwards.
+    """
+    def __init__(self, base_opts: dict = None, factory=YoutubeDL):
+        self.base_opts = dict(base_opts or {})
+        self.factory = factory
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._instances = []# All created instances, used for closing and diagnostics
+
+    def get(self):
+        ydl = getattr(self._local, "ydl", None)
+        if ydl is None:
+            ydl = self.factory(dict(self.base_opts))
+            self._local.ydl = ydl
+            with self._lock:
+                self._instances.append(ydl)
+            #end
+        #end
+        return ydl
+
+    @contextmanager
+    def borrow(self, opts: dict = None):
+        """ Yield the thread's YoutubeDL with the given options applied for the duration of the call. """
+        ydl = self.get()
+        previous = self._apply_opts(ydl, opts or {})
+        try:
+            yield ydl
+        finally:
+            self._restore_opts(ydl, previous)
+        #end
+
+    def get_command_line_args(self) -> list:
+        """ The base options as yt-dlp command line flags, so a yt-dlp subprocess fetches with the same cookies, proxy, etc. """
+        args = []
+        for key, flag in COMMAND_LINE_FLAGS.items():
+            value = self.base_opts.get(key)
+            if value is True:
+                args.append(flag)
+            elif value not in (None, False):
+                args += [flag, str(value)]
+            #end
+        #end
+        browser = self.base_opts.get("cookiesfrombrowser")
+        if browser:
+            # (browser, profile, keyring, container) -> BROWSER[+KEYRING][:PROFILE][::CONTAINER]
+            name, profile, keyring, container = (tuple(browser) + (None,) * 4)[:4]
+            args += ["--cookies-from-browser", name + (f"+{keyring}" if keyring else "") + (f":{profile}" if profile else "")
+                                                    + (f"::{container}" if container else "")]
+        #end
+        for header, value in (self.base_opts.get("http_headers") or {}).items():
+            args += ["--add-header", f"{header}:{value}"]
+        #end
+        return args
+
+    def get_instance_count(self) -> int:
+        with self._lock:
+            return len(self._instances)
+        #end
+
+    def close_all(self):
+        with self._lock:
+            for ydl in self._instances:
+                try:
+                    ydl.close()
+                except Exception as e:
+                    print(f"Error closing YoutubeDL instance: {e}")
+                #end
+            #end
+            self._instances.clear()
+        #end
+        self._local = threading.local()
+
+    # Helper methods
+    @staticmethod
+    def _apply_opts(ydl, opts: dict) -> dict:
+        previous = {}
+        for key, value in opts.items():
+            if key == "progress_hooks":
+                # NOTE: the hooks given in the constructor options are registered once, hence they are added to the instance
+                ydl._progress_hooks.extend(value)
+                previous["_progress_hooks"] = value
+                continue
+            #end
+            current = ydl.params.get(key, _MISSING)
+            if key == "outtmpl":
+                # NOTE: YoutubeDL normalises the output template into a dict by type, i.e. {'default': ...}
+                current = dict(current) if isinstance(current, dict) else current
+                value = {**(current if isinstance(current, dict) else {}), "default": value} if isinstance(value, str) else value
+            #end
+            previous[key] = current
+            ydl.params[key] = value
+        #end
+        if "format" in opts:
+            # The format selector is compiled once in the YoutubeDL constructor, hence it has to be rebuilt
+            previous["_format_selector"] = ydl.format_selector
+            ydl.format_selector = ydl.build_format_selector(opts["format"])
+        #end
+        return previous
+
+    @staticmethod
+    def _restore_opts(ydl, previous: dict):
+        for hook in previous.pop("_progress_hooks", []):
+            ydl._progress_hooks.remove(hook)
+        #end
+        format_selector = previous.pop("_format_selector", _MISSING)
+        if format_selector is not _MISSING:
+            ydl.format_selector = format_selector
+        #end
+        for key, value in previous.items():
+            if value is _MISSING:
+                ydl.params.pop(key, None)
+            else:
+                ydl.params[key] = value
+            #end
+        #end
+#end
+
+## ================================= Shared provider =================================
+# A single provider for the process. Each thread (analysis or download worker) gets its own instance from it.
+ydl_provider = YoutubeDLProvider()
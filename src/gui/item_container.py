@@ -30,6 +30,7 @@ SOFTWARE.
 """
 # Core imports
 from core.download_options import * # updateOutputKeepsStr, MediaSymbols # NOTE:imports the symbol list as well
+from core.video_list_query import SORT_FIELDS, get_sort_value
 # GUI imports
 import tkinter as tk
 from tkinter import ttk
@@ -104,6 +105,11 @@ class VideoItemDisplayContainer():
         self.tree.delete(items)
     #end
 
+    def update_row(self, ui_item_id, item):
+        # NOTE: not named update(), the container is mixed into the tk.Tk window whose update() comes first in the MRO
+        self.tree.item(ui_item_id, values=item.as_tuple())
+    #end
+
     def get_UiItmField(self, ui_item_id, field):
         return self.tree.set(ui_item_id, field)
     #end
@@ -174,44 +180,30 @@ class VideoItemDisplayContainer():
         self.sortDirection = sortDirections[ind]
         heading_symbol = symbol[ind]
 
-        # Get the data
-        data = [(self.tree.set(child, col), child) for child in self.tree.get_children('')]
-
-        # Try to cast the data as float i.e numerical otherwise keep it as text 
-        def try_float(val):
-            try:
-                return float(val)
-            except ValueError:
-                return val
-            #end
-        #end
-
-        # Some entries will be handled specifically
-        def sort_key(item):
-            value = item[0]
-            if col == "download_size":
-                value = value.split()[0]
-            #end
-            return try_float(value)
-        #end
-
-        # Do the sorting of the keys
-        if self.sortDirection == "asc":
-            data.sort(key=sort_key, reverse=False)
+        descending = self.sortDirection == "desc"
+        children = self.tree.get_children('')
+        if col in SORT_FIELDS:
+            # The model fields are ordered by the list manager's sort index, which only re-sorts the items changed since the last use
+            row_by_video_id = {str(self.tree.set(child, "video_id")): child for child in children}
+            sorted_rows = [row_by_video_id.pop(item.video_id) for item in self.list_query.get_sorted_items(col, descending)#NOTE:_EXTERNAL_METHOD_
+                           if item.video_id in row_by_video_id]
+            # Any row without a list item goes last
+            sorted_rows += list(row_by_video_id.values())
         else:
-            data.sort(key=sort_key, reverse=True)
+            # Otherwise the displayed text is sorted, numbers before text and the empty cells last
+            def sort_key(child):
+                value = self.tree.set(child, col)
+                if col == "download_size":
+                    value = value.split()[0] if value else value
+                #end
+                return get_sort_value(value)
+            #end
+            sorted_rows = sorted(children, key=sort_key, reverse=descending)
         #end
 
-        # Create a mapping between tree view children IDs and their indices in the info table
-        # id_to_index = {info.video_id: index for index, info in enumerate(self.getVideoList())}
-
-        # Sort  the info table based on the sorted order of tree view data #TODO: fix error here
-        # self.infoList = [x[1] for x in sorted(zip(data, self.getVideoList()), key=lambda x: id_to_index[x[0][1]])]
-        # NOTE: Also if this is implemented it will require a sorting function to be implemented in the parent class 
-
         # Move the sorted data to the correct position in the treeview
-        for indx, item in enumerate(data):
-            self.tree.move(item[1], '', indx)
+        for indx, child in enumerate(sorted_rows):
+            self.tree.move(child, '', indx)
         #end
 
         # Update the status message to indicate the sorting column
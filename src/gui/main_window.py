@@ -735,6 +735,8 @@ class YouTubeDownloaderGUI(tk.Tk, VideoListManager, VideoItemDisplayContainer):
             self.disable_UI_elements_during_download()# TODO: this is for download but also works, but will give incorrect label, i.e. "cancel download"
             # Get the threading mode flag
             use_analysis_multithreading = self.config.getboolean("General", "multithread_analyse_procedure")
+            self.max_analysis_workers = self.config.getint("General", "analysis_worker_count", fallback=self.max_analysis_workers)
+            self.use_async_analysis = self.config.getboolean("General", "async_analyse_procedure", fallback=False)
             # Make and start an analysis thread
             t = threading.Thread(target=self.import_valid_Youtube_videos_from_textOrURL_list, args=(text, use_analysis_multithreading))
             t.start()
@@ -778,11 +780,15 @@ class YouTubeDownloaderGUI(tk.Tk, VideoListManager, VideoItemDisplayContainer):
 
     # NOTE: @OVERWRITE This function overwrites/overrides the parent implementation
     def addItem(self, video_info_item):
-        super().addItem(video_info_item)
-        self.container.add(video_info_item)
+        # Only add a row if the item was not a duplicate
+        added = super().addItem(video_info_item)
+        if added:
+            self.container.add(video_info_item)
+        #end
         # # Add the URL and video ID to the current_url_entries and current_video_ids sets
         # current_url_entries.add(video_info_item.watch_url) # NOTE: effective placeholder because it's not inserted or  returned
         # current_video_ids.add(video_info_item.video_id) # NOTE: effective placeholder because it's not inserted or  returned
+        return added
     #end
 
     # NOTE: @OVERWRITE This function overwrites/overrides the parent implementation
@@ -842,6 +848,8 @@ class YouTubeDownloaderGUI(tk.Tk, VideoListManager, VideoItemDisplayContainer):
         # Parse video format priority into a list from config
         video_format_priority_str = self.config.get("DownloadSettings", "video_format_priority")
         limits_and_priority.video_format_priority = [format.strip() for format in video_format_priority_str.split(",")]
+        # Connections per large stream from config
+        limits_and_priority.download_segments = self.config.getint("DownloadSettings", "download_segments", fallback=1)
 
         limits_and_priority.to_numeric()
         return limits_and_priority
@@ -878,6 +886,15 @@ class YouTubeDownloaderGUI(tk.Tk, VideoListManager, VideoItemDisplayContainer):
 
         # Get the process threading run configuration
         process_via_multithreading = self.config.getboolean("General", "multithread_download_procedure")
+        self.max_download_workers = self.config.getint("General", "download_worker_count", fallback=self.max_download_workers)
+        self.max_mux_workers = self.config.getint("General", "mux_worker_count", fallback=self.max_mux_workers)
+        self.stream_mux = self.config.getboolean("General", "streaming_mux", fallback=False)
+        self.concurrent_streams = self.config.getboolean("General", "concurrent_streams", fallback=True)
+        self.metadata_cache_mode = self.config.get("General", "metadata_cache", fallback=self.metadata_cache_mode)
+        self.merge_tool = self.config.get("General", "select_merge_tool", fallback=self.merge_tool)
+        self.mkvmerge_dir = self.config.get("General", "mkvmerge_dir", fallback=None)
+        self.max_streams_per_host = self.config.getint("General", "streams_per_host", fallback=self.max_streams_per_host)
+        self.resume_downloads = self.config.getboolean("General", "resume_downloads", fallback=False)
 
         # Call the download manager processing function with all arguments
         self.downloadAllVideoItems( process_via_multithreading, limits, outputDir, outputExt)
@@ -919,6 +936,16 @@ class YouTubeDownloaderGUI(tk.Tk, VideoListManager, VideoItemDisplayContainer):
         self.update()  # Refresh the window to show the progress
     #end
 
+    # NOTE: @OVERWRITE This function overwrites/overrides the parent implementation
+    def updateVideoItemUIFields(self, videoItem):
+        # Bump the list version of the item (sort index, change log) and refresh its row
+        super().updateVideoItemUIFields(videoItem)
+        ui_item = self.get_tree_view_UI_item_by_video_info(videoItem)
+        if ui_item is not None:
+            self.container.update_row(ui_item, videoItem)
+        #end
+    #end
+
     # NOTE: @OVERWRITE This function overwrites/overrides the parent implementation
     def updateVideoItemUIDownloadState(self, videoItem,  download_status=None):        
         # Get the associated item
@@ -0,0 +1,149 @@
+"""
+YouTube Video Downloader
+Copyright (C) 2023 JessyJP
+
+Author: JessyJP
+Year: 2024
+Description: This is a python source script part of the YouTube Video Downloader Suit.
+
+MIT License
+
+Copyright (c) 2024 JessyJP
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+# Benchmark: the combined (audio+video) download of an item, sequential single pass vs concurrent stream fetch and mux.
+# The formats are stubbed locally: a local HTTP server serves audio/video files (generated once by ffmpeg) with a per-connection
+# rate limit, which mimics the per-connection throttling of the media servers. The items are built from stub info dicts.
+# Needs ffmpeg on PATH, the same as the muxing.
+import os
+import sys
+import time
+import shutil
+import tempfile
+import threading
+import subprocess
+from types import SimpleNamespace
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+# Add the 'src' directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src')))
+from core.yt_dlp_handler import VideoInfo
+from core.yt_dlp_provider import ydl_provider
+from core.metadata_cache import CACHE_OFF
+from core.download_options import setOutputKeepsStr
+from core.post_download_mux import set_mux_tool, MUX_TOOL_FFMPEG
+
+NUMBER_OF_ITEMS = 4
+DURATION = 25# Seconds of media, ~0.6 MiB audio and ~1.4 MiB video with the bitrates below
+AUDIO_BITRATE = "320k"
+VIDEO_BITRATE = "640k"
+BYTES_PER_SECOND_PER_CONNECTION = 2 * 1024 * 1024
+CHUNK_SIZE = 64 * 1024
+LIMITS = SimpleNamespace(bitrate="max", resolution="max", fps="max", audio_format_priority=[], video_format_priority=[])
+MEDIA = {}# "audio"/"video" -> file content
+
+def make_media(media_dir):
+    # A video-only mp4 and an audio-only m4a, the same as the separate formats of the media servers
+    video_file, audio_file = os.path.join(media_dir, "video.mp4"), os.path.join(media_dir, "audio.m4a")
+    ffmpeg_args = ["ffmpeg", "-hide_banner", "-loglevel", "error", "-y", "-f", "lavfi"]
+    subprocess.run(ffmpeg_args + ["-i", f"testsrc=duration={DURATION}:size=640x360:rate=25", "-c:v", "mpeg4", "-b:v", VIDEO_BITRATE, video_file], check=True)
+    subprocess.run(ffmpeg_args + ["-i", f"sine=duration={DURATION}", "-ac", "2", "-c:a", "aac", "-b:a", AUDIO_BITRATE, audio_file], check=True)
+    for name, path in (("video", video_file), ("audio", audio_file)):
+        with open(path, "rb") as f:
+            MEDIA[name] = f.read()
+        #end
+    #end
+
+class ThrottledHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        content = MEDIA["audio"] if self.path.startswith("/audio") else MEDIA["video"]
+        self.send_response(200)
+        self.send_header("Content-Type", "application/octet-stream")
+        self.send_header("Content-Length", str(len(content)))
+        self.end_headers()
+        for offset in range(0, len(content), CHUNK_SIZE):
+            self.wfile.write(content[offset:offset + CHUNK_SIZE])
+            time.sleep(CHUNK_SIZE / BYTES_PER_SECOND_PER_CONNECTION)
+
+    def log_message(self, format, *args):
+        pass
+
+def make_stub_info(base_url, n):
+    return {
+        'id': f"stub{n:07d}",
+        'title': f"Stub video {n}",
+        'extractor': 'generic',
+        'extractor_key': 'Generic',
+        'webpage_url': f"{base_url}/watch/{n}",
+        'formats': [
+            {'format_id': '140', 'url': f"{base_url}/audio/{n}.m4a", 'ext': 'm4a', 'acodec': 'mp4a.40.2', 'vcodec': 'none',
+             'abr': 320.0, 'filesize': len(MEDIA["audio"]), 'protocol': 'http'},
+            {'format_id': '137', 'url': f"{base_url}/video/{n}.mp4", 'ext': 'mp4', 'acodec': 'none', 'vcodec': 'avc1.640028',
+             'height': 360, 'fps': 25.0, 'filesize': len(MEDIA["video"]), 'protocol': 'http'},
+        ],
+    }
+
+def run(base_url, output_dir, concurrent_streams):
+    # The default download: only the combined output is kept.
+    # Without the concurrent fetch that is a single yt-dlp pass (the streams one after the other and the yt-dlp merge),
+    # with it the two streams are fetched at the same time and then muxed.
+    VideoInfo.concurrent_streams = concurrent_streams
+    download_status = setOutputKeepsStr(combined=True)
+    for n in range(NUMBER_OF_ITEMS):
+        item = VideoInfo.from_info_dict(f"{base_url}/watch/{n}", make_stub_info(base_url, n), download_status)
+        item.process_downloads_combine_keep(LIMITS, output_dir)
+    #end
+
+def timeit(label, function, *args):
+    start = time.perf_counter()
+    function(*args)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} total {elapsed:8.3f} s   per item {elapsed / NUMBER_OF_ITEMS:8.3f} s")
+    return elapsed
+
+def main():
+    # The stub info dicts are complete, so neither the cache nor the compact mode (which re-resolves the formats) is used
+    VideoInfo.cache_mode = CACHE_OFF
+    VideoInfo.compact = False
+    ydl_provider.base_opts.update({'quiet': True, 'no_warnings': True, 'noprogress': True})
+    # The single pass is merged by yt-dlp with ffmpeg, hence ffmpeg is the mux tool of both runs
+    set_mux_tool(MUX_TOOL_FFMPEG)
+    if shutil.which("ffmpeg") is None:
+        print("The benchmark needs ffmpeg on PATH")
+        return
+    #end
+    media_dir = tempfile.mkdtemp()
+    make_media(media_dir)
+    shutil.rmtree(media_dir)
+    server = ThreadingHTTPServer(("127.0.0.1", 0), ThrottledHandler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base_url = f"http://127.0.0.1:{server.server_address[1]}"
+
+    print(f"Benchmark on {NUMBER_OF_ITEMS} locally stubbed items, {len(MEDIA['audio']) >> 10} KiB audio + {len(MEDIA['video']) >> 10} KiB video, "
+          f"{BYTES_PER_SECOND_PER_CONNECTION >> 10} KiB/s per connection, combined output")
+    with tempfile.TemporaryDirectory() as sequential_dir, tempfile.TemporaryDirectory() as concurrent_dir:
+        sequential = timeit("Single pass (sequential)", run, base_url, sequential_dir, False)
+        concurrent = timeit("Concurrent fetch and mux", run, base_url, concurrent_dir, True)
+    print(f"Saved per item: {(sequential - concurrent) / NUMBER_OF_ITEMS:.3f} s  (speedup x{sequential / concurrent:.2f})")
+    server.shutdown()
+
+if __name__ == "__main__":
+    main()
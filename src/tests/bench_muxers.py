@@ -0,0 +1,107 @@
+"""
+YouTube Video Downloader
+Copyright (C) 2023 JessyJP
+
+Author: JessyJP
+Year: 2024
+Description: This is a python source script part of the YouTube Video Downloader Suit.
+
+MIT License
+
+Copyright (c) 2024 JessyJP
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+# Benchmark: time the available mux tools per output container.
+# The streams are synthetic, generated locally with the ffmpeg lavfi sources (test pattern video and a sine tone),
+# so no download is involved. Every tool muxes the same video and audio files with stream copy.
+import os
+import sys
+import time
+import tempfile
+import statistics
+import subprocess
+# Add the 'src' directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src')))
+from core.post_download_mux import probe_mux_tools, combine_via_ffmpeg, combine_via_mkvmerge, MUX_TOOL_FFMPEG, MUX_TOOL_MKVMERGE
+
+DURATION_SECONDS = 120
+VIDEO_SOURCE = "testsrc2=size=1280x720:rate=30"
+AUDIO_SOURCE = "sine=frequency=440:sample_rate=48000"
+CONTAINERS = (".mkv", ".mp4")
+REPEATS = 5
+COMBINE_FUNCTIONS = {MUX_TOOL_FFMPEG: combine_via_ffmpeg, MUX_TOOL_MKVMERGE: combine_via_mkvmerge}
+MATROSKA_ONLY = {MUX_TOOL_MKVMERGE}
+
+def generate_streams(ffmpeg_path, work_dir):
+    """ Generate the video and audio files, like the separately downloaded streams. """
+    encoders = subprocess.run([ffmpeg_path, "-hide_banner", "-encoders"], capture_output=True, text=True).stdout
+    video_codec = ["-c:v", "libx264", "-preset", "ultrafast"] if "libx264" in encoders else ["-c:v", "mpeg4", "-q:v", "5"]
+    video_file = os.path.join(work_dir, "video.mp4")
+    audio_file = os.path.join(work_dir, "audio.m4a")
+    base = [ffmpeg_path, "-hide_banner", "-loglevel", "error", "-y", "-f", "lavfi", "-t", str(DURATION_SECONDS)]
+    subprocess.run(base + ["-i", VIDEO_SOURCE] + video_codec + [video_file], check=True)
+    subprocess.run(base + ["-i", AUDIO_SOURCE, "-c:a", "aac", audio_file], check=True)
+    return video_file, audio_file
+
+def time_mux(tool, output_file, video_file, audio_file):
+    timings = []
+    for _ in range(REPEATS):
+        if os.path.exists(output_file):
+            os.remove(output_file)
+        #end
+        start = time.perf_counter()
+        COMBINE_FUNCTIONS[tool](output_file, video_file, [audio_file], [])
+        timings.append(time.perf_counter() - start)
+    #end
+    return statistics.median(timings), os.path.getsize(output_file)
+
+def main():
+    tools = probe_mux_tools()
+    print(f"Mux tools found: {tools or 'none'}")
+    if MUX_TOOL_FFMPEG not in tools:
+        print("ffmpeg is needed to generate the synthetic streams, benchmark skipped")
+        return
+    #end
+    with tempfile.TemporaryDirectory() as work_dir:
+        video_file, audio_file = generate_streams(tools[MUX_TOOL_FFMPEG], work_dir)
+        print(f"Synthetic streams: {DURATION_SECONDS} s, video {os.path.getsize(video_file) >> 10} KiB, "
+              f"audio {os.path.getsize(audio_file) >> 10} KiB, median of {REPEATS} runs")
+        for container in CONTAINERS:
+            results = {}
+            for tool in COMBINE_FUNCTIONS:
+                if tool not in tools:
+                    print(f"{container:<5} {tool:<9} not installed")
+                    continue
+                #end
+                if tool in MATROSKA_ONLY and container not in (".mkv", ".mka"):
+                    continue
+                #end
+                elapsed, size = time_mux(tool, os.path.join(work_dir, f"out_{tool}{container}"), video_file, audio_file)
+                results[tool] = elapsed
+                print(f"{container:<5} {tool:<9} {elapsed * 1000:8.1f} ms   output {size >> 10} KiB")
+            #end
+            if results:
+                print(f"{container:<5} fastest: {min(results, key=results.get)}")
+            #end
+        #end
+    #end
+
+if __name__ == "__main__":
+    main()
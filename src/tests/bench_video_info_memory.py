@@ -0,0 +1,109 @@
+"""
+YouTube Video Downloader
+Copyright (C) 2023 JessyJP
+
+Author: JessyJP
+Year: 2024
+Description: This is a python source script part of the YouTube Video Downloader Suit.
+
+MIT License
+
+Copyright (c) 2024 JessyJP
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+# Benchmark: per item memory of the yt-dlp VideoInfo with the full info dict vs the compact mode.
+# The info dicts are synthetic, shaped like the yt-dlp extract_info result (many formats with long signed URLs and headers).
+# Usage: python bench_video_info_memory.py [NUMBER_OF_ITEMS]
+import os
+import sys
+import gc
+import time
+import random
+import tracemalloc
+# Add the 'src' directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src')))
+from core.yt_dlp_handler import VideoInfo
+
+NUMBER_OF_ITEMS = int(sys.argv[1]) if len(sys.argv) > 1 else 300# The per item figures are stable from a few hundred items
+FORMATS_PER_ITEM = 60
+
+def random_text(length):
+    # NOTE: hex of seeded random bytes, a unique string per call which is much faster to build than random.choices
+    return random.randbytes((length + 1) // 2).hex()[:length]
+
+def make_info_dict(n):
+    video_id = f"{n:011d}"
+    formats = []
+    for k in range(FORMATS_PER_ITEM):
+        is_audio = k % 4 == 0
+        formats.append({
+            'format_id': str(100 + k),
+            'ext': 'm4a' if is_audio else 'mp4',
+            'acodec': 'mp4a.40.2' if is_audio else 'none',
+            'vcodec': 'none' if is_audio else 'avc1.640028',
+            'abr': 128 + k if is_audio else None,
+            'height': None if is_audio else 144 * (1 + k % 10),
+            'width': None if is_audio else 256 * (1 + k % 10),
+            'fps': None if is_audio else 30,
+            'filesize': 1000000 + k,
+            'url': f"https://rr1---sn-example.googlevideo.com/videoplayback?expire=1700000000&id={video_id}&itag={100 + k}&sig={random_text(900)}",
+            'http_headers': {'User-Agent': random_text(120), 'Accept': 'text/html,application/xhtml+xml', 'Accept-Language': 'en-us,en;q=0.5'},
+            'fragments': [{'url': random_text(200), 'duration': 5.0} for _ in range(3)],
+        })
+    return {
+        'id': video_id,
+        'title': f"Synthetic video {n}",
+        'uploader': "Benchmark channel",
+        'duration': 600,
+        'description': random_text(2000),
+        'upload_date': "20240101",
+        'view_count': 12345,
+        'thumbnail': f"https://i.ytimg.com/vi/{video_id}/maxresdefault.jpg",
+        'average_rating': None,
+        'formats': formats,
+        'automatic_captions': {f"lang{k}": [{'url': random_text(300), 'ext': 'vtt'}] for k in range(50)},
+    }
+
+def measure(compact):
+    VideoInfo.compact = compact
+    random.seed(0)
+    gc.collect()
+    tracemalloc.start()
+    items = []
+    for n in range(NUMBER_OF_ITEMS):
+        items.append(VideoInfo.from_info_dict(f"https://www.youtube.com/watch?v={n:011d}", make_info_dict(n)))
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del items
+    return current / NUMBER_OF_ITEMS
+
+def main():
+    print(f"Benchmark on {NUMBER_OF_ITEMS} items with {FORMATS_PER_ITEM} formats each")
+    start = time.perf_counter()
+    full = measure(compact=False)
+    compact = measure(compact=True)
+    print(f"Full info dict   per item {full / 1024:10.1f} KiB")
+    print(f"Compact mode     per item {compact / 1024:10.1f} KiB")
+    print(f"Reduction x{full / compact:.1f}, projected for 10k items: {10000 * full / 2**20:.0f} MiB -> {10000 * compact / 2**20:.0f} MiB")
+    print(f"Run time {time.perf_counter() - start:.1f} s")
+
+if __name__ == "__main__":
+    main()
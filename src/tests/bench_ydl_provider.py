@@ -0,0 +1,98 @@
+"""
+YouTube Video Downloader
+Copyright (C) 2023 JessyJP
+
+Author: JessyJP
+Year: 2024
+Description: This is a python source script part of the YouTube Video Downloader Suit.
+
+MIT License
+
+Copyright (c) 2024 JessyJP
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+# Benchmark: per item YoutubeDL setup overhead, fresh instance per call vs the thread-local provider.
+# The videos are stubbed locally: tiny files served by a local HTTP server and resolved by the yt-dlp generic extractor.
+import os
+import sys
+import time
+import tempfile
+import threading
+from functools import partial
+from http.server import ThreadingHTTPServer, SimpleHTTPRequestHandler
+# Add the 'src' directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src')))
+from yt_dlp import YoutubeDL
+from core.yt_dlp_provider import YoutubeDLProvider
+
+NUMBER_OF_VIDEOS = 500
+CALLS_PER_ITEM = 3# info + audio + video, as in a combined download
+YDL_OPTS = {'quiet': True, 'no_warnings': True, 'format': 'best'}
+
+class QuietHandler(SimpleHTTPRequestHandler):
+    def log_message(self, format, *args):
+        pass
+
+def make_stub_videos(directory, count):
+    urls = []
+    for n in range(count):
+        filename = f"stub_video_{n}.mp4"
+        with open(os.path.join(directory, filename), 'wb') as f:
+            f.write(b"\x00" * 1024)
+        urls.append(filename)
+    return urls
+
+def run_fresh(urls):
+    for url in urls:
+        for _ in range(CALLS_PER_ITEM):
+            with YoutubeDL(YDL_OPTS) as ydl:
+                ydl.extract_info(url, download=False)
+
+def run_provider(urls):
+    provider = YoutubeDLProvider({'quiet': True, 'no_warnings': True})
+    for url in urls:
+        for _ in range(CALLS_PER_ITEM):
+            with provider.borrow({'format': 'best'}) as ydl:
+                ydl.extract_info(url, download=False)
+    provider.close_all()
+
+def timeit(label, function, urls):
+    start = time.perf_counter()
+    function(urls)
+    elapsed = time.perf_counter() - start
+    print(f"{label:<28} total {elapsed:8.3f} s   per item {1000 * elapsed / len(urls):8.3f} ms")
+    return elapsed
+
+def main():
+    with tempfile.TemporaryDirectory() as directory:
+        files = make_stub_videos(directory, NUMBER_OF_VIDEOS)
+        server = ThreadingHTTPServer(("127.0.0.1", 0), partial(QuietHandler, directory=directory))
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        base_url = f"http://127.0.0.1:{server.server_address[1]}"
+        urls = [f"{base_url}/{filename}" for filename in files]
+
+        print(f"Benchmark on {NUMBER_OF_VIDEOS} locally stubbed videos, {CALLS_PER_ITEM} YoutubeDL calls per item")
+        fresh = timeit("Fresh YoutubeDL per call", run_fresh, urls)
+        pooled = timeit("Thread-local provider", run_provider, urls)
+        print(f"Saved per item: {1000 * (fresh - pooled) / NUMBER_OF_VIDEOS:.3f} ms  (speedup x{fresh / pooled:.2f})")
+        server.shutdown()
+
+if __name__ == "__main__":
+    main()
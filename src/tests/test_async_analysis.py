@@ -0,0 +1,117 @@
+import unittest
+import os
+import sys
+import json
+import time
+import threading
+from types import SimpleNamespace
+# Add the 'src' directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src')))
+from core.async_analysis import AsyncAnalysisEngine, parse_initial_data, collect_browse_entries
+from core.validation_methods import extract_youtube_video_id
+
+PLAYLIST_URL = "https://www.youtube.com/playlist?list=PL123"
+CHANNEL_URL = "https://www.youtube.com/@channel"
+
+def watch_url(video_id):
+    return f"https://www.youtube.com/watch?v={video_id}"
+
+def extract_item(url):
+    # Stub of get_video_info_item_from_url: only the watch URLs are videos
+    video_id = extract_youtube_video_id(url)
+    return SimpleNamespace(video_id=video_id, url=url) if video_id else None
+
+class StubEngine(AsyncAnalysisEngine):
+    # The discovery is replaced, so the tests do not touch the network
+    async def get_playlist_video_urls(self, playlist_url):
+        return [watch_url(f"playlist{n:03d}") for n in range(20)] + [PLAYLIST_URL]
+
+    async def get_channel_urls(self, channel_url):
+        return [watch_url(f"channel{n:04d}") for n in range(10)] + [PLAYLIST_URL]
+
+class TestAsyncAnalysisEngine(unittest.TestCase):
+
+    def make_engine(self, **kwargs):
+        self.items = {}
+        self.claimed = set()
+        self.lock = threading.Lock()
+
+        def on_item(url, item):
+            self.items[item.video_id] = item
+
+        def claim_url(url):
+            with self.lock:
+                if url in self.claimed:
+                    return None
+                self.claimed.add(url)
+                return url
+
+        return StubEngine(extract_item, on_item, claim_url=claim_url, **kwargs)
+
+    def test_recursion_rules(self):
+        """ Test that channels expand playlists, while playlist entries are not expanded again """
+        engine = self.make_engine()
+        stats = engine.run([CHANNEL_URL, watch_url("direct00001")])
+        self.assertEqual(len(self.items), 10 + 20 + 1)
+        self.assertEqual(stats["expanded"], 2)
+        self.assertEqual(stats["skipped"], 1)# The playlist URL listed inside the playlist
+        self.assertEqual(stats["errors"], 0)
+        self.assertEqual(stats["done"], stats["submitted"])
+
+    def test_many_urls_in_flight(self):
+        """ Test that thousands of URLs complete with a bounded executor """
+        engine = self.make_engine(max_extract_workers=4, max_in_flight=5000)
+        urls = [watch_url(f"v{n:010d}") for n in range(5000)]
+        stats = engine.run(urls + urls[:100])
+        self.assertEqual(len(self.items), 5000)
+        self.assertEqual(stats["items"], 5000)
+
+    def test_duplicate_url_claimed_once(self):
+        """ Test that a video listed by a channel and by its playlist is extracted once with the list's claims (all taken on the event loop thread) """
+        from core.video_item_list import VideoItemList
+        class SharedVideoEngine(StubEngine):
+            async def get_playlist_video_urls(self, playlist_url):
+                return [watch_url("shared00001")]
+            async def get_channel_urls(self, channel_url):
+                return [watch_url("shared00001"), PLAYLIST_URL]
+        store = VideoItemList()
+        extracted = []
+        def slow_extract_item(url):
+            item = extract_item(url)
+            if item is not None:
+                extracted.append(url)
+                time.sleep(0.3)# Still in flight when the playlist lists it again
+            return item
+        engine = SharedVideoEngine(slow_extract_item, lambda url, item: store.add_if_absent(item),
+                                   claim_url=store.claim_url, release_url=store.release_url)
+        stats = engine.run([CHANNEL_URL])
+        self.assertEqual(extracted, [watch_url("shared00001")])
+        self.assertEqual(stats["skipped"], 1)
+        self.assertEqual(len(store), 1)
+
+    def test_cancel(self):
+        """ Test that a cancelled engine skips the remaining URLs """
+        engine = self.make_engine(is_cancelled=lambda: True)
+        stats = engine.run([watch_url("direct00001")])
+        self.assertEqual(self.items, {})
+        self.assertEqual(stats["skipped"], 1)
+
+class TestBrowseParsing(unittest.TestCase):
+
+    def test_collect_entries(self):
+        """ Test that the video ids, playlist ids and continuation tokens are found """
+        data = {"contents": [
+            {"playlistVideoRenderer": {"videoId": "aaaaaaaaaaa"}},
+            {"richItemRenderer": {"content": {"videoRenderer": {"videoId": "bbbbbbbbbbb"}}}},
+            {"gridPlaylistRenderer": {"playlistId": "PL1", "thumbnailRenderer": {"videoRenderer": {"videoId": "ccccccccccc"}}}},
+            {"continuationItemRenderer": {"continuationEndpoint": {"continuationCommand": {"token": "TOKEN"}}}},
+        ]}
+        html = f'<script>var ytInitialData = {json.dumps(data)};</script>'
+        video_ids, playlist_ids, tokens = collect_browse_entries(parse_initial_data(html))
+        self.assertEqual(video_ids, ["aaaaaaaaaaa", "bbbbbbbbbbb"])
+        self.assertEqual(playlist_ids, ["PL1"])
+        self.assertEqual(tokens, ["TOKEN"])
+        self.assertEqual(parse_initial_data("<html></html>"), {})
+
+if __name__ == '__main__':
+    unittest.main()
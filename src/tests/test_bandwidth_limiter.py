@@ -0,0 +1,83 @@
+import unittest
+import os
+import sys
+import time
+import threading
+# Add the 'src' directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src')))
+
+from core.limiters import BandwidthLimiter, DownloadCancelled, parse_rate
+
+class TestBandwidthLimiter(unittest.TestCase):
+
+    def test_global_rate(self):
+        """ Test that the consumed bytes are paced to the global rate """
+        limiter = BandwidthLimiter(global_rate=1024 * 1024)
+        start = time.monotonic()
+        with limiter.job("a") as consume:
+            for _ in range(8):
+                consume(64 * 1024)
+        elapsed = time.monotonic() - start
+        self.assertGreater(elapsed, 0.4)
+        self.assertEqual(limiter.get_stats()["bytes_total"], 8 * 64 * 1024)
+
+    def test_fair_share(self):
+        """ Test that the global rate is split between the running jobs and rebalanced when one finishes """
+        limiter = BandwidthLimiter(global_rate=1000, job_rate=800)
+        with limiter.job("a"):
+            self.assertEqual(limiter.get_job_rate("a"), 800)
+            with limiter.job("b"):
+                self.assertEqual(limiter.get_job_rate("a"), 500)
+                self.assertEqual(limiter.get_job_rate("b"), 500)
+                limiter.set_limits(global_rate=3000)
+                self.assertEqual(limiter.get_job_rate("b"), 800)
+            self.assertEqual(limiter.get_stats()["active_jobs"], 1)
+        self.assertEqual(limiter.get_stats()["active_jobs"], 0)
+
+    def test_concurrent_jobs(self):
+        """ Test that concurrent jobs share the global rate """
+        limiter = BandwidthLimiter(global_rate=2 * 1024 * 1024)
+        def job(job_id):
+            with limiter.job(job_id) as consume:
+                for _ in range(8):
+                    consume(64 * 1024)
+        threads = [threading.Thread(target=job, args=(n,)) for n in range(2)]
+        start = time.monotonic()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertGreater(time.monotonic() - start, 0.4)
+
+    def test_unlimited(self):
+        """ Test that a rate of 0 does not block """
+        limiter = BandwidthLimiter()
+        start = time.monotonic()
+        with limiter.job("a") as consume:
+            consume(1024 ** 3)
+        self.assertLess(time.monotonic() - start, 0.1)
+
+    def test_abort(self):
+        """ Test that an aborted job fails at its next chunk and the others carry on """
+        limiter = BandwidthLimiter()
+        with limiter.job("a") as consume_a, limiter.job("b") as consume_b:
+            consume_a(100)
+            self.assertEqual(limiter.get_job_bytes("a"), 100)
+            self.assertEqual(limiter.abort(["a", "not running"]), 1)
+            with self.assertRaises(DownloadCancelled):
+                consume_a(100)
+            consume_b(100)
+        # A new run of the same item is not aborted
+        with limiter.job("a") as consume_a:
+            consume_a(100)
+        self.assertEqual(limiter.get_job_bytes("a"), 0)
+
+    def test_parse_rate(self):
+        """ Test the rate strings """
+        self.assertEqual(parse_rate("500K"), 500 * 1024)
+        self.assertEqual(parse_rate("2M"), 2 * 1024 ** 2)
+        self.assertEqual(parse_rate("100"), 100)
+        self.assertEqual(parse_rate(""), 0)
+
+if __name__ == '__main__':
+    unittest.main()
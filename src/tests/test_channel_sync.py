@@ -0,0 +1,98 @@
+import unittest
+import os
+import sys
+import tempfile
+import importlib.util
+# Add the 'src' directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src')))
+
+def make_entries(ids, first_timestamp=1000):
+    # Newest first, as the uploads tab lists them
+    return [{'id': video_id, 'timestamp': first_timestamp - n} for n, video_id in enumerate(ids)]
+
+@unittest.skipUnless(importlib.util.find_spec("yt_dlp"), "yt-dlp is not installed")
+class TestChannelSync(unittest.TestCase):
+
+    def test_uploads_url_and_key(self):
+        """ Test that the channel URLs are normalised to the uploads tab and to one key per channel """
+        from core.channel_sync import get_uploads_url, get_channel_key
+        self.assertEqual(get_uploads_url("https://www.youtube.com/@SomeChannel"), "https://www.youtube.com/@SomeChannel/videos")
+        self.assertEqual(get_uploads_url("youtube.com/@SomeChannel/"), "https://youtube.com/@SomeChannel/videos")
+        self.assertEqual(get_uploads_url("https://www.youtube.com/@SomeChannel/streams"), "https://www.youtube.com/@SomeChannel/streams")
+        self.assertEqual(get_channel_key("https://www.youtube.com/@SomeChannel"), get_channel_key("m.youtube.com/@somechannel/videos"))
+
+    def test_first_sync_lists_all(self):
+        """ Test that a channel without a state lists all the uploads, up to the limit """
+        from core.channel_sync import list_new_entries
+        entries = make_entries(["a", "b", "c", "d"])
+        self.assertEqual([e['id'] for e in list_new_entries("@ch", None, entries=iter(entries))], ["a", "b", "c", "d"])
+        self.assertEqual([e['id'] for e in list_new_entries("@ch", None, max_entries=2, entries=iter(entries))], ["a", "b"])
+
+    def test_stops_at_known_upload(self):
+        """ Test that the listing stops at the first known upload and does not consume the rest """
+        from core.channel_sync import list_new_entries
+        def entries():
+            yield from make_entries(["new1", "new2", "old1"])
+            self.fail("The listing went past the known upload")
+        state = {"known_ids": ["old1", "old2"], "newest_timestamp": None}
+        self.assertEqual([e['id'] for e in list_new_entries("@ch", state, entries=entries())], ["new1", "new2"])
+        # A deleted newest upload is covered by the timestamp
+        state = {"known_ids": ["deleted"], "newest_timestamp": 998}
+        self.assertEqual([e['id'] for e in list_new_entries("@ch", state, entries=iter(make_entries(["x", "y", "z"])))], ["x", "y"])
+
+    def test_state_round_trip(self):
+        """ Test that the synced state is saved and reloaded, and the next sync only sees the new uploads """
+        from core.channel_sync import ChannelSyncState, list_new_entries, SYNC_STATE_FILENAME
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, SYNC_STATE_FILENAME)
+            state = ChannelSyncState(path)
+            state.update("https://www.youtube.com/@ch", make_entries(["b", "c"]))
+            state.save()
+
+            reloaded = ChannelSyncState(path)
+            channel = reloaded.get("youtube.com/@ch/videos")
+            self.assertEqual((channel["newest_id"], channel["newest_timestamp"], channel["known_ids"]), ("b", 1000, ["b", "c"]))
+            new_entries = list_new_entries("@ch", channel, entries=iter(make_entries(["a", "b", "c"], 1001)))
+            self.assertEqual([e['id'] for e in new_entries], ["a"])
+            self.assertFalse(os.path.exists(path + ".tmp"))
+
+    def test_capped_sync_continues(self):
+        """ Test that a sync cut by the entry limit does not mark the older uploads as known, the next sync lists them """
+        from core.channel_sync import ChannelSyncState, list_new_entries
+        with tempfile.TemporaryDirectory() as temp_dir:
+            state = ChannelSyncState(os.path.join(temp_dir, "state.json"))
+            uploads = make_entries(["a", "b", "c", "d", "e"])
+            entries = list_new_entries("@ch", None, max_entries=2, entries=iter(uploads))
+            state.update("@ch", entries, complete=False)
+            entries = list_new_entries("@ch", state.get("@ch"), max_entries=2, entries=iter(uploads))
+            self.assertEqual([e['id'] for e in entries], ["c", "d"])
+            state.update("@ch", entries, complete=False)
+            entries = list_new_entries("@ch", state.get("@ch"), max_entries=2, entries=iter(uploads))
+            self.assertEqual([e['id'] for e in entries], ["e"])
+            state.update("@ch", entries, complete=True)
+
+            # The complete listing advances the known content past all the taken uploads
+            channel = state.get("@ch")
+            self.assertEqual((channel["newest_id"], channel["newest_timestamp"]), ("a", 1000))
+            self.assertEqual(channel["known_ids"], ["a", "b", "c", "d", "e"])
+            self.assertNotIn("taken_ids", channel)
+            self.assertEqual(list_new_entries("@ch", channel, entries=iter(make_entries(["new", "a", "b"], 1001))), [{'id': "new", 'timestamp': 1001}])
+
+    def test_pending_until_downloaded(self):
+        """ Test that the synced uploads stay pending until they are downloaded, and are saved with the state """
+        from core.channel_sync import ChannelSyncState
+        with tempfile.TemporaryDirectory() as temp_dir:
+            path = os.path.join(temp_dir, "state.json")
+            state = ChannelSyncState(path)
+            state.update("@ch", [{'id': "b", 'title': "B", 'url': "https://www.youtube.com/watch?v=b", 'thumbnails': [{'url': "small"}, {'url': "large"}]}])
+            state.update("@ch", make_entries(["a"], 1001), downloaded_ids=["unrelated"])
+            self.assertEqual([entry['id'] for entry in state.get_pending("@ch")], ["a", "b"])
+            self.assertEqual(state.get_pending("@ch")[1]["thumbnail"], "large")
+            state.update("@ch", [], downloaded_ids=["b"])
+            state.save()
+            self.assertEqual(ChannelSyncState(path).get_pending("@ch"), [{'id': "a", 'timestamp': 1001}])
+            self.assertEqual(state.get_pending("@other"), [])
+#end
+
+if __name__ == '__main__':
+    unittest.main()
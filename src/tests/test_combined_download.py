@@ -0,0 +1,86 @@
+import unittest
+import os
+import sys
+import shutil
+import tempfile
+import importlib.util
+from types import SimpleNamespace
+from unittest.mock import patch, MagicMock
+# Add the 'src' directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src')))
+
+LIMITS = SimpleNamespace(bitrate="max", resolution="max", fps="max", audio_format_priority=[], video_format_priority=[])
+INFO = {
+    'id': 'abcdefghijk', 'title': 'Combined video', 'extractor': 'generic', 'extractor_key': 'Generic',
+    'formats': [
+        {'format_id': '140', 'url': 'http://127.0.0.1/audio.m4a', 'ext': 'm4a', 'acodec': 'mp4a.40.2', 'vcodec': 'none', 'abr': 128.0},
+        {'format_id': '137', 'url': 'http://127.0.0.1/video.mp4', 'ext': 'mp4', 'acodec': 'none', 'vcodec': 'avc1', 'height': 360, 'fps': 25.0},
+    ],
+}
+
+def write_file(path: str) -> str:
+    with open(path, "wb") as f:
+        f.write(b"0")
+    return path
+
+@unittest.skipUnless(all(importlib.util.find_spec(m) for m in ("yt_dlp", "PIL", "requests", "ffmpeg")), "yt-dlp handler dependencies are not installed")
+class TestCombinedDownload(unittest.TestCase):
+    """ The combined-only download is a single yt-dlp pass without the concurrent stream fetch, else a concurrent fetch and mux """
+
+    def setUp(self):
+        from core.yt_dlp_handler import VideoInfo
+        from core.metadata_cache import CACHE_OFF
+        from core.download_options import setOutputKeepsStr
+        self.output_dir = tempfile.mkdtemp()
+        self.patches = [patch.object(VideoInfo, 'cache_mode', CACHE_OFF), patch.object(VideoInfo, 'compact', False),
+                        patch('core.yt_dlp_handler.get_mux_tool_order', return_value=["ffmpeg"])]
+        for p in self.patches:
+            p.start()
+        self.item = VideoInfo.from_info_dict("https://www.youtube.com/watch?v=abcdefghijk", dict(INFO), setOutputKeepsStr(combined=True))
+
+    def tearDown(self):
+        for p in self.patches:
+            p.stop()
+        shutil.rmtree(self.output_dir)
+
+    def download(self, concurrent_streams: bool, mux_stage=None):
+        from core.yt_dlp_handler import VideoInfo
+        fetched = []
+        def fetch_stream(item, download_function, stream, output, segments=1):
+            fetched.append(stream['format_id'])
+            return write_file(os.path.join(output, f"{stream['format_id']}.part"))
+        with patch.object(VideoInfo, 'concurrent_streams', concurrent_streams), \
+             patch.object(VideoInfo, 'download_combined', side_effect=lambda video, audio, output, ext: write_file(os.path.join(output, "merged" + ext))) as download_combined, \
+             patch.object(VideoInfo, 'fetch_stream', fetch_stream), \
+             patch('core.yt_dlp_handler.combine_via_auto_selection', side_effect=lambda output, *args: write_file(output)) as combine:
+            self.item.process_downloads_combine_keep(LIMITS, self.output_dir, ".mkv", mux_stage=mux_stage)
+        return download_combined, sorted(fetched), combine
+
+    def test_single_pass(self):
+        """ Test that without the concurrent fetch yt-dlp fetches and merges in one pass, even with a mux stage """
+        mux_stage = MagicMock()
+        download_combined, fetched, combine = self.download(concurrent_streams=False, mux_stage=mux_stage)
+        self.assertEqual(download_combined.call_count, 1)
+        self.assertEqual(fetched, [])
+        combine.assert_not_called()
+        mux_stage.submit.assert_not_called()
+        self.assertEqual(os.listdir(self.output_dir), ["Combined video.mkv"])
+
+    def test_concurrent_fetch_and_mux(self):
+        """ Test that the concurrent fetch downloads both streams and muxes them """
+        download_combined, fetched, combine = self.download(concurrent_streams=True)
+        download_combined.assert_not_called()
+        self.assertEqual(fetched, ["137", "140"])
+        self.assertEqual(combine.call_count, 1)
+        self.assertEqual(os.listdir(self.output_dir), ["Combined video.mkv"])
+
+    def test_single_pass_needs_ffmpeg(self):
+        """ Test that the single pass is skipped when the mux tool for the container is not ffmpeg """
+        with patch('core.yt_dlp_handler.get_mux_tool_order', return_value=["mkvmerge", "ffmpeg"]):
+            download_combined, fetched, combine = self.download(concurrent_streams=False)
+        download_combined.assert_not_called()
+        self.assertEqual(fetched, ["137", "140"])
+        self.assertEqual(combine.call_count, 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,96 @@
+import unittest
+import os
+import sys
+import threading
+import time
+# Add the 'src' directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src')))
+from core.custom_thread import CustomThread, CustomThreadPool, TaskGroup
+
+class TestCustomThreadPool(unittest.TestCase):
+
+    def setUp(self):
+        CustomThread.reset_threads()
+        self.pool = CustomThreadPool(max_workers=2)
+
+    def tearDown(self):
+        self.pool.shutdown(wait=True)
+        CustomThread.reset_threads()
+
+    def test_recursive_submit_respects_cap(self):
+        """ Test that recursive submissions share the cap and do not deadlock """
+        lock = threading.Lock()
+        running = [0]
+        peak = [0]
+
+        def work(depth):
+            with lock:
+                running[0] += 1
+                peak[0] = max(peak[0], running[0])
+            time.sleep(0.005)
+            if depth < 3:
+                for _ in range(3):
+                    self.pool.submit(work, args=(depth + 1,))
+            with lock:
+                running[0] -= 1
+
+        self.pool.submit(work, args=(0,))
+        self.assertTrue(self.pool.wait_for_all(timeout=10))
+        self.assertLessEqual(peak[0], 2)
+
+        # 1 + 3 + 9 + 27 tasks in total
+        stats = CustomThread.get_multithread_stats()
+        self.assertEqual(stats["total_threads"], 40)
+        self.assertEqual(stats["successful_threads"], 40)
+        self.assertEqual(stats["active_threads"], 0)
+        self.assertEqual(stats["queued_threads"], 0)
+
+    def test_stats_count_errors_and_queued(self):
+        """ Test that the stats report the queued and errored tasks """
+        gate = threading.Event()
+
+        def blocked():
+            gate.wait()
+
+        def failing():
+            raise ValueError("failed")
+
+        for _ in range(2):
+            self.pool.submit(blocked)
+        self.pool.submit(failing)
+        time.sleep(0.05)
+
+        stats = CustomThread.get_multithread_stats()
+        self.assertEqual(stats["active_threads"], 3)
+        self.assertEqual(stats["queued_threads"], 1)
+
+        gate.set()
+        self.pool.wait_for_all(timeout=10)
+        stats = CustomThread.get_multithread_stats()
+        self.assertEqual(stats["successful_threads"], 2)
+        self.assertEqual(stats["errored_threads"], 1)
+
+    def test_group_waits_only_for_its_tasks(self):
+        """ Test that a group includes its recursive tasks and does not wait for the tasks of another group """
+        gate = threading.Event()
+        done = []
+
+        def work(depth):
+            time.sleep(0.005)
+            if depth < 2:
+                for _ in range(2):
+                    self.pool.submit(work, args=(depth + 1,))
+            done.append(depth)
+
+        blocked_group, group = TaskGroup(), TaskGroup()
+        self.pool.submit(gate.wait, group=blocked_group)
+        self.pool.submit(work, args=(0,), group=group)
+        self.assertTrue(self.pool.wait_for_group(group, timeout=10))
+        # 1 + 2 + 4 tasks, all done while the other group still runs
+        self.assertEqual(len(done), 7)
+        self.assertFalse(self.pool.wait_for_group(blocked_group, timeout=0.05))
+        gate.set()
+        self.assertTrue(self.pool.wait_for_group(blocked_group, timeout=10))
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+import unittest
+import os
+import sys
+import threading
+# Add the 'src' directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src')))
+
+from core.download_jobs import DownloadJobQueue, JOB_QUEUED, JOB_RUNNING, JOB_DONE, JOB_CANCELLED, JOB_ERROR
+
+class TestDownloadJobQueue(unittest.TestCase):
+
+    def test_submit_returns_immediately(self):
+        """ Test that submit returns the queued job while the jobs run in FIFO order in the background """
+        release = threading.Event()
+        order = []
+        def run(job):
+            release.wait(5)
+            order.append(job.params["name"])
+        queue = DownloadJobQueue(run)
+        first = queue.submit(["a"], name="first")
+        second = queue.submit(["b"], name="second")
+        self.assertEqual(second.state, JOB_QUEUED)
+        self.assertIs(queue.get(first.job_id), first)
+        release.set()
+        self.assertTrue(queue.wait_for_all(5))
+        self.assertEqual(order, ["first", "second"])
+        self.assertEqual((first.state, second.state), (JOB_DONE, JOB_DONE))
+        self.assertEqual(queue.get_stats()[JOB_DONE], 2)
+
+    def test_active_items_are_not_resubmitted(self):
+        """ Test that an item belongs to one active job only and is released when the job finishes """
+        release = threading.Event()
+        queue = DownloadJobQueue(lambda job: release.wait(5))
+        queue.submit(["a", "b"])
+        job = queue.submit(["b", "c", "c"])
+        self.assertEqual(job.video_ids, ["c"])
+        with self.assertRaises(ValueError):
+            queue.submit(["a", "c"])
+        release.set()
+        self.assertTrue(queue.wait_for_all(5))
+        self.assertEqual(queue.submit(["a"]).video_ids, ["a"])
+
+    def test_cancel(self):
+        """ Test that a queued job is dropped and a running one is signalled and aborted """
+        started = threading.Event()
+        aborted = []
+        idle = threading.Event()
+        def run(job):
+            started.set()
+            job.cancel_event.wait(5)
+        queue = DownloadJobQueue(run, cancel_function=lambda job: aborted.append(job.job_id), on_idle=idle.set)
+        running = queue.submit(["a"])
+        queued = queue.submit(["b"])
+        self.assertTrue(started.wait(5))
+        self.assertEqual(running.state, JOB_RUNNING)
+
+        self.assertTrue(queue.cancel(queued.job_id))
+        self.assertEqual(queued.state, JOB_CANCELLED)
+        self.assertEqual(aborted, [])
+        self.assertTrue(queue.cancel(running.job_id))
+        self.assertEqual(aborted, [running.job_id])
+        self.assertTrue(queue.wait_for_all(5))
+        self.assertTrue(idle.wait(5))
+        self.assertEqual(running.state, JOB_CANCELLED)
+        self.assertFalse(queue.cancel(running.job_id))
+        self.assertFalse(queue.cancel("unknown"))
+
+    def test_failed_job(self):
+        """ Test that an exception of the run function marks the job as failed and the queue carries on """
+        def run(job):
+            if job.params["fail"]:
+                raise RuntimeError("boom")
+        queue = DownloadJobQueue(run)
+        failed = queue.submit(["a"], fail=True)
+        done = queue.submit(["b"], fail=False)
+        self.assertTrue(queue.wait_for_all(5))
+        self.assertEqual((failed.state, failed.error), (JOB_ERROR, "boom"))
+        self.assertEqual(done.state, JOB_DONE)
+
+    def test_finished_jobs_are_pruned(self):
+        """ Test that only the newest finished jobs are kept """
+        queue = DownloadJobQueue(lambda job: None, max_finished_kept=2)
+        jobs = [queue.submit([str(n)]) for n in range(4)]
+        self.assertTrue(queue.wait_for_all(5))
+        self.assertEqual([job.job_id for job in queue.get_jobs()], [job.job_id for job in jobs[2:]])
+#end
+
+if __name__ == '__main__':
+    unittest.main()
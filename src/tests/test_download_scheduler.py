@@ -0,0 +1,120 @@
+import unittest
+import os
+import sys
+import threading
+import time
+# Add the 'src' directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src')))
+from core.download_scheduler import DownloadScheduler, HostLimiter
+
+class TestDownloadScheduler(unittest.TestCase):
+
+    def test_worker_limit(self):
+        """ Test that no more than max_workers items run at the same time """
+        lock = threading.Lock()
+        running = [0]
+        peak = [0]
+
+        def work(n):
+            with lock:
+                running[0] += 1
+                peak[0] = max(peak[0], running[0])
+            time.sleep(0.01)
+            with lock:
+                running[0] -= 1
+
+        with DownloadScheduler(work, max_workers=3) as scheduler:
+            for n in range(30):
+                scheduler.submit(n)
+
+        self.assertLessEqual(peak[0], 3)
+        self.assertEqual(scheduler.get_stats()["completed"], 30)
+
+    def test_priority_then_fifo_order(self):
+        """ Test that a single worker serves lower priority values first and FIFO within a priority """
+        order = []
+        gate = threading.Event()
+
+        def work(n):
+            gate.wait()
+            order.append(n)
+
+        scheduler = DownloadScheduler(work, max_workers=1, max_queued=10)
+        scheduler.start()
+        scheduler.submit("blocker")
+        time.sleep(0.05)# Let the worker pick up the blocker so the rest stay queued
+        scheduler.submit("b1", priority=1)
+        scheduler.submit("a1", priority=0)
+        scheduler.submit("b2", priority=1)
+        scheduler.submit("a2", priority=0)
+        gate.set()
+        scheduler.join()
+
+        self.assertEqual(order, ["blocker", "a1", "a2", "b1", "b2"])
+
+    def test_errors_are_counted(self):
+        """ Test that a failing item does not stop the worker """
+        def work(n):
+            if n % 2:
+                raise ValueError("odd")
+
+        with DownloadScheduler(work, max_workers=2) as scheduler:
+            for n in range(10):
+                scheduler.submit(n)
+
+        stats = scheduler.get_stats()
+        self.assertEqual(stats["completed"], 5)
+        self.assertEqual(stats["errors"], 5)
+
+class TestHostLimiter(unittest.TestCase):
+
+    def test_per_host_cap(self):
+        """ Test that the fetches are capped per host and not across hosts """
+        limiter = HostLimiter(max_per_host=2)
+        lock = threading.Lock()
+        active, peak = {}, {}
+
+        def fetch(url, host):
+            with limiter.slot(url):
+                with lock:
+                    active[host] = active.get(host, 0) + 1
+                    peak[host] = max(peak.get(host, 0), active[host])
+                time.sleep(0.02)
+                with lock:
+                    active[host] -= 1
+
+        threads = [threading.Thread(target=fetch, args=(f"https://{host}.googlevideo.com/videoplayback?n={n}", host))
+                   for host in ("rr1", "rr2") for n in range(6)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        self.assertEqual(peak, {"rr1": 2, "rr2": 2})
+
+    def test_several_slots_at_once(self):
+        """ Test that the slots of several URLs are held together and a changed cap applies to the held slots """
+        limiter = HostLimiter(max_per_host=2)
+        video, audio = "https://rr1.googlevideo.com/video", "https://rr1.googlevideo.com/audio"
+        acquired = threading.Event()
+
+        def fetch():
+            with limiter.slot(video):
+                acquired.set()
+
+        with limiter.slot(video, audio):
+            self.assertEqual(limiter.get_in_use(video), 2)
+            t = threading.Thread(target=fetch)
+            t.start()
+            self.assertFalse(acquired.wait(0.05))
+        t.join(1)
+        self.assertTrue(acquired.is_set())
+        # The connection count is capped to the per host cap, and a lower cap holds the new fetches
+        with limiter.connections(video, count=8) as granted:
+            self.assertEqual(granted, 2)
+            limiter.set_max_per_host(1)
+        self.assertEqual(limiter.get_in_use(video), 0)
+        with limiter.connections(video, count=8) as granted:
+            self.assertEqual(granted, 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,95 @@
+import unittest
+import os
+import sys
+import json
+import threading
+# Add the 'src' directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src')))
+
+from web.event_stream import EventBroker, RESYNC_EVENT
+
+def parse_frames(chunk: bytes) -> list:
+    # (id, event, data) of the SSE frames of a chunk, the comments and the retry hint are skipped
+    frames = []
+    for block in chunk.decode('utf-8').split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines() if ": " in line and not line.startswith(":"))
+        if "event" in fields:
+            frames.append((int(fields["id"]), fields["event"], json.loads(fields["data"])))
+    return frames
+
+class TestEventBroker(unittest.TestCase):
+
+    def test_stream_from_now(self):
+        """ Test that a new subscriber only gets the events published after it connected """
+        broker = EventBroker()
+        broker.publish("status", {"msg": "before"})
+        stream = broker.stream(keepalive=0.05)
+        self.assertEqual(next(stream), b"retry: 3000\n\n")
+        broker.publish("status", {"msg": "after"})
+        broker.publish("progress", {"value": 50})
+        # The events published meanwhile come in one chunk
+        self.assertEqual(parse_frames(next(stream)), [(2, "status", {"msg": "after"}), (3, "progress", {"value": 50})])
+        self.assertEqual(next(stream), b": keep-alive\n\n")
+        self.assertEqual(broker.get_stats()["subscribers"], 1)
+        stream.close()
+        self.assertEqual(broker.get_stats()["subscribers"], 0)
+
+    def test_reconnect_replay(self):
+        """ Test that a reconnect replays the events after its Last-Event-ID """
+        broker = EventBroker()
+        for n in range(5):
+            broker.publish("item", {"n": n})
+        stream = broker.stream(last_id=3, keepalive=0.05)
+        next(stream)
+        self.assertEqual([data["n"] for _, _, data in parse_frames(next(stream))], [3, 4])
+
+    def test_publish_encoded(self):
+        """ Test that pre-encoded data gives the same frame as the data published as an object """
+        broker = EventBroker()
+        broker.publish("item", {"n": 1, "title": "é"})
+        broker.publish_encoded("item", json.dumps({"n": 1, "title": "é"}, separators=(',', ':')).encode('utf-8'))
+        frames, last_id, missed = broker.get_frames_since(0)
+        self.assertEqual((last_id, missed), (2, False))
+        self.assertEqual(frames[0].replace(b"id: 1", b"id: 2"), frames[1])
+
+    def test_resync(self):
+        """ Test that a Last-Event-ID out of the buffer or from an earlier server run gets a resync """
+        broker = EventBroker(max_buffered=3)
+        for n in range(10):
+            broker.publish("item", {"n": n})
+        frames, last_id, missed = broker.get_frames_since(7)
+        self.assertEqual((len(frames), last_id, missed), (3, 10, False))
+        self.assertTrue(broker.get_frames_since(6)[2])
+        self.assertTrue(broker.get_frames_since(42)[2])
+        stream = broker.stream(last_id=2, keepalive=0.05)
+        next(stream)
+        self.assertEqual(parse_frames(next(stream)), [(10, RESYNC_EVENT, {})])
+
+    def test_concurrent_subscribers(self):
+        """ Test that every subscriber gets every event once """
+        broker = EventBroker()
+        received = [[] for _ in range(4)]
+        closed = threading.Event()
+        def subscriber(n, ready):
+            stream = broker.stream(keepalive=0.05, closed=closed)
+            next(stream)
+            ready.set()
+            for chunk in stream:
+                received[n] += [data["n"] for _, _, data in parse_frames(chunk)]
+        threads = []
+        for n in range(4):
+            ready = threading.Event()
+            threads.append(threading.Thread(target=subscriber, args=(n, ready)))
+            threads[-1].start()
+            ready.wait(5)
+        for n in range(100):
+            broker.publish("item", {"n": n})
+        closed.set()
+        for thread in threads:
+            thread.join(5)
+        for events in received:
+            self.assertEqual(events, list(range(100)))
+#end
+
+if __name__ == '__main__':
+    unittest.main()
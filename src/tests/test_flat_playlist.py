@@ -0,0 +1,49 @@
+import unittest
+import os
+import sys
+import importlib.util
+from unittest.mock import patch
+# Add the 'src' directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src')))
+
+FLAT_ENTRY = {
+    '_type': 'url', 'ie_key': 'Youtube', 'id': 'dQw4w9WgXcQ', 'url': 'https://www.youtube.com/watch?v=dQw4w9WgXcQ',
+    'title': 'Flat entry', 'channel': 'Some channel', 'duration': 212, 'view_count': 10,
+    'thumbnails': [{'url': 'https://i.ytimg.com/small.jpg'}, {'url': 'https://i.ytimg.com/large.jpg'}],
+}
+FULL_INFO = {
+    'id': 'dQw4w9WgXcQ', 'title': 'Full title', 'uploader': 'Some channel', 'duration': 212,
+    'formats': [
+        {'format_id': '140', 'acodec': 'mp4a.40.2', 'vcodec': 'none', 'abr': 128.0, 'filesize': 1000},
+        {'format_id': '137', 'acodec': 'none', 'vcodec': 'avc1', 'height': 1080, 'fps': 30, 'filesize': 9000},
+    ],
+}
+
+@unittest.skipUnless(all(importlib.util.find_spec(m) for m in ("yt_dlp", "PIL", "requests")), "yt-dlp handler dependencies are not installed")
+class TestFlatPlaylistStubs(unittest.TestCase):
+
+    def test_stub_from_flat_entry(self):
+        """ Test that a flat entry becomes a displayable stub which resolves its formats before the download """
+        from core.yt_dlp_handler import VideoInfo
+        stub = VideoInfo.from_flat_entry(FLAT_ENTRY)
+        self.assertTrue(stub.is_stub())
+        self.assertTrue(stub.formats_stale)
+        self.assertEqual((stub.video_id, stub.title, stub.author, stub.length), ('dQw4w9WgXcQ', 'Flat entry', 'Some channel', 212))
+        self.assertEqual(stub.thumbnail_url, 'https://i.ytimg.com/large.jpg')
+        self.assertEqual(stub.quality_str, "Unknown")
+
+    def test_enrich(self):
+        """ Test that the enrichment fills in the full info and keeps the listing order timestamp """
+        from core.yt_dlp_handler import VideoInfo
+        from core.metadata_cache import CACHE_OFF
+        stub = VideoInfo.from_flat_entry(FLAT_ENTRY)
+        listed_at = stub.creationTimestamp
+        with patch.object(VideoInfo, 'cache_mode', CACHE_OFF), patch.object(VideoInfo, 'extract_info', lambda self: dict(FULL_INFO)):
+            stub.enrich()
+        self.assertFalse(stub.is_stub())
+        self.assertEqual(stub.title, 'Full title')
+        self.assertEqual(stub.quality_str, "1080p@30fps/128.0kbps")
+        self.assertEqual(stub.creationTimestamp, listed_at)
+
+if __name__ == '__main__':
+    unittest.main()
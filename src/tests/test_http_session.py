@@ -0,0 +1,76 @@
+import unittest
+import os
+import sys
+import threading
+import importlib.util
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+# Add the 'src' directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src')))
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"# Keep-alive
+    failures = 0
+
+    def do_GET(self):
+        if self.path == "/flaky" and StubHandler.failures < 1:
+            StubHandler.failures += 1
+            status, body = 503, b"busy"
+        else:
+            status, body = 200, b"thumbnail"
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_POST(self):
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        self.do_GET()
+
+    def log_message(self, *args):
+        pass
+
+@unittest.skipUnless(importlib.util.find_spec("requests"), "requests is not installed")
+class TestHttpClient(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_address[1]}"
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+
+    def setUp(self):
+        from core.http_session import HttpClient
+        self.client = HttpClient(per_host_limit=2, backoff_factor=0)
+
+    def tearDown(self):
+        self.client.close()
+
+    def test_connection_reuse(self):
+        """ Test that sequential requests to one host share a keep-alive connection """
+        for _ in range(10):
+            self.assertEqual(self.client.get(self.base_url + "/thumb.jpg").content, b"thumbnail")
+        stats = self.client.get_stats()
+        self.assertEqual(stats["requests"], 10)
+        self.assertEqual(stats["new_connections"], 1)
+        self.assertEqual(stats["reused_connections"], 9)
+
+    def test_retry_on_unavailable(self):
+        """ Test that a 503 is retried """
+        StubHandler.failures = 0
+        response = self.client.get(self.base_url + "/flaky")
+        self.assertEqual(response.status_code, 200)
+        self.assertGreaterEqual(self.client.get_stats()["retries"], 1)
+
+    def test_no_retry_on_post(self):
+        """ Test that a failed POST is not repeated, it may not be idempotent """
+        StubHandler.failures = 0
+        response = self.client.post(self.base_url + "/flaky", data=b"form")
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(self.client.get_stats()["retries"], 0)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,80 @@
+import unittest
+import os
+import sys
+import tempfile
+# Add the 'src' directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src')))
+from core.job_journal import JobJournal, get_partial_bytes, STAGE_QUEUED, STAGE_DOWNLOADING, STAGE_DONE
+
+class TestJobJournal(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp_dir.name, "journal.jsonl")
+        self.journal = JobJournal(self.path, fsync=False)
+
+    def tearDown(self):
+        self.journal.close()
+        self.tmp_dir.cleanup()
+
+    def reopen(self, **kwargs):
+        self.journal.close()
+        self.journal = JobJournal(self.path, fsync=False, **kwargs)
+
+    def test_checkpoints_replay_after_restart(self):
+        """ Test that the merged job state survives a restart """
+        self.journal.checkpoint("a", stage=STAGE_QUEUED, url="https://www.youtube.com/watch?v=a")
+        self.journal.checkpoint("a", stage=STAGE_DOWNLOADING, audio_format_id="140", bytes_done=1024)
+        self.journal.checkpoint("b", stage=STAGE_DONE, outputs={"C": "/out/b.mkv"})
+        self.reopen()
+        job = self.journal.get("a")
+        self.assertEqual(job["stage"], STAGE_DOWNLOADING)
+        self.assertEqual(job["url"], "https://www.youtube.com/watch?v=a")
+        self.assertEqual(job["audio_format_id"], "140")
+        self.assertEqual([job["video_id"] for job in self.journal.get_pending()], ["a"])
+        self.assertEqual(self.journal.get_stage("b"), STAGE_DONE)
+
+    def test_torn_write_is_ignored(self):
+        """ Test that a partially written last line does not break the replay """
+        self.journal.checkpoint("a", stage=STAGE_QUEUED)
+        self.journal.close()
+        with open(self.path, "a", encoding="utf-8") as f:
+            f.write('{"video_id":"a","stage":"do')
+        self.reopen()
+        self.assertEqual(self.journal.get_stage("a"), STAGE_QUEUED)
+
+    def test_remove_and_compact(self):
+        """ Test that the compaction keeps one record per job """
+        self.reopen(compact_threshold=10)
+        for n in range(30):
+            self.journal.checkpoint("a", stage=STAGE_DOWNLOADING, bytes_done=n)
+        self.journal.checkpoint("b", stage=STAGE_QUEUED)
+        self.journal.remove("b")
+        self.reopen()
+        self.assertIsNone(self.journal.get("b"))
+        self.assertEqual(self.journal.get("a")["bytes_done"], 29)
+        with open(self.path, encoding="utf-8") as f:
+            self.assertLess(len(f.readlines()), 30)
+
+    def test_compact_drops_done_jobs(self):
+        """ Test that the compaction keeps only the unfinished jobs """
+        self.reopen(compact_threshold=10)
+        for n in range(20):
+            self.journal.checkpoint(f"done{n}", stage=STAGE_DONE)
+        self.journal.checkpoint("a", stage=STAGE_DOWNLOADING)
+        self.journal.compact()
+        self.reopen()
+        self.assertEqual([job["video_id"] for job in self.journal.get_jobs()], ["a"])
+        self.assertIsNone(self.journal.get_stage("done0"))
+
+    def test_partial_bytes(self):
+        """ Test the bytes on disk of a temp dir """
+        temp_path = os.path.join(self.tmp_dir.name, ".a")
+        os.makedirs(temp_path)
+        with open(os.path.join(temp_path, "x.part"), "wb") as f:
+            f.write(b"0" * 100)
+        self.assertEqual(get_partial_bytes(temp_path), 100)
+        self.assertEqual(get_partial_bytes(os.path.join(self.tmp_dir.name, "missing")), 0)
+
+if __name__ == '__main__':
+    unittest.main()
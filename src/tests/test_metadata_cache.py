@@ -0,0 +1,116 @@
+import unittest
+import os
+import sys
+import time
+import tempfile
+# Add the 'src' directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src')))
+from core.metadata_cache import MetadataCache, URL_EXPIRY_MARGIN
+from core.validation_methods import extract_youtube_video_id
+
+def make_info(video_id, description=""):
+    return {
+        "id": video_id,
+        "title": f"Title {video_id}",
+        "description": description,
+        "formats": [{"format_id": "140", "acodec": "mp4a", "vcodec": "none", "abr": 128, "url": "https://signed"}],
+        "http_headers": {"User-Agent": "dropped"},
+    }
+
+class TestMetadataCache(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.cache = MetadataCache(path=os.path.join(self.tmp_dir.name, "cache.sqlite"))
+
+    def tearDown(self):
+        self.cache.close()
+        self.tmp_dir.cleanup()
+
+    def test_roundtrip_trims_info(self):
+        """ Test that the stored entry keeps only the used fields """
+        self.cache.put(make_info("dQw4w9WgXcQ"))
+        info, formats_fresh = self.cache.get("dQw4w9WgXcQ")
+        self.assertTrue(formats_fresh)
+        self.assertEqual(info["title"], "Title dQw4w9WgXcQ")
+        self.assertNotIn("http_headers", info)
+        self.assertEqual(info["formats"][0]["url"], "https://signed")
+        self.assertIsNone(self.cache.get("missing"))
+
+    def test_formats_expire_with_the_urls(self):
+        """ Test that the formats go stale before their signed URLs expire, and the manifest formats are not stored """
+        info = make_info("a")
+        info["formats"][0]["url"] = f"https://signed?expire={int(time.time()) + URL_EXPIRY_MARGIN - 1}"
+        info["formats"].append({"format_id": "hls", "protocol": "m3u8_native", "url": "https://manifest"})
+        self.cache.put(info)
+        info, formats_fresh = self.cache.get("a")
+        self.assertFalse(formats_fresh)
+        self.assertEqual([f["format_id"] for f in info["formats"]], ["140"])
+        self.assertNotIn("formats_expire", info)
+
+        info = make_info("b")
+        info["formats"][0]["url"] = f"https://signed?expire={int(time.time()) + URL_EXPIRY_MARGIN + 60}"
+        self.cache.put(info)
+        self.assertTrue(self.cache.get("b")[1])
+
+    def test_ttl_and_formats_freshness(self):
+        """ Test that the formats go stale before the entry expires """
+        self.cache.formats_ttl = 0.05
+        self.cache.ttl = 0.2
+        self.cache.put(make_info("a"))
+        time.sleep(0.1)
+        info, formats_fresh = self.cache.get("a")
+        self.assertFalse(formats_fresh)
+        time.sleep(0.15)
+        self.assertIsNone(self.cache.get("a"))
+
+    def test_lru_eviction(self):
+        """ Test that the least recently used entries are evicted over max_entries """
+        self.cache.max_entries = 3
+        for video_id in ["a", "b", "c"]:
+            self.cache.put(make_info(video_id))
+            time.sleep(0.01)
+        self.cache.get("a")# "b" becomes the least recently used
+        self.cache.put(make_info("d"))
+        self.assertIsNone(self.cache.get("b"))
+        self.assertIsNotNone(self.cache.get("a"))
+        self.assertEqual(self.cache.get_stats()["entries"], 3)
+
+    def test_running_totals(self):
+        """ Test that the running entry and byte totals follow the inserts, replaces, removes and evictions """
+        self.cache.max_entries = 4
+        for video_id in ["a", "b", "c", "a", "d", "e", "f"]:
+            self.cache.put(make_info(video_id, description=video_id * 100))
+        self.cache.remove("f")
+        self.cache.remove("missing")
+        count, total_bytes = self.cache._connect().execute("SELECT COUNT(*), SUM(size) FROM metadata").fetchone()
+        self.assertEqual(self.cache.get_stats(), {"entries": count, "bytes": total_bytes})
+        self.assertEqual(count, 3)
+        self.cache.close()
+        reopened = MetadataCache(path=self.cache.path)
+        self.assertEqual(reopened.get_stats(), {"entries": count, "bytes": total_bytes})
+        reopened.close()
+
+    def test_persistence(self):
+        """ Test that the entries survive reopening the database """
+        self.cache.put(make_info("a"))
+        self.cache.close()
+        reopened = MetadataCache(path=self.cache.path)
+        self.assertIsNotNone(reopened.get("a"))
+        reopened.close()
+
+class TestExtractVideoID(unittest.TestCase):
+
+    def test_url_formats(self):
+        """ Test extraction of the video ID from the common URL formats """
+        video_id = "dQw4w9WgXcQ"
+        for url in [f"https://www.youtube.com/watch?v={video_id}",
+                    f"https://www.youtube.com/watch?v={video_id}&list=PLLgJJsrdwhPxa6-02-CeHW8ocwSwl2jnu",
+                    f"https://youtu.be/{video_id}",
+                    f"https://www.youtube.com/shorts/{video_id}",
+                    f"https://www.youtube.com/embed/{video_id}"]:
+            self.assertEqual(extract_youtube_video_id(url), video_id)
+        self.assertIsNone(extract_youtube_video_id("https://www.youtube.com/playlist?list=PLbpi6ZahtOH6GomiNz1MJDa2aQOeFiMKH"))
+
+if __name__ == '__main__':
+    unittest.main()
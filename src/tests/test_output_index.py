@@ -0,0 +1,63 @@
+import unittest
+import os
+import sys
+import tempfile
+# Add the 'src' directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src')))
+from core.output_index import OutputIndex
+from core.download_options import COMBINED_SYMBOL, AUDIO_ONLY_SYMBOL
+
+def write_file(path, size):
+    with open(path, "wb") as f:
+        f.write(b"0" * size)
+    return path
+
+class TestOutputIndex(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.output_dir = self.tmp_dir.name
+        self.index = OutputIndex(self.output_dir)
+
+    def tearDown(self):
+        self.index.close()
+        self.tmp_dir.cleanup()
+
+    def test_record_and_lookup_persist(self):
+        """ Test that the recorded outputs are found again after a restart """
+        path = write_file(os.path.join(self.output_dir, "Title A.mkv"), 10)
+        self.assertTrue(self.index.record("a", COMBINED_SYMBOL, path))
+        self.assertFalse(self.index.record("a", AUDIO_ONLY_SYMBOL, os.path.join(self.output_dir, "missing.aac")))
+        self.index.close()
+        self.index = OutputIndex(self.output_dir)
+        self.assertEqual(self.index.lookup("a", COMBINED_SYMBOL), path)
+        self.assertIsNone(self.index.lookup("a", AUDIO_ONLY_SYMBOL))
+
+    def test_changed_or_deleted_file_is_dropped(self):
+        """ Test that an output which changed size or was deleted is not reported """
+        path = write_file(os.path.join(self.output_dir, "Title A.mkv"), 10)
+        self.index.record("a", COMBINED_SYMBOL, path)
+        write_file(path, 5)
+        self.assertIsNone(self.index.lookup("a", COMBINED_SYMBOL))
+        self.assertEqual(self.index.get_stats()["entries"], 0)
+
+    def test_lookup_by_expected_name(self):
+        """ Test that outputs of earlier, unindexed runs are found by name and indexed """
+        path = write_file(os.path.join(self.output_dir, "Title B.mkv"), 10)
+        self.assertIsNone(self.index.lookup("b", COMBINED_SYMBOL, "Other.mkv"))
+        self.assertEqual(self.index.lookup("b", COMBINED_SYMBOL, "Title B.mkv"), path)
+        os.remove(path)
+        self.assertIsNone(self.index.lookup("b", COMBINED_SYMBOL))
+
+    def test_same_name_of_another_video(self):
+        """ Test that a file indexed for one video is not claimed by another video with the same title """
+        path = write_file(os.path.join(self.output_dir, "Trailer.mkv"), 10)
+        self.index.record("a", COMBINED_SYMBOL, path)
+        self.assertIsNone(self.index.lookup("b", COMBINED_SYMBOL, "Trailer.mkv"))
+        self.index.close()
+        self.index = OutputIndex(self.output_dir)
+        self.assertIsNone(self.index.lookup("b", COMBINED_SYMBOL, "Trailer.mkv"))
+        self.assertEqual(self.index.lookup("a", COMBINED_SYMBOL, "Trailer.mkv"), path)
+
+if __name__ == '__main__':
+    unittest.main()
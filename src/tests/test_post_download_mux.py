@@ -0,0 +1,139 @@
+import unittest
+import os
+import sys
+import shutil
+import tempfile
+import threading
+import importlib.util
+from unittest.mock import patch
+# Add the 'src' directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src')))
+
+def lavfi_source(source, codec_args, container):
+    # A synthetic stream written to stdout, in place of a yt-dlp download
+    return ["ffmpeg", "-loglevel", "error", "-f", "lavfi", "-i", source] + codec_args + ["-f", container, "-"]
+
+@unittest.skipUnless(shutil.which("ffmpeg") and importlib.util.find_spec("ffmpeg"), "ffmpeg is not available")
+class TestStreamingMux(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.output_file = os.path.join(self.tmp_dir.name, "out.mkv")
+        self.video = lavfi_source("testsrc=duration=2:size=320x240:rate=25", ["-c:v", "mpeg4"], "matroska")
+        self.audio = lavfi_source("sine=duration=2", ["-c:a", "aac"], "adts")
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def test_mux_from_pipes(self):
+        """ Test that both piped streams end up in the output without temp files """
+        from core.post_download_mux import combine_via_ffmpeg_pipes
+        combine_via_ffmpeg_pipes(self.output_file, self.video, self.audio)
+        self.assertGreater(os.path.getsize(self.output_file), 0)
+        self.assertEqual(os.listdir(self.tmp_dir.name), ["out.mkv"])
+
+    def test_failed_source_raises(self):
+        """ Test that a failing source is reported instead of hanging """
+        from core.post_download_mux import combine_via_ffmpeg_pipes
+        with self.assertRaises(RuntimeError):
+            combine_via_ffmpeg_pipes(self.output_file, self.video, [sys.executable, "-c", "import sys; sys.exit(1)"])
+
+@unittest.skipUnless(shutil.which("ffmpeg") and importlib.util.find_spec("ffmpeg"), "ffmpeg is not available")
+class TestMuxStage(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        import subprocess
+        cls.tmp_dir = tempfile.TemporaryDirectory()
+        cls.video_file = os.path.join(cls.tmp_dir.name, "video.mkv")
+        cls.audio_file = os.path.join(cls.tmp_dir.name, "audio.aac")
+        subprocess.run(lavfi_source("testsrc=duration=1:size=160x120:rate=25", ["-c:v", "mpeg4"], "matroska")[:-1] + [cls.video_file], check=True)
+        subprocess.run(lavfi_source("sine=duration=1", ["-c:a", "aac"], "adts")[:-1] + [cls.audio_file], check=True)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.tmp_dir.cleanup()
+
+    def test_handoff_and_stats(self):
+        """ Test that the handed off muxes run in the pool, their continuations follow and the latencies are reported """
+        from core.post_download_mux import MuxStage
+        stage = MuxStage(max_workers=2)
+        finished = []
+        futures = []
+        for n in range(3):
+            output_file = os.path.join(self.tmp_dir.name, f"out{n}.mkv")
+            futures.append(stage.submit(output_file, self.video_file, [self.audio_file], [], then=lambda n=n: finished.append(n) or n))
+        self.assertTrue(stage.join(timeout=60))
+        stage.shutdown()
+        self.assertEqual(sorted(finished), [0, 1, 2])
+        self.assertEqual([future.result() for future in futures], [0, 1, 2])
+        stats = stage.get_stats()
+        self.assertEqual((stats["completed"], stats["errors"], stats["queue_depth"]), (3, 0, 0))
+        self.assertGreater(stats["mux_latency_avg"], 0)
+
+    def test_failed_mux(self):
+        """ Test that a failed mux is counted and raised from the future without running the continuation """
+        from core.post_download_mux import MuxStage
+        stage = MuxStage(max_workers=1)
+        future = stage.submit(os.path.join(self.tmp_dir.name, "bad.mkv"), "missing.mkv", ["missing.aac"], [], then=self.fail)
+        self.assertIsNotNone(future.exception(timeout=60))
+        stage.shutdown()
+        self.assertEqual(stage.get_stats()["errors"], 1)
+
+    def test_batch_join(self):
+        """ Test that a batch only waits for its own muxes and not for those of another batch """
+        from core.post_download_mux import MuxStage
+        stage = MuxStage(max_workers=2)
+        first, second = stage.batch(), stage.batch()
+        release = threading.Event()
+        first.submit(os.path.join(self.tmp_dir.name, "first.mkv"), self.video_file, [self.audio_file], [])
+        blocked = second.submit(os.path.join(self.tmp_dir.name, "second.mkv"), self.video_file, [self.audio_file], [],
+                                then=lambda: release.wait(60))
+        self.assertTrue(first.join(timeout=60))
+        self.assertFalse(blocked.done())
+        self.assertFalse(second.join(timeout=0.05))
+        release.set()
+        self.assertTrue(second.join(timeout=60))
+        stage.shutdown()
+
+    def test_inline_fallback(self):
+        """ Test that the muxes run inline in the calling thread when the process pool cannot start """
+        import core.post_download_mux as mux
+        stage = mux.MuxStage(max_workers=2)
+        threads = []
+        with patch.object(mux, "ProcessPoolExecutor", side_effect=OSError("no multiprocessing")):
+            future = stage.submit(os.path.join(self.tmp_dir.name, "inline.mkv"), self.video_file, [self.audio_file], [],
+                                  then=lambda: threads.append(threading.current_thread()) or "done")
+        self.assertTrue(future.done())
+        self.assertEqual(future.result(), "done")
+        self.assertEqual(threads, [threading.current_thread()])
+        self.assertTrue(stage.get_stats()["inline"])
+        self.assertGreater(os.path.getsize(os.path.join(self.tmp_dir.name, "inline.mkv")), 0)
+
+@unittest.skipUnless(importlib.util.find_spec("ffmpeg"), "ffmpeg-python is not installed")
+class TestMuxToolSelection(unittest.TestCase):
+
+    def setUp(self):
+        import core.post_download_mux as mux
+        self.mux = mux
+        self.saved = (mux._mux_tools, mux.mux_tool_selection)
+        mux._mux_tools = {mux.MUX_TOOL_FFMPEG: "/usr/bin/ffmpeg", mux.MUX_TOOL_MKVMERGE: "/usr/bin/mkvmerge"}
+
+    def tearDown(self):
+        self.mux._mux_tools, self.mux.mux_tool_selection = self.saved
+
+    def test_auto_order_by_container(self):
+        """ Test that mkvmerge is preferred for matroska and ffmpeg for the other containers """
+        self.assertEqual(self.mux.get_mux_tool_order("out.mkv"), ["mkvmerge", "ffmpeg"])
+        self.assertEqual(self.mux.get_mux_tool_order("out.mp4"), ["ffmpeg"])
+
+    def test_selected_tool_first(self):
+        """ Test that the selected tool is tried first and a missing tool is left out """
+        self.mux.mux_tool_selection = self.mux.MUX_TOOL_ALIASES["FFMPG"]
+        self.assertEqual(self.mux.get_mux_tool_order("out.mkv"), ["ffmpeg", "mkvmerge"])
+        del self.mux._mux_tools[self.mux.MUX_TOOL_FFMPEG]
+        self.assertEqual(self.mux.get_mux_tool_order("out.mkv"), ["mkvmerge"])
+        self.assertEqual(self.mux.get_mux_tool_order("out.mp4"), [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,111 @@
+import unittest
+import os
+import sys
+import shutil
+import time
+import tempfile
+import threading
+import importlib.util
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+# Add the 'src' directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src')))
+
+PAYLOAD = os.urandom(3 * 1024 * 1024 + 7)
+
+class RangeHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"# Keep-alive
+    slow_requests = 0
+
+    def do_GET(self):
+        range_header = self.headers.get("Range")
+        if self.path == "/failfirst" and range_header and range_header != "bytes=0-0":
+            # The first segment fails at once, the other ones are slow
+            if range_header.startswith("bytes=0-"):
+                self.send_response(403)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            RangeHandler.slow_requests += 1
+            time.sleep(0.2)
+        if self.path == "/norange" or not range_header:
+            status, body, content_range = 200, PAYLOAD, None
+        else:
+            start, end = (int(n) for n in range_header.split("=", 1)[1].split("-"))
+            end = min(end, len(PAYLOAD) - 1)
+            status, body, content_range = 206, PAYLOAD[start:end + 1], f"bytes {start}-{end}/{len(PAYLOAD)}"
+        self.send_response(status)
+        if content_range:
+            self.send_header("Content-Range", content_range)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        try:
+            self.wfile.write(body)
+        except (BrokenPipeError, ConnectionResetError):
+            pass# The client closed a response it did not read to the end
+
+    def log_message(self, *args):
+        pass
+
+class TestSplitByteRanges(unittest.TestCase):
+
+    @unittest.skipUnless(importlib.util.find_spec("requests"), "requests is not installed")
+    def test_ranges_cover_the_file(self):
+        """ Test that the ranges are contiguous and cover every byte once """
+        from core.segmented_download import split_byte_ranges
+        for total, segments in ((10, 3), (3, 8), (1024, 4)):
+            ranges = split_byte_ranges(total, segments)
+            self.assertEqual(ranges[0][0], 0)
+            self.assertEqual(ranges[-1][1], total - 1)
+            self.assertEqual(sum(end - start + 1 for start, end in ranges), total)
+            for (_, end), (start, _) in zip(ranges, ranges[1:]):
+                self.assertEqual(start, end + 1)
+
+@unittest.skipUnless(importlib.util.find_spec("requests"), "requests is not installed")
+class TestSegmentedDownloader(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.server = ThreadingHTTPServer(("127.0.0.1", 0), RangeHandler)
+        cls.base_url = f"http://127.0.0.1:{cls.server.server_address[1]}"
+        threading.Thread(target=cls.server.serve_forever, daemon=True).start()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.server.shutdown()
+
+    def setUp(self):
+        self.temp_dir = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.temp_dir)
+
+    def test_segmented_download(self):
+        """ Test that the parallel ranges reassemble into the exact file """
+        from core.segmented_download import SegmentedDownloader
+        output = os.path.join(self.temp_dir, "stream.mp4")
+        size = SegmentedDownloader(segments=4, request_size=1024 * 1024).download(self.base_url + "/stream", output)
+        self.assertEqual(size, len(PAYLOAD))
+        with open(output, "rb") as f:
+            self.assertEqual(f.read(), PAYLOAD)
+
+    def test_range_not_supported(self):
+        """ Test that a server without range support is rejected before anything is written """
+        from core.segmented_download import SegmentedDownloader
+        output = os.path.join(self.temp_dir, "stream.mp4")
+        with self.assertRaises(IOError):
+            SegmentedDownloader(segments=4).download(self.base_url + "/norange", output)
+        self.assertFalse(os.path.exists(output))
+
+    def test_failed_segment_stops_the_others(self):
+        """ Test that a failed segment stops the other segments and its own error is raised """
+        from core.segmented_download import SegmentedDownloader, SegmentStopped
+        output = os.path.join(self.temp_dir, "stream.mp4")
+        RangeHandler.slow_requests = 0
+        with self.assertRaises(IOError) as context:
+            SegmentedDownloader(segments=2, request_size=1024 * 1024).download(self.base_url + "/failfirst", output)
+        self.assertNotIsInstance(context.exception, SegmentStopped)
+        # The second segment needs 2 range requests, it stops after the first one
+        self.assertEqual(RangeHandler.slow_requests, 1)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,41 @@
+import unittest
+import os
+import sys
+import importlib.util
+# Add the 'src' directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src')))
+
+FLAT_ENTRY = {
+    '_type': 'url', 'ie_key': 'Youtube', 'id': 'dQw4w9WgXcQ', 'url': 'https://www.youtube.com/watch?v=dQw4w9WgXcQ',
+    'title': 'Flat entry', 'channel': 'Some channel', 'duration': 212,
+}
+
+@unittest.skipUnless(all(importlib.util.find_spec(m) for m in ("yt_dlp", "PIL", "requests")), "yt-dlp handler dependencies are not installed")
+class TestSerializedCache(unittest.TestCase):
+
+    def test_cached_until_a_displayed_field_changes(self):
+        """ Test that the serialisation is cached until one of the displayed fields changes """
+        from core.yt_dlp_handler import VideoInfo
+        calls = []
+        def serializer(item):
+            calls.append(item.title)
+            return (item.title, item.download_status)
+        stub = VideoInfo.from_flat_entry(FLAT_ENTRY)
+        first = stub.get_serialized(serializer)
+        self.assertIs(stub.get_serialized(serializer), first)
+        self.assertEqual(len(calls), 1)
+        # Fields that are not displayed keep the cache
+        stub.formats_stale = False
+        stub.logger = None
+        self.assertIs(stub.get_serialized(serializer), first)
+        # The displayed ones drop it
+        stub.download_status = "done"
+        self.assertEqual(stub.get_serialized(serializer), ('Flat entry', "done"))
+        stub.title = "Renamed"
+        self.assertEqual(stub.get_serialized(serializer), ('Renamed', "done"))
+        self.assertEqual(calls, ['Flat entry', 'Flat entry', 'Renamed'])
+        # Another serializer does not get the cached result of the first
+        self.assertEqual(stub.get_serialized(lambda item: item.video_id), 'dQw4w9WgXcQ')
+
+if __name__ == '__main__':
+    unittest.main()
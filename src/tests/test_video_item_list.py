@@ -0,0 +1,134 @@
+import unittest
+import os
+import sys
+import threading
+from types import SimpleNamespace
+# Add the 'src' directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src')))
+from core.video_item_list import VideoItemList
+
+def make_item(video_id):
+    return SimpleNamespace(video_id=video_id, url=f"https://www.youtube.com/watch?v={video_id}")
+
+class TestVideoItemList(unittest.TestCase):
+
+    def setUp(self):
+        self.items = [make_item(f"id{n}") for n in range(5)]
+        self.store = VideoItemList(self.items)
+
+    def test_order_and_positional_access(self):
+        """ Test that the insertion order is kept after removals """
+        self.store.remove(self.items[1])
+        self.assertEqual([item.video_id for item in self.store], ["id0", "id2", "id3", "id4"])
+        self.assertEqual(self.store[1], self.items[2])
+        self.assertEqual(self.store.index(self.items[3]), 2)
+        self.assertEqual(len(self.store), 4)
+
+    def test_dedup_on_insert(self):
+        """ Test that a second item with the same video_id is rejected """
+        self.assertFalse(self.store.append(make_item("id0")))
+        self.assertEqual(len(self.store), 5)
+        self.assertIs(self.store.get_by_video_id("id0"), self.items[0])
+
+    def test_url_index(self):
+        """ Test the URL lookup including the aliases and removal """
+        alias = "https://youtu.be/id2"
+        self.store.add_url_alias(alias, "id2")
+        self.assertIs(self.store.get_by_url(alias), self.items[2])
+        self.assertTrue(self.store.has_url(self.items[2].url))
+        self.store.remove(self.items[2])
+        self.assertFalse(self.store.has_url(alias))
+        self.assertFalse(self.store.has_url(self.items[2].url))
+        self.assertIsNone(self.store.get_by_video_id("id2"))
+
+    def test_membership_and_errors(self):
+        """ Test membership by identity and removal of a missing item """
+        self.assertIn(self.items[0], self.store)
+        self.assertNotIn(make_item("id0"), self.store)
+        with self.assertRaises(ValueError):
+            self.store.remove(make_item("missing"))
+
+    def test_iteration_while_removing(self):
+        """ Test that the store can be changed while iterating """
+        for item in self.store:
+            self.store.remove(item)
+        self.assertEqual(len(self.store), 0)
+        self.assertFalse(self.store)
+
+    def test_concurrent_insert_if_absent(self):
+        """ Test that concurrent inserts of the same video_ids keep exactly one item each """
+        store = VideoItemList()
+        inserted = []
+        barrier = threading.Barrier(16)
+
+        def worker():
+            barrier.wait()
+            for n in range(200):
+                if store.add_if_absent(make_item(f"id{n}")):
+                    inserted.append(n)
+
+        threads = [threading.Thread(target=worker) for _ in range(16)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        self.assertEqual(len(store), 200)
+        self.assertEqual(sorted(inserted), list(range(200)))
+        self.assertEqual(len(store.get_urls()), 200)
+
+    def test_claim_url(self):
+        """ Test that a URL can only be claimed once until it is released """
+        url = "https://www.youtube.com/watch?v=new"
+        claim = self.store.claim_url(url)
+        self.assertIsNotNone(claim)
+        claimed_by_other = []
+        t = threading.Thread(target=lambda: claimed_by_other.append(self.store.claim_url(url)))
+        t.start()
+        t.join()
+        self.assertEqual(claimed_by_other, [None])
+        # Nor by the same thread (e.g. the async engine claims every URL from its event loop thread)
+        self.assertIsNone(self.store.claim_url(url))
+        # Only the token of the claim releases it
+        self.store.release_url(url, claim + 1)
+        self.assertIsNone(self.store.claim_url(url))
+        self.store.release_url(url, claim)
+        self.assertIsNotNone(self.store.claim_url(url))
+        self.assertIsNone(self.store.claim_url(self.items[0].url))
+
+    def test_changes_since(self):
+        """ Test that a delta holds only the items added, touched and removed after the version, in list order """
+        version = self.store.get_change_version()
+        self.assertEqual(self.store.get_changes_since(version), ([], [], version))
+        self.store.touch(self.items[3])
+        self.store.touch(self.items[1])
+        self.store.remove(self.items[4])
+        self.store.append(make_item("new"))
+        changed, removed, new_version = self.store.get_changes_since(version)
+        self.assertEqual([item.video_id for item in changed], ["id1", "id3", "new"])
+        self.assertEqual(removed, ["id4"])
+        self.assertGreater(new_version, version)
+        # A removed and re-added item is a change again, an untracked item is not touched
+        self.store.append(self.items[4])
+        self.store.touch(make_item("absent"))
+        changed, removed, _ = self.store.get_changes_since(new_version)
+        self.assertEqual(([item.video_id for item in changed], removed), (["id4"], []))
+
+    def test_changes_since_needs_full_reload(self):
+        """ Test that a version from another list, a cleared list or before the dropped tombstones is not served as a delta """
+        self.assertIsNone(self.store.get_changes_since(self.store.get_change_version() + 1))
+        version = self.store.get_change_version()
+        self.store.clear()
+        self.assertIsNone(self.store.get_changes_since(version))
+        self.assertEqual(self.store.get_changes_since(self.store.get_change_version())[0], [])
+
+        store = VideoItemList([make_item(f"id{n}") for n in range(10)])
+        store.MAX_TOMBSTONES = 3
+        version = store.get_change_version()
+        for item in list(store)[:5]:
+            store.remove(item)
+        self.assertIsNone(store.get_changes_since(version))
+        self.assertIsNotNone(store.get_changes_since(store.get_change_version() - 2))
+
+if __name__ == '__main__':
+    unittest.main()
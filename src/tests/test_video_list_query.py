@@ -0,0 +1,73 @@
+import unittest
+import os
+import sys
+import unittest.mock
+from types import SimpleNamespace
+# Add the 'src' directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src')))
+from core.video_item_list import VideoItemList
+from core.video_list_query import VideoListQuery, SortIndex, get_sort_value
+from core.download_options import DownloadProgress
+
+def make_item(video_id, title, author="A", length=None, views=None, download_status="☑"):
+    return SimpleNamespace(video_id=video_id, url=f"https://www.youtube.com/watch?v={video_id}", title=title, author=author,
+                           length=length, views=views, description="", download_status=download_status)
+
+class TestVideoListQuery(unittest.TestCase):
+
+    def setUp(self):
+        self.items = [
+            make_item("id0", "banana", "Bob", 300, 10),
+            make_item("id1", "Apple", "alice", 60, None, DownloadProgress.DONE),
+            make_item("id2", "cherry", "Bob", None, 5, " "),
+            make_item("id3", "apple pie", "Carol", 1200, 7, DownloadProgress.ERROR),
+        ]
+        self.store = VideoItemList(self.items)
+        self.query = VideoListQuery(self.store)
+
+    def ids(self, items):
+        return [item.video_id for item in items]
+
+    def test_sort_value(self):
+        """ Test that the numbers, the text and the missing values never compare with each other """
+        values = ["b", 3, None, "10", "A", 2.5, "None", ""]
+        self.assertEqual(sorted(values, key=get_sort_value), [2.5, 3, "10", "A", "b", None, "None", ""])
+
+    def test_sort(self):
+        """ Test the list order, the field order both ways and the missing values last """
+        self.assertEqual(self.ids(self.query.get_sorted_items()), ["id0", "id1", "id2", "id3"])
+        self.assertEqual(self.ids(self.query.get_sorted_items("title")), ["id1", "id3", "id0", "id2"])
+        self.assertEqual(self.ids(self.query.get_sorted_items("views")), ["id2", "id3", "id0", "id1"])
+        self.assertEqual(self.ids(self.query.get_sorted_items("duration", descending=True)), ["id3", "id0", "id1", "id2"])
+        with self.assertRaises(ValueError):
+            self.query.get_sorted_items("unknown")
+
+    def test_index_follows_changes(self):
+        """ Test that the sort index applies the changes of the list instead of sorting again """
+        index = SortIndex(self.store, "title")
+        self.assertEqual(index.get_sorted_ids(), ["id1", "id3", "id0", "id2"])
+        self.items[2].title = "aardvark"
+        self.store.touch(self.items[2])
+        self.store.remove(self.items[1])
+        self.store.append(make_item("id4", "zebra"))
+        with unittest.mock.patch.object(SortIndex, "_rebuild", side_effect=AssertionError("rebuilt")):
+            self.assertEqual(index.get_sorted_ids(), ["id2", "id3", "id0", "id4"])
+        # A cleared list is rebuilt
+        self.store.clear()
+        self.assertEqual(index.get_sorted_ids(), [])
+
+    def test_filter_and_page(self):
+        """ Test the filters and the pagination with the total number of matches """
+        page, total, version = self.query.query(offset=1, limit=2, sort="title")
+        self.assertEqual((self.ids(page), total, version), (["id3", "id0"], 4, self.store.get_change_version()))
+        self.assertEqual(self.ids(self.query.query(author="bob")[0]), ["id0", "id2"])
+        self.assertEqual(self.ids(self.query.query(status="done,error")[0]), ["id1", "id3"])
+        self.assertEqual(self.ids(self.query.query(status="pending")[0]), ["id0"])
+        self.assertEqual(self.ids(self.query.query(status="skipped")[0]), ["id2"])
+        self.assertEqual(self.ids(self.query.query(min_length=100, max_length=600)[0]), ["id0"])
+        page, total, _ = self.query.query(text="APPLE", sort="views", descending=True, limit=1)
+        self.assertEqual((self.ids(page), total), (["id3"], 2))
+#end
+
+if __name__ == '__main__':
+    unittest.main()
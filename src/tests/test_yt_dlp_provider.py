@@ -0,0 +1,30 @@
+import unittest
+import os
+import sys
+import importlib.util
+# Add the 'src' directory to sys.path
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../src')))
+
+@unittest.skipUnless(importlib.util.find_spec("yt_dlp"), "yt-dlp is not installed")
+class TestCommandLineArgs(unittest.TestCase):
+
+    def parse(self, args: list) -> dict:
+        import yt_dlp
+        return yt_dlp.parse_options(args + ["https://www.youtube.com/watch?v=dQw4w9WgXcQ"]).ydl_opts
+
+    def test_base_options_round_trip(self):
+        """ Test that a yt-dlp subprocess parses the flags back into the provider's options """
+        from core.yt_dlp_provider import YoutubeDLProvider
+        base_opts = {"cookiefile": "cookies.txt", "proxy": "socks5://127.0.0.1:1080", "socket_timeout": 7.0,
+                     "cookiesfrombrowser": ("firefox", "default", None, "work"), "http_headers": {"x-test": "1"}}
+        opts = self.parse(YoutubeDLProvider(base_opts).get_command_line_args())
+        for key, value in base_opts.items():
+            self.assertEqual(opts[key], value)
+
+    def test_no_base_options(self):
+        """ Test that a provider without options adds no flags """
+        from core.yt_dlp_provider import YoutubeDLProvider
+        self.assertEqual(YoutubeDLProvider().get_command_line_args(), [])
+
+if __name__ == '__main__':
+    unittest.main()
@@ -36,5 +36,12 @@ default = SimpleNamespace(
     PORT=8080,
     OUTDIR='./tmp',
     MT_ANALYSIS=True,
-    MT_DOWNLOAD=True
+    ASYNC_ANALYSIS=False,
+    MT_DOWNLOAD=True,
+    AN_WORKERS=8,
+    DL_WORKERS=4,
+    MUX_WORKERS=2,
+    STREAMS_PER_HOST=4,
+    MAX_RATE=0,
+    JOB_RATE=0
 )
\ No newline at end of file
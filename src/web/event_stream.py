@@ -0,0 +1,133 @@
+"""
+YouTube Video Downloader
+Copyright (C) 2023 JessyJP
+
+Author: JessyJP
+Year: 2024
+Description: This is a python source script part of the YouTube Video Downloader Suit.
+
+MIT License
+
+Copyright (c) 2024 JessyJP
+
+Permission is hereby granted, free of charge, to any person obtaining a copy
+of this software and associated documentation files (the "Software"), to deal
+in the Software without restriction, including without limitation the rights
+to use, copy, modify, merge, publish, distribute, sublicense, and/or sell
+copies of the Software, and to permit persons to whom the Software is
+furnished to do so, subject to the following conditions:
+
+The above copyright notice and this permission notice shall be included in all
+copies or substantial portions of the Software.
+
+THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR
+IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY,
+FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE
+AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER
+LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM,
+OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE
+SOFTWARE.
+"""
+# Imports
+import json
+import threading
+from collections import deque
+from itertools import islice
+from typing import Iterator, List, Optional, Tuple
+
+## ================================= Event stream definitions =================================
+DEFAULT_BUFFERED_EVENTS = 2000# Events kept for the reconnecting clients, an older Last-Event-ID gets a resync
+DEFAULT_KEEPALIVE = 15.0# Seconds between the keep-alive comments of an idle stream
+RESYNC_EVENT = "resync"# Tells the client that it missed events and has to reload the full state
+
+## ================================= Event broker class =================================
+class EventBroker:
+    """
+    Publish/subscribe hub of the server-sent events.
+
+    Every event is serialised once into its SSE frame and appended to a shared ring buffer with an increasing id.
+    The subscribers only keep their last seen id and read the buffer from there, so a publish costs the same for
+    one or fifty open dashboards and a slow client never holds up the others. A client which reconnects with a
+    Last-Event-ID that fell out of the buffer (or belongs to an earlier server run) gets a resync event instead.
+    """
+    def __init__(self, max_buffered: int = DEFAULT_BUFFERED_EVENTS):
+        self._events = deque(maxlen=max_buffered)# (event id, SSE frame)
+        self._last_id = 0
+        self._subscribers = 0
+        self._condition = threading.Condition()
+    #end
+
+    def publish(self, event: str, data) -> int:
+        """ Append an event for all the subscribers and return its id. """
+        return self.publish_encoded(event, json.dumps(data, separators=(',', ':')).encode('utf-8'))
+
+    def publish_encoded(self, event: str, payload: bytes) -> int:
+        """ Append an event whose data is already JSON encoded (UTF-8, single line). """
+        with self._condition:
+            self._last_id += 1
+            frame = f"id: {self._last_id}\nevent: {event}\ndata: ".encode('utf-8') + payload + b"\n\n"
+            self._events.append((self._last_id, frame))
+            self._condition.notify_all()
+            return self._last_id
+        #end
+
+    def get_last_id(self) -> int:
+        with self._condition:
+            return self._last_id
+        #end
+
+    def get_frames_since(self, last_id: int) -> Tuple[List[bytes], int, bool]:
+        """ The frames after last_id, the new last id and whether events were missed. """
+        with self._condition:
+            return self._get_frames_since(last_id)
+        #end
+
+    def stream(self, last_id: Optional[int] = None, keepalive: float = DEFAULT_KEEPALIVE, closed: threading.Event = None) -> Iterator[bytes]:
+        """
+        Generate the SSE frames of one subscriber, from after last_id (the Last-Event-ID of a reconnect) or else
+        from now on. Blocks between the events and yields a keep-alive comment every keepalive seconds.
+        """
+        with self._condition:
+            self._subscribers += 1
+            if last_id is None:
+                last_id = self._last_id
+            #end
+        #end
+        try:
+            yield b"retry: 3000\n\n"
+            while closed is None or not closed.is_set():
+                with self._condition:
+                    self._condition.wait_for(lambda: self._last_id != last_id, keepalive)
+                    frames, last_id, missed = self._get_frames_since(last_id)
+                #end
+                if missed:
+                    frames = [f"id: {last_id}\nevent: {RESYNC_EVENT}\ndata: {{}}\n\n".encode('utf-8')]
+                #end
+                # NOTE: one write per wake up, the frames published meanwhile are sent together
+                yield b"".join(frames) if frames else b": keep-alive\n\n"
+            #end
+        finally:
+            with self._condition:
+                self._subscribers -= 1
+            #end
+        #end
+
+    def get_stats(self) -> dict:
+        with self._condition:
+            return {"subscribers": self._subscribers, "last_event_id": self._last_id, "buffered": len(self._events)}
+        #end
+
+    # Helper methods (called with the lock held)
+    def _get_frames_since(self, last_id: int) -> Tuple[List[bytes], int, bool]:
+        if last_id == self._last_id:
+            return [], last_id, False
+        #end
+        oldest_id = self._events[0][0] if self._events else self._last_id + 1
+        if last_id > self._last_id or last_id < oldest_id - 1:
+            return [], self._last_id, True
+        #end
+        # The ids are consecutive, so the position in the buffer follows from the id
+        start = last_id - oldest_id + 1
+        frames = [frame for _, frame in islice(self._events, start, None)]
+        return frames, self._last_id, False
+#end
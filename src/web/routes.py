@@ -30,9 +30,15 @@ SOFTWARE.
 """
 # Module imports
 import os
+import json
+import zlib
 from types import SimpleNamespace
-from flask import Flask, render_template, request, jsonify, send_file, session
-from web.server_mgr import vlm, ProcessRoutine, video_info_to_dict
+from flask import Flask, render_template, request, jsonify, send_file, session, Response
+from web.server_mgr import vlm, ProcessRoutine, video_info_to_json
+from core.http_session import http_client
+from core.limiters import parse_rate
+from core.post_download_mux import get_mux_stage_stats
+from core.channel_sync import get_channel_sync_state
 from core.download_options import * # updateOutputKeepsStr, MediaSymbols # NOTE:imports the symbol list as well
 
 #==============================================================================
@@ -61,13 +67,118 @@ def getProgressbarValue():
     return format(vlm.statusProgressValue, '.2f')
 
 
+@router.route('/api/events', methods=['GET'])
+def events():
+    # Server-sent events of the state, status, progress and item changes. A reconnect continues after its Last-Event-ID.
+    last_event_id = request.headers.get('Last-Event-ID', request.args.get('lastEventId'))
+    last_event_id = int(last_event_id) if last_event_id and last_event_id.isdigit() else None
+    return Response(vlm.events.stream(last_event_id), mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+#end
+
+@router.route('/api/getEventStats', methods=['GET'])
+def getEventStats():
+    # Open event streams and the buffered events
+    return jsonify(vlm.events.get_stats())
+#end
+
+def video_items_response(items, meta: dict = None) -> Response:
+    # The items are joined from their cached JSON encodings, so only the changed items are encoded again.
+    # With meta the response is that object with the items array as its "items" field.
+    items_json = b"[" + b",".join(video_info_to_json(item) for item in items) + b"]"
+    if meta is not None:
+        items_json = json.dumps(meta, separators=(',', ':'))[:-1].encode('utf-8') + b',"items":' + items_json + b"}"
+    #end
+    return Response(items_json, mimetype='application/json')
+#end
+
 @router.route('/api/getVideoItemList', methods=['GET'])
 def getVideoItemList():
-    jsonList = []
-    for item in vlm.getVideoList():
-        jsonList.append(video_info_to_dict(item))
+    # The full list (an array), or with since=<version> only the changes after that list version.
+    # The list version is the ETag, so an unchanged list is answered with 304 and no body.
+    item_list = vlm.getVideoList()
+    list_id, version = item_list.list_id, item_list.get_change_version()# NOTE: the version is read before the items
+    etag = f"{list_id}-{version}"
+    if etag in request.if_none_match:
+        return Response(status=304, headers={'ETag': f'"{etag}"'})
+    #end
+
+    since = request.args.get('since', type=int)
+    if since is None:
+        response = video_items_response(item_list)
+    else:
+        changes = item_list.get_changes_since(since) if request.args.get('listId', list_id) == list_id else None
+        if changes is None:
+            # Too old or of another list (e.g. the server restarted), the client replaces its list
+            response = video_items_response(item_list, {"listId": list_id, "version": version, "full": True, "removed": []})
+        else:
+            changed, removed, version = changes
+            etag = f"{list_id}-{version}"
+            response = video_items_response(changed, {"listId": list_id, "version": version, "full": False, "removed": removed})
+        #end
     #end
-    return jsonify(jsonList)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    response.headers['X-List-Version'] = str(version)
+    return response
+#end
+
+@router.route('/api/queryVideoItemList', methods=['GET'])
+def queryVideoItemList():
+    # One page of the list sorted and filtered on the server, so the client only holds (and renders) the visible rows.
+    # Parameters: offset, limit, sort (a column key), order (asc/desc), author, status (done,error,pending,skipped),
+    # minLength/maxLength (seconds) and q (text in the title, author, description or video id).
+    args = request.args
+    item_list = vlm.getVideoList()
+    etag = f"{item_list.list_id}-{item_list.get_change_version()}-{zlib.crc32(request.query_string)}"
+    if etag in request.if_none_match:
+        return Response(status=304, headers={'ETag': f'"{etag}"'})
+    #end
+    try:
+        page, total, version = vlm.list_query.query(
+            offset=args.get('offset', 0, type=int), limit=args.get('limit', type=int),
+            sort=args.get('sort'), descending=args.get('order', 'asc').lower() == 'desc',
+            author=args.get('author'), status=args.get('status'), text=args.get('q'),
+            min_length=args.get('minLength', type=float), max_length=args.get('maxLength', type=float))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    #end
+    response = video_items_response(page, {"listId": item_list.list_id, "version": version, "total": total,
+                                           "offset": args.get('offset', 0, type=int)})
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+#end
+
+@router.route('/api/getHttpStats', methods=['GET'])
+def getHttpStats():
+    # Connection reuse counters of the shared HTTP client
+    return jsonify(http_client.get_stats())
+#end
+
+@router.route('/api/getMuxStats', methods=['GET'])
+def getMuxStats():
+    # Queue depth and per-mux latency of the process pool mux stage
+    return jsonify(get_mux_stage_stats())
+#end
+
+@router.route('/api/bandwidthLimits', methods=['GET'])
+def getBandwidthLimits():
+    # Current limits and counters of the bandwidth limiter
+    return jsonify(vlm.set_bandwidth_limits())
+#end
+
+@router.route('/api/bandwidthLimits', methods=['POST'])
+def setBandwidthLimits():
+    # Change the limits at runtime, the running downloads follow immediately. Rates in bytes per second or with K/M/G suffixes.
+    data = request.get_json(silent=True) or {}
+    try:
+        max_download_rate = parse_rate(data['maxDownloadRate']) if 'maxDownloadRate' in data else None
+        max_job_rate = parse_rate(data['maxJobRate']) if 'maxJobRate' in data else None
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": f"Invalid rate: {e}"}), 400
+    #end
+    return jsonify(vlm.set_bandwidth_limits(max_download_rate, max_job_rate)), 200
 #end
 
 @router.route('/api/analyzeURLtext', methods=['POST'])
@@ -81,23 +192,68 @@ def analyzeURLtext():
     return jsonify({"message": "Analysis process started"}), 202
 #end
 
+@router.route('/api/syncChannels', methods=['POST'])
+def syncChannels():
+    # Incremental channel sync of the given channel URLs, optionally followed by the download of the new uploads
+    data = request.get_json(silent=True) or {}
+    channel_urls = data.get('channels') or []
+    if isinstance(channel_urls, str):
+        channel_urls = channel_urls.split()
+    #end
+    if not channel_urls:
+        return jsonify({"error": "No channels provided"}), 400
+    #end
+    if not vlm.sync_channels_button_callback(channel_urls, download=bool(data.get('download', False))):
+        return jsonify({"error": f"Busy: {vlm.processState.value}"}), 409
+    #end
+    return jsonify({"message": f"Channel sync of {len(channel_urls)} channel(s) started"}), 202
+#end
+
+@router.route('/api/getChannelSyncState', methods=['GET'])
+def getChannelSyncState():
+    # Newest known upload and last sync time per channel
+    return jsonify(get_channel_sync_state(vlm.tmpOutputDir).get_channels())
+#end
+
 @router.route('/api/downloadVideoList', methods=['POST'])
 def downloadVideoList():
-    # Set state to ANALYSIS at the start
-    vlm.processState = ProcessRoutine.DOWNLOAD
-    # TODO: we could do a try-except here because we don't know what might happen and the flag might get stuck
-    # TODO: Similar approach should probably be taken for the analysis. I could do when i am not feeling lazy. 
-    # data = request.json
-    numericLimits = vlm.getLimitsAndPriorityFromUI()
-    
-    vlm.downloadAllVideoItems(
-                        process_via_multithreading=vlm.process_via_multithreading,
-                        limits=numericLimits,
-                        outputDir=vlm.tmpOutputDir,
-                        outputExt=vlm.outputExt)
-    
-    vlm.processState = ProcessRoutine.IDLE
-    return jsonify({"download": "download_path"}) , 202
+    # Submit a background download job of the selected items (all by default) and return its id right away
+    data = request.get_json(silent=True) or {}
+    try:
+        job = vlm.submit_download_job(data.get('videoIds'))
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 409
+    #end
+    return jsonify({"message": f"Download job {job.job_id} queued with {len(job.video_ids)} item(s)",
+                    "jobId": job.job_id, "statusUrl": f"/api/downloadJobs/{job.job_id}"}), 202
+#end
+
+@router.route('/api/downloadJobs', methods=['GET'])
+def getDownloadJobs():
+    # All the known jobs, newest last
+    return jsonify({"jobs": [job.to_dict() for job in vlm.download_jobs.get_jobs()], "stats": vlm.download_jobs.get_stats()})
+#end
+
+@router.route('/api/downloadJobs/<job_id>', methods=['GET'])
+def getDownloadJob(job_id):
+    # The job state and the progress of its items
+    status = vlm.get_download_job_status(job_id)
+    if status is None:
+        return jsonify({"error": f"Unknown job {job_id}"}), 404
+    #end
+    return jsonify(status)
+#end
+
+@router.route('/api/downloadJobs/<job_id>/cancel', methods=['POST'])
+def cancelDownloadJob(job_id):
+    if vlm.download_jobs.get(job_id) is None:
+        return jsonify({"error": f"Unknown job {job_id}"}), 404
+    #end
+    if not vlm.download_jobs.cancel(job_id):
+        return jsonify({"error": f"Job {job_id} already finished"}), 409
+    #end
+    return jsonify({"message": f"Job {job_id} cancelled"}), 202
+#end
 
 @router.route('/api/changeStatusForItemsSelectedByID', methods=['POST'])
 def changeStatusForItemsSelectedByID():
@@ -31,6 +31,7 @@ SOFTWARE.
 # Module imports
 import os
 import sys
+import json
 import threading
 from typing import Dict, List, Union, Tuple
 from enum import Enum
@@ -51,6 +52,10 @@ add_module_paths(source_dir)
 from core.common import audio_bitrate_list, video_resolution_list, fps_value_list
 from core.video_list_manager import VideoListManager
 from core.pytube_handler import LimitsAndPriority, VideoInfo
+from core.download_options import DownloadProgress
+from core.download_jobs import DownloadJobQueue, DownloadJob
+from core.limiters import bandwidth_limiter
+from web.event_stream import EventBroker
 
 #==============================================================================
 # Enum definition for backend current state
@@ -75,6 +80,9 @@ def singleton(cls):
 @singleton
 class WebServerVideoManager(VideoListManager):
     def __init__(self):        
+        # Server push channel of the state, status, progress and item changes (before the state fields which publish)
+        self.events = EventBroker()
+        self._processState = None
         super().__init__()
         # This status string is for updating the current process status
         self.statusMsg = "Ready!"
@@ -91,9 +99,23 @@ class WebServerVideoManager(VideoListManager):
         # Frontend client settings state
         self.clientState = dict()
         self.lastLimits = LimitsAndPriority()
+        # Background download jobs, the requests only submit them
+        self.download_jobs = DownloadJobQueue(self.run_download_job, cancel_function=self.abort_download_job, on_idle=self.on_download_jobs_idle)
         print("WebServerVideoManager is initialized")
     #end
 
+    @property
+    def processState(self) -> ProcessRoutine:
+        return self._processState
+
+    @processState.setter
+    def processState(self, state: ProcessRoutine):
+        changed = state is not self._processState
+        self._processState = state
+        if changed:
+            self.events.publish("state", {"state": state.value})
+        #end
+
     # Intermediate method to run the import operation in a separate thread
     def analyse_button_callback(self, text):
         def analysis_thread(target_func, args):
@@ -117,6 +139,98 @@ class WebServerVideoManager(VideoListManager):
         #end
     #end
 
+    # Intermediate method to run the incremental channel sync in a separate thread
+    def sync_channels_button_callback(self, channel_urls, download=False) -> bool:
+        def sync_thread():
+            self.processState = ProcessRoutine.ANALYSIS
+            self.setUiDispStatus("Channel sync started")
+            new_items = []
+            try:
+                _, new_items = self.sync_channels(channel_urls, self.tmpOutputDir, self.use_multithreading_analysis)
+            finally:
+                self.processState = ProcessRoutine.IDLE
+            #end
+            if download and new_items:
+                # Only the synced delta, not the other items of the shared list
+                try:
+                    self.submit_download_job([item.video_id for item in new_items])
+                except ValueError as e:
+                    self.setUiDispStatus(f"Channel sync download not queued: {e}")
+                #end
+            #end
+        #end
+
+        if self.processState is not ProcessRoutine.IDLE:
+            return False
+        #end
+        threading.Thread(target=sync_thread, daemon=True).start()
+        return True
+    #end
+
+    ## ------------------------------ Download jobs ------------------------------
+    def submit_download_job(self, video_ids: List[str] = None) -> DownloadJob:
+        """ Queue a download of the given items (all the items by default) with the current limits and output settings. """
+        if video_ids is None:
+            video_ids = [item.video_id for item in self.infoList]
+        #end
+        job = self.download_jobs.submit(video_ids, limits=self.getLimitsAndPriorityFromUI(), process_via_multithreading=self.process_via_multithreading,
+                                        outputDir=self.tmpOutputDir, outputExt=self.outputExt)
+        self.processState = ProcessRoutine.DOWNLOAD
+        return job
+    #end
+
+    def run_download_job(self, job: DownloadJob):
+        # Runs in a job queue worker thread
+        self.processState = ProcessRoutine.DOWNLOAD
+        items = [item for item in map(self.getItemByIndexOrVideoID, job.video_ids) if item is not None]
+        self.setUiDispStatus(f"Download job {job.job_id[:8]} started with {len(items)} item(s)")
+        self.downloadAllVideoItems(items=items, cancel_event=job.cancel_event, **job.params)
+    #end
+
+    def abort_download_job(self, job: DownloadJob):
+        # The items downloading now fail at their next chunk, the journal keeps their partial streams
+        n_aborted = bandwidth_limiter.abort(job.video_ids)
+        self.setUiDispStatus(f"Download job {job.job_id[:8]} cancelled, {n_aborted} running download(s) aborted")
+    #end
+
+    def on_download_jobs_idle(self):
+        if self.download_jobs.is_idle():
+            self.processState = ProcessRoutine.IDLE
+        #end
+    #end
+
+    def get_download_job_status(self, job_id: str) -> dict:
+        """ The job state with the progress of each of its items, or None for an unknown job. """
+        job = self.download_jobs.get(job_id)
+        if job is None:
+            return None
+        #end
+        status = job.to_dict()
+        items = []
+        for video_id in job.video_ids:
+            item = self.getItemByIndexOrVideoID(video_id)
+            if item is None:
+                items.append({"video_id": video_id, "state": "removed", "download_status": None, "bytes_done": 0})
+                continue
+            #end
+            # NOTE: the download status holds the output keeps until the item finishes, the running items are known by the limiter
+            if item.download_status in (DownloadProgress.DONE, DownloadProgress.ERROR):
+                state = "done" if item.download_status == DownloadProgress.DONE else "error"
+            elif bandwidth_limiter.is_running(video_id):
+                state = "downloading"
+            else:
+                state = "cancelled" if job.cancel_event.is_set() else "pending"
+            #end
+            items.append({"video_id": video_id, "title": item.title, "state": state, "download_status": item.download_status,
+                          "bytes_done": bandwidth_limiter.get_job_bytes(video_id)})
+        #end
+        states = [item["state"] for item in items]
+        status["items"] = items
+        status["progress"] = {state: states.count(state) for state in ("pending", "downloading", "done", "error", "cancelled")}
+        status["progress"]["total"] = len(items)
+        return status
+    #end
+
     def getLimitsDropdownValuesAndLastSelection(self) -> Dict[str, Union[List[str], str]]:
 
         # # Retrieve or set default last selected values
@@ -185,13 +299,59 @@ class WebServerVideoManager(VideoListManager):
     def setUiDispStatus(self, msg: str = ""):
         # In the GUI this was used to update the status bar at the bottom,
         # but here it can serve a more comprehensive purpose to update the client.
+        changed = msg != self.statusMsg
         self.statusMsg = msg
+        if changed:
+            self.events.publish("status", {"msg": msg})
+        #end
     #end
 
     # NOTE: @OVERWRITE This function overwrites/overrides the parent implementation
     def update_progressbar(self, index_in: int, total_in :int, task_level):
         # Call the parent to compute the progress value
-        self.statusProgressValue = super().update_progressbar(index_in, total_in, task_level)
+        progressValue = super().update_progressbar(index_in, total_in, task_level)
+        changed = round(progressValue, 2) != round(self.statusProgressValue, 2)
+        self.statusProgressValue = progressValue
+        if changed:
+            self.events.publish("progress", {"value": round(progressValue, 2)})
+        #end
+    #end
+
+    # NOTE: @OVERWRITE These functions overwrite/override the parent implementation to push the item changes to the clients
+    def addItem(self, video_info: VideoInfo) -> bool:
+        added = super().addItem(video_info)
+        if added:
+            self.publish_item(video_info)
+        #end
+        return added
+    #end
+
+    def removeItem(self, video_info: VideoInfo):
+        super().removeItem(video_info)
+        if video_info is not None:
+            self.events.publish("itemRemoved", {"video_id": video_info.video_id})
+        #end
+    #end
+
+    def updateVideoItemUIFields(self, videoItem):
+        super().updateVideoItemUIFields(videoItem)
+        self.publish_item(videoItem)
+    #end
+
+    def updateVideoItemUIDownloadState(self, videoItem, download_status=None):
+        # The displayed status is the given one (e.g. downloading) while the item keeps its output flags
+        self.publish_item(videoItem, download_status)
+        super().updateVideoItemUIDownloadState(videoItem, download_status)
+    #end
+
+    def publish_item(self, videoItem, download_status=None):
+        if download_status is None:
+            self.events.publish_encoded("item", video_info_to_json(videoItem))
+            return
+        #end
+        item_dict = video_info_to_dict(videoItem)
+        item_dict["download_status"] = download_status
+        self.events.publish("item", item_dict)
     #end
 
     def change_download_status(self, selection_ids, symbol, state="toggle"):
@@ -200,6 +360,7 @@ class WebServerVideoManager(VideoListManager):
             if item:
                 # Update download state of the video info in the handle table entry 
                 item.download_status = updateOutputKeepsStr(item.download_status, symbol, state)
+                self.updateVideoItemUIFields(item)
             else:
                 print(f"Item with ID {id} not found.")
                 # Handle the case where the item is not found
@@ -222,6 +383,7 @@ class WebServerVideoManager(VideoListManager):
                 
                 # Update download state of the video info in the handle table entry 
                 item.download_status = new_status
+                self.updateVideoItemUIFields(item)
             else:
                 print(f"Item with ID {id} not found.")
                 # Handle the case where the item is not found
@@ -233,7 +395,7 @@ class WebServerVideoManager(VideoListManager):
 
 #============================== Helper functions ==============================
 # Function to convert VideoInfo data to JSON
-def video_info_to_dict(vItem: VideoInfo) -> dict:
+def serialize_video_info(vItem: VideoInfo) -> Tuple[dict, bytes]:
     video_info_tuple = vItem.as_tuple()
     # -------------------
     # TODO: this is now redundant because it's integrated into the item
@@ -273,7 +435,24 @@ def video_info_to_dict(vItem: VideoInfo) -> dict:
         #end
     #end
 
-    return video_info_dict#json.dumps(video_info_dict, indent=4)
+    return video_info_dict, json.dumps(video_info_dict, separators=(',', ':')).encode('utf-8')
+#end
+
+def get_serialized_video_info(vItem: VideoInfo) -> Tuple[dict, bytes]:
+    # The yt-dlp items keep the serialisation until one of their displayed fields changes
+    if hasattr(vItem, "get_serialized"):
+        return vItem.get_serialized(serialize_video_info)
+    #end
+    return serialize_video_info(vItem)
+#end
+
+def video_info_to_dict(vItem: VideoInfo) -> dict:
+    # A copy, the cached dictionary is shared by all the requests
+    return dict(get_serialized_video_info(vItem)[0])
+#end
+
+def video_info_to_json(vItem: VideoInfo) -> bytes:
+    return get_serialized_video_info(vItem)[1]
 #end
 
 #================ Initialize the web server video item manager ================
@@ -1,6 +1,6 @@
 import * as Defaults from '../definitions.js';
 import {
-    getVideoItemList,
+    getVideoItemListChanges,
     getState,
     getStatusMsg,
     getProgressbarValue,
@@ -8,7 +8,7 @@ import {
     changeStatusForItemsSelectedByID
 } from '../api.js';
 import { updateProgressBarUi , setWebUIcontrolsEnabled, isDownloadButtonDisabled } from "../functions.js"
-// import VideoItem from './VideoItem.js';
+import VideoItem from './VideoItem.js';
 
 import ColumnManager from './ColumnManager.js';
 
@@ -26,6 +26,10 @@ class ItemManager {
         this.columnManager = new ColumnManager(this.checkAndUpdateState.bind(this), postClientStateSettings.bind(null, this));
         // Video items storing array for
         this.videoItems = [];
+        // The server list version of the stored items, the list updates only fetch the changes since
+        this.listId = null;
+        this.listVersion = null;
+        this.listEtag = null;
         // The auto-update internal variables
         this.checkModeFlag = false;
         this.idleCheckCounter = 0;
@@ -34,12 +38,110 @@ class ItemManager {
         this.maxIdleChecks = Defaults.maxIdleChecks;// Default maximum number of refreshes when server in IDLE 
         this.viewMode = Defaults.viewMode; // Default view mode
         this.maxGridCardsPerRow = Defaults.maxGridCardsPerRow; // Default Maximum number of grid cards per row
+        // The server push channel, while it is connected the updates are pushed instead of polled
+        this.eventSource = null;
+        this.pushConnected = false;
+        this.streamOpenedOnce = false;
+        this.renderPending = false;
 
         // Attach the container event listeners only once
         this.attachContextMenuListener()
     }
 
+    // ================================ Server push updates ================================
+
+    connectEventStream() {
+        if (!window.EventSource || this.eventSource) {
+            return; // Not supported (the polling stays in use) or already connected
+        }
+        this.eventSource = new EventSource(`${Defaults.API_PROXY}/api/events`);
+
+        this.eventSource.onopen = () => {
+            // NOTE: a reconnect resumes after the last event id, only the first connection needs the full snapshot
+            if (!this.streamOpenedOnce) {
+                this.streamOpenedOnce = true;
+                this.refreshAll();
+            }
+            this.pushConnected = true;
+        };
+        this.eventSource.onerror = () => {
+            // The browser reconnects by itself, meanwhile the user interactions fall back to polling
+            this.pushConnected = false;
+        };
+
+        this.eventSource.addEventListener('state', (event) => {
+            this.setUIElementsByState(JSON.parse(event.data).state);
+        });
+        this.eventSource.addEventListener('status', (event) => {
+            this.statusOutput.textContent = JSON.parse(event.data).msg;
+        });
+        this.eventSource.addEventListener('progress', (event) => {
+            updateProgressBarUi(JSON.parse(event.data).value);
+        });
+        this.eventSource.addEventListener('item', (event) => {
+            this.upsertItem(new VideoItem(JSON.parse(event.data)));
+        });
+        this.eventSource.addEventListener('itemRemoved', (event) => {
+            const videoId = JSON.parse(event.data).video_id;
+            this.videoItems = this.videoItems.filter(item => item.video_id !== videoId);
+            this.scheduleRender();
+        });
+        this.eventSource.addEventListener('resync', () => {
+            // Events were missed (e.g. the server restarted), reload the full state once
+            this.refreshAll();
+        });
+    }
+
+    upsertItem(newItem) {
+        const index = this.videoItems.findIndex(item => item.video_id === newItem.video_id);
+        if (index === -1) {
+            this.videoItems.push(newItem);
+            this.scheduleRender();
+        } else {
+            newItem.itemIsSelected = this.videoItems[index].itemIsSelected;
+            this.videoItems[index] = newItem;
+            this.replaceItemElement(index, newItem);
+        }
+    }
+
+    replaceItemElement(index, item) {
+        // A changed item replaces only its own row or card instead of rebuilding the whole view
+        if (this.renderPending) {
+            return; // The whole view is re-rendered in this frame anyway
+        }
+        const element = (this.viewMode === 'table' ? this.videoListTableBody : this.gridContainer).querySelector(`[data-video-id="${item.video_id}"]`);
+        if (!element) {
+            this.scheduleRender();
+            return;
+        }
+        const columnState = this.columnManager.getAllColumnsVisibility();
+        const newElement = this.viewMode === 'table' ? item.toTableRow(index, columnState) : item.toGridCard(index, columnState);
+        element.replaceWith(newElement);
+        item.setSelectionStateAndUpdateUI(item.itemIsSelected);
+    }
+
+    scheduleRender() {
+        // Coalesce the item events of one frame into a single re-render
+        if (this.renderPending) {
+            return;
+        }
+        this.renderPending = true;
+        requestAnimationFrame(() => {
+            this.renderPending = false;
+            this.displayItems(this.videoItems);
+        });
+    }
+
+    async refreshAll() {
+        this.updateUI(await getState());
+    }
+
     async checkAndUpdateState() {
+        if (this.pushConnected) {
+            // The server pushes the changes, only the local view needs a refresh (e.g. the columns changed)
+            this.displayItems(this.videoItems);
+            return;
+        }
         if (this.checkModeFlag) {
             return; // Already in check mode, so exit early
         }
@@ -82,17 +184,38 @@ class ItemManager {
 
         // Update the video list table 
         try {
-            let videoList = await getVideoItemList();
-            videoList = this.transferSelection(this.videoItems, videoList)
-            // Display the items which populates the display container
-            this.displayItems(videoList);
-            // Store the video list after transferring the selection
-            this.videoItems = videoList
+            await this.syncVideoList();
         } catch (error) {
             console.error("Error fetching video list: ", error);
         }
     }
 
+    async syncVideoList() {
+        // Fetch only the changes since the stored list version
+        const changes = await getVideoItemListChanges(this.listVersion, this.listId, this.listEtag);
+        if (changes === null) {
+            return; // Unchanged
+        }
+        this.listId = changes.listId;
+        this.listVersion = changes.version;
+        this.listEtag = changes.etag;
+
+        if (changes.full) {
+            // Store the video list after transferring the selection
+            this.videoItems = this.transferSelection(this.videoItems, changes.items);
+            this.displayItems(this.videoItems);
+            return;
+        }
+        if (changes.removed.length > 0) {
+            const removed = new Set(changes.removed);
+            this.videoItems = this.videoItems.filter(item => !removed.has(item.video_id));
+        }
+        changes.items.forEach(item => this.upsertItem(item));
+        if (changes.removed.length > 0) {
+            this.scheduleRender();
+        }
+    }
+
     displayItems(videoList) {
         const columnState = this.columnManager.getAllColumnsVisibility();
     
@@ -93,6 +93,53 @@ async function getVideoItemList() {
     }
 }
 
+async function getVideoItemListChanges(since, listId, etag) {
+    // Only the items changed after the list version since, null when the list did not change (304)
+    const params = new URLSearchParams({ since: since ?? 0 });
+    if (listId) {
+        params.set('listId', listId);
+    }
+    const headers = etag ? { 'If-None-Match': etag } : {};
+
+    try {
+        const response = await fetch(`${API_PROXY}/api/getVideoItemList?${params}`, { method: 'GET', headers: headers });
+        if (response.status === 304) {
+            return null;
+        }
+        if (!response.ok) {
+            throw new Error(`HTTP error! status: ${response.status}`);
+        }
+
+        const changes = await response.json();
+        changes.etag = response.headers.get('ETag');
+        changes.items = changes.items.map(videoData => new VideoItem(videoData));
+        return changes;
+    } catch (error) {
+        console.error("Error in getVideoItemListChanges: ", error);
+        return null; // Keep the current list in case of an error
+    }
+}
+
+async function queryVideoItemList(query = {}) {
+    // One sorted and filtered page of the list, e.g. { offset: 0, limit: 100, sort: 'views', order: 'desc', q: 'text' }
+    // The response has the total number of matches, so a virtualised view can size its scroll area.
+    const params = new URLSearchParams(Object.entries(query).filter(([, value]) => value !== undefined && value !== null && value !== ''));
+
+    try {
+        const response = await fetch(`${API_PROXY}/api/queryVideoItemList?${params}`, { method: 'GET' });
+        if (!response.ok) {
+            throw new Error(`HTTP error! status: ${response.status}`);
+        }
+
+        const page = await response.json();
+        page.items = page.items.map(videoData => new VideoItem(videoData));
+        return page;
+    } catch (error) {
+        console.error("Error in queryVideoItemList: ", error);
+        return { total: 0, offset: 0, items: [] };
+    }
+}
+
 async function getClientStateSettings() {
     try {
         const response = await fetch(`${API_PROXY}/api/update_client_state`, {
@@ -255,6 +302,8 @@ export {
     getStatusMsg,
     getProgressbarValue,
     getVideoItemList,
+    getVideoItemListChanges,
+    queryVideoItemList,
     getClientStateSettings,
     postClientStateSettings,
     changeStatusForItemsSelectedByID,
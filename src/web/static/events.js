@@ -58,6 +58,8 @@ window.addEventListener("load", async () => {
     tableManager.columnManager.updateColumnManagerState(appState.columnVisibility)
     
     tableManager.checkAndUpdateState();
+    // Switch to the pushed updates, the polling remains the fallback
+    tableManager.connectEventStream();
 });
 
 // Ensure the auto-update process is stopped when leaving the page
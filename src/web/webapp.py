@@ -37,11 +37,18 @@ from flask_cors import CORS
 from web.routes import router
 from types import SimpleNamespace
 from web.default_config import default
+from core.limiters import parse_rate
 
 
 def create_web_app(port: int = default.PORT, output_dir: str = default.OUTDIR,
          use_multithreading_analysis: bool = default.MT_ANALYSIS,
-         process_via_multithreading: bool = default.MT_DOWNLOAD):
+         use_async_analysis: bool = default.ASYNC_ANALYSIS,
+         process_via_multithreading: bool = default.MT_DOWNLOAD,
+         max_analysis_workers: int = default.AN_WORKERS,
+         max_download_workers: int = default.DL_WORKERS,
+         max_mux_workers: int = default.MUX_WORKERS,
+         max_download_rate: float = default.MAX_RATE,
+         max_job_rate: float = default.JOB_RATE):
     """Create and configure an instance of the Flask application."""
 
     if ( (output_dir == default.OUTDIR) and (not os.path.exists(output_dir)) ):
@@ -52,12 +59,21 @@ def create_web_app(port: int = default.PORT, output_dir: str = default.OUTDIR,
     # NOTE: When and if a proper user management and sessions for multi-users is implemented this will be handled properly
       
     vlm.use_multithreading_analysis = use_multithreading_analysis
+    vlm.use_async_analysis = use_async_analysis
     vlm.process_via_multithreading = process_via_multithreading
+    vlm.max_analysis_workers = max_analysis_workers
+    vlm.max_download_workers = max_download_workers
+    vlm.max_mux_workers = max_mux_workers
+    vlm.set_bandwidth_limits(max_download_rate, max_job_rate)
     vlm.setDownloadDir(output_dir)
 
     prefix = " -- Param: "
     print(f"{prefix}Use multithreading analysis set to: [{use_multithreading_analysis}]")
+    print(f"{prefix}Use async analysis set to: [{use_async_analysis}]")
     print(f"{prefix}Use process download and mux via multithreading set to: [{process_via_multithreading}]")
+    print(f"{prefix}Analysis workers set to: [{max_analysis_workers}]")
+    print(f"{prefix}Download workers set to: [{max_download_workers}] and mux workers set to: [{max_mux_workers}]")
+    print(f"{prefix}Bandwidth limit set to: [{max_download_rate}] B/s and per item limit set to: [{max_job_rate}] B/s (0 = unlimited)")
     print(f"{prefix}Port set to: [{port}]")
     print(f"{prefix}Output directory set to [{output_dir}]")
 
@@ -75,8 +91,11 @@ def create_web_app(port: int = default.PORT, output_dir: str = default.OUTDIR,
 
     return app
 
-def run_from_dispatcher(port,output_dir,use_multithreading_analysis,process_via_multithreading):
-    app = create_web_app(port,output_dir,use_multithreading_analysis,process_via_multithreading)
+def run_from_dispatcher(port,output_dir,use_multithreading_analysis,process_via_multithreading,
+                        max_analysis_workers=default.AN_WORKERS,max_download_workers=default.DL_WORKERS,max_mux_workers=default.MUX_WORKERS,
+                        use_async_analysis=default.ASYNC_ANALYSIS,max_download_rate=default.MAX_RATE,max_job_rate=default.JOB_RATE):
+    app = create_web_app(port,output_dir,use_multithreading_analysis,use_async_analysis,process_via_multithreading,
+                         max_analysis_workers,max_download_workers,max_mux_workers,max_download_rate,max_job_rate)
     debugON = not getattr(sys, 'frozen', False)# If not frozen then the debug mode is on
     debugON = False
     CORS(app)
@@ -88,13 +107,25 @@ def getEnvironmentalParameters():
         port=int(os.environ.get("PORT", default.PORT)),
         output_dir=os.environ.get("OUTPUT_DIR", default.OUTDIR),
         use_multithreading_analysis=os.environ.get("USE_MULTITHREADING_ANALYSIS", str(default.MT_ANALYSIS)) == "True",
-        process_via_multithreading=os.environ.get("PROCESS_VIA_MULTITHREADING", str(default.MT_DOWNLOAD)) == "True"
+        use_async_analysis=os.environ.get("USE_ASYNC_ANALYSIS", str(default.ASYNC_ANALYSIS)) == "True",
+        process_via_multithreading=os.environ.get("PROCESS_VIA_MULTITHREADING", str(default.MT_DOWNLOAD)) == "True",
+        max_analysis_workers=int(os.environ.get("ANALYSIS_WORKERS", default.AN_WORKERS)),
+        max_download_workers=int(os.environ.get("DOWNLOAD_WORKERS", default.DL_WORKERS)),
+        max_mux_workers=int(os.environ.get("MUX_WORKERS", default.MUX_WORKERS)),
+        max_download_rate=parse_rate(os.environ.get("MAX_DOWNLOAD_RATE", default.MAX_RATE)),
+        max_job_rate=parse_rate(os.environ.get("MAX_JOB_RATE", default.JOB_RATE))
     )
 
     # Diagnostic messages
     print(f"PORT: {'Environment variable used' if 'PORT' in os.environ else f'Default used: {env_params.port}'}")
     print(f"OUTPUT_DIR: {'Environment variable used' if 'OUTPUT_DIR' in os.environ else f'Default used: {env_params.output_dir}'}")
     print(f"USE_MULTITHREADING_ANALYSIS: {'Environment variable used' if 'USE_MULTITHREADING_ANALYSIS' in os.environ else f'Default used: {env_params.use_multithreading_analysis}'}")
+    print(f"USE_ASYNC_ANALYSIS: {'Environment variable used' if 'USE_ASYNC_ANALYSIS' in os.environ else f'Default used: {env_params.use_async_analysis}'}")
     print(f"PROCESS_VIA_MULTITHREADING: {'Environment variable used' if 'PROCESS_VIA_MULTITHREADING' in os.environ else f'Default used: {env_params.process_via_multithreading}'}")
+    print(f"ANALYSIS_WORKERS: {'Environment variable used' if 'ANALYSIS_WORKERS' in os.environ else f'Default used: {env_params.max_analysis_workers}'}")
+    print(f"DOWNLOAD_WORKERS: {'Environment variable used' if 'DOWNLOAD_WORKERS' in os.environ else f'Default used: {env_params.max_download_workers}'}")
+    print(f"MUX_WORKERS: {'Environment variable used' if 'MUX_WORKERS' in os.environ else f'Default used: {env_params.max_mux_workers}'}")
+    print(f"MAX_DOWNLOAD_RATE: {'Environment variable used' if 'MAX_DOWNLOAD_RATE' in os.environ else f'Default used: {env_params.max_download_rate}'}")
+    print(f"MAX_JOB_RATE: {'Environment variable used' if 'MAX_JOB_RATE' in os.environ else f'Default used: {env_params.max_job_rate}'}")
 
     return env_params